@@ -1,13 +1,25 @@
 """Analyzers that derive facts from Git history (deterministic, no LLM)."""
 
-from gitscribe.analyzers.breaking import detect_breaking_changes
-from gitscribe.analyzers.architecture import analyze_architecture_evolution
-from gitscribe.analyzers.timeline import build_development_timeline
-from gitscribe.analyzers.churn import compute_churn_report
-
-__all__ = [
-    "detect_breaking_changes",
-    "analyze_architecture_evolution",
-    "build_development_timeline",
-    "compute_churn_report",
-]
+from __future__ import annotations
+
+from gitscribe.lazy import lazy_exports
+
+# Public name -> defining module. Submodules are imported on first access so that
+# importing one analyzer does not pull in the others.
+_EXPORTS = {
+    "detect_breaking_changes": "gitscribe.analyzers.breaking",
+    "analyze_architecture_evolution": "gitscribe.analyzers.architecture",
+    "build_development_timeline": "gitscribe.analyzers.timeline",
+    "compute_churn_report": "gitscribe.analyzers.churn",
+    "build_churn_index": "gitscribe.analyzers.churn_index",
+    "release_churn": "gitscribe.analyzers.churn_index",
+    "compute_coupling_report": "gitscribe.analyzers.coupling",
+    "rank_hotspots": "gitscribe.analyzers.hotspots",
+    "compute_release_stats": "gitscribe.analyzers.releases",
+    "sample_commits": "gitscribe.analyzers.sampling",
+    "budget_sample_rate": "gitscribe.analyzers.sampling",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
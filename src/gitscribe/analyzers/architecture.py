@@ -1,13 +1,17 @@
 """
 Infer module/directory structure and how it evolved over time.
-Derived only from: file paths at revisions and commit history (adds/renames/deletes).
+Derived only from: file paths at revisions and commit history (adds/renames/deletes),
+plus blob sizes read from object headers.
 """
 
 from __future__ import annotations
 
-from collections import defaultdict
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
-from gitscribe.git_reader import CommitInfo, GitReader
+
+from gitscribe.git_reader import CommitInfo, FileHistoryEntry, GitReader
 
 
 @dataclass
@@ -19,6 +23,7 @@ class ModuleNode:
     first_seen_commit: str | None
     last_modified_commit: str | None
     child_paths: list[str] = field(default_factory=list)
+    size: int | None = None  # bytes of all files below it (None: not measured)
 
 
 @dataclass
@@ -31,15 +36,135 @@ class ArchitectureSnapshot:
     top_level_dirs: list[str]
     modules: dict[str, ModuleNode]
     total_files: int
+    total_size: int | None = None  # bytes (None: not measured)
+
+
+NO_PATH = 0xFFFFFFFF
+
+
+class FileEventLog:
+    """
+    Every file add/delete/rename event, in commit order, stored as parallel arrays:
+    commit index, path ID, action byte and (for renames) the target path ID.
+    Each event costs 13 bytes; paths and commit SHAs are interned once.
+    """
+
+    def __init__(self) -> None:
+        self.commit_shas: list[str] = []
+        self.paths: list[str] = []
+        self._path_ids: dict[str, int] = {}
+        self.commit_idx = array("I")
+        self.path_id = array("I")
+        self.action = array("B")
+        self.other_id = array("I")  # rename target, NO_PATH otherwise
+
+    def __len__(self) -> int:
+        return len(self.commit_idx)
+
+    def intern_path(self, path: str) -> int:
+        pid = self._path_ids.get(path)
+        if pid is None:
+            pid = self._path_ids[path] = len(self.paths)
+            self.paths.append(path)
+        return pid
+
+    def add_commit(self, sha: str) -> int:
+        self.commit_shas.append(sha)
+        return len(self.commit_shas) - 1
+
+    def append(self, commit_index: int, action: str, path: str, other: str | None = None) -> None:
+        self.commit_idx.append(commit_index)
+        self.path_id.append(self.intern_path(path))
+        self.action.append(ord(action))
+        self.other_id.append(self.intern_path(other) if other is not None else NO_PATH)
+
+    def extend(self, other: FileEventLog) -> FileEventLog:
+        """
+        Append the log of the commits that follow this log's last commit (in place);
+        returns self. Path IDs come out as if both ranges had been logged in one pass.
+        """
+        offset = len(self.commit_shas)
+        self.commit_shas.extend(other.commit_shas)
+        remap = [self.intern_path(p) for p in other.paths]
+        self.commit_idx.extend(ci + offset for ci in other.commit_idx)
+        self.path_id.extend(remap[pi] for pi in other.path_id)
+        self.action.extend(other.action)
+        self.other_id.extend(remap[oi] if oi != NO_PATH else NO_PATH for oi in other.other_id)
+        return self
+
+    def scoped(self, root: str) -> FileEventLog:
+        """
+        The events inside directory root, with paths relative to it. A rename across
+        the boundary becomes an add (moved in) or a delete (moved out).
+        """
+        prefix = root.strip("/") + "/"
+        log = FileEventLog()
+        log.commit_shas = list(self.commit_shas)
+        for ci, path, action, other in self._rows():
+            inside = path.startswith(prefix)
+            if action == "R" and other is not None:
+                other_inside = other.startswith(prefix)
+                if inside and other_inside:
+                    log.append(ci, "R", path[len(prefix) :], other[len(prefix) :])
+                elif inside:
+                    log.append(ci, "D", path[len(prefix) :])
+                elif other_inside:
+                    log.append(ci, "A", other[len(prefix) :])
+            elif inside:
+                log.append(ci, action, path[len(prefix) :])
+        return log
+
+    def _rows(self) -> Iterator[tuple[int, str, str, str | None]]:
+        paths = self.paths
+        for ci, pi, a, oi in zip(self.commit_idx, self.path_id, self.action, self.other_id):
+            yield ci, paths[pi], chr(a), paths[oi] if oi != NO_PATH else None
+
+    def __iter__(self) -> Iterator[tuple[str, str, str, str | None]]:
+        """Yield (commit_sha, path, action, rename_target) in commit order."""
+        paths, shas = self.paths, self.commit_shas
+        for ci, pi, a, oi in zip(self.commit_idx, self.path_id, self.action, self.other_id):
+            yield shas[ci], paths[pi], chr(a), paths[oi] if oi != NO_PATH else None
+
+    def lifetime(self, path: str) -> list[tuple[str, str]]:
+        """[(commit_sha, action), ...] for one path; renames read "R-><new path>"."""
+        pid = self._path_ids.get(path)
+        if pid is None:
+            return []
+        out: list[tuple[str, str]] = []
+        for i, p in enumerate(self.path_id):
+            if p == pid:
+                out.append((self.commit_shas[self.commit_idx[i]], _action_label(self, i)))
+        return out
+
+    def to_lifetime_dict(self) -> dict[str, list[tuple[str, str]]]:
+        """path -> [(commit_sha, action), ...] for every path (materializes all events)."""
+        out: dict[str, list[tuple[str, str]]] = defaultdict(list)
+        for i, pid in enumerate(self.path_id):
+            sha = self.commit_shas[self.commit_idx[i]]
+            out[self.paths[pid]].append((sha, _action_label(self, i)))
+        return dict(out)
+
+
+def _action_label(log: FileEventLog, i: int) -> str:
+    action = chr(log.action[i])
+    if action == "R":
+        return "R->" + log.paths[log.other_id[i]]
+    return action
 
 
 @dataclass
 class ArchitectureEvolution:
     """Evolution of project structure over time."""
 
-    snapshots: list[ArchitectureSnapshot]
-    file_lifetime: dict[str, list[tuple[str, str]]]  # path -> [(commit, action), ...]
+    snapshots: list[ArchitectureSnapshot]  # oldest first; the last one is HEAD
+    file_events: FileEventLog  # complete add/delete/rename log along the first-parent chain
     high_level_changes: list[tuple[str, str, str]]  # (commit_sha, change_type, description)
+    time_series: list[ArchitectureSnapshot] = field(default_factory=list)  # last commit per month
+
+    @property
+    def file_lifetime(self) -> dict[str, list[tuple[str, str]]]:
+        """path -> [(commit, action), ...], built on demand from file_events."""
+        return self.file_events.to_lifetime_dict()
 
 
 def _top_level(path: str) -> str:
@@ -56,86 +181,271 @@ def _dir_path(path: str) -> str:
     return ""
 
 
+class DirectoryReplay:
+    """
+    Live file counts per top-level module, advanced by applying one commit's file
+    events at a time. Taking a snapshot only copies the per-module counters.
+    """
+
+    def __init__(self, paths: Iterable[str] = ()) -> None:
+        self.counts: Counter[str] = Counter()
+        self.total = 0
+        for p in paths:
+            self.add(p)
+
+    def add(self, path: str) -> None:
+        self.counts[_top_level(path)] += 1
+        self.total += 1
+
+    def remove(self, path: str) -> None:
+        top = _top_level(path)
+        if self.counts[top] <= 1:
+            del self.counts[top]
+        else:
+            self.counts[top] -= 1
+        self.total -= 1
+
+    def apply(self, events: list[FileHistoryEntry]) -> None:
+        for e in events:
+            if e.action in ("A", "C"):
+                self.add(e.path)
+            elif e.action == "D":
+                self.remove(e.path)
+            elif e.action == "R" and e.previous_path:
+                self.remove(e.previous_path)
+                self.add(e.path)
+
+    def apply_logged(self, action: str, path: str, other: str | None) -> None:
+        """Apply one FileEventLog event (a rename moves path to other)."""
+        if action == "A":
+            self.add(path)
+        elif action == "D":
+            self.remove(path)
+        elif action == "R" and other is not None:
+            self.remove(path)
+            self.add(other)
+
+    def snapshot(self, rev: str, rev_display: str, date: str) -> ArchitectureSnapshot:
+        top_level = sorted(self.counts)
+        return ArchitectureSnapshot(
+            rev=rev,
+            rev_display=rev_display,
+            date=date,
+            top_level_dirs=top_level,
+            modules={
+                top: ModuleNode(
+                    path=top,
+                    file_count=self.counts[top],
+                    first_seen_commit=None,
+                    last_modified_commit=rev,
+                    child_paths=[],
+                )
+                for top in top_level
+            },
+            total_files=self.total,
+        )
+
+
+def _first_parent_chain(commits: list[CommitInfo]) -> list[CommitInfo]:
+    """The newest commit's first-parent ancestry within commits (newest first)."""
+    if not commits:
+        return []
+    by_sha = {c.sha: c for c in commits}
+    chain = [commits[0]]
+    while chain[-1].parent_shas and chain[-1].parent_shas[0] in by_sha:
+        chain.append(by_sha[chain[-1].parent_shas[0]])
+    return chain
+
+
+def collect_file_events(
+    reader: GitReader,
+    chronological: list[CommitInfo],
+    *,
+    changed: set[str] | None = None,
+) -> FileEventLog:
+    """
+    Log every file add/delete/rename of an oldest-first slice of the first-parent
+    chain. Logs of consecutive slices concatenate (FileEventLog.extend) to the log
+    of the whole chain. changed, if given, holds every commit that may change the
+    reader's paths (e.g. from Bloom filters); the others are logged without diffing,
+    each diffed commit being compared with the previous diffed one.
+    """
+    file_events = FileEventLog()
+    diffed = chronological if changed is None else [c for c in chronological if c.sha in changed]
+    stream = reader.iter_file_events(diffed)
+    pending = next(stream, None)
+    for c in chronological:
+        commit_index = file_events.add_commit(c.sha)
+        if pending is None or pending[0] is not c:
+            continue
+        log_file_events(file_events, commit_index, pending[1])
+        pending = next(stream, None)
+    return file_events
+
+
+def log_file_events(
+    file_events: FileEventLog, commit_index: int, events: list[FileHistoryEntry]
+) -> None:
+    """Append the adds, deletes and renames among one commit's file events."""
+    for e in events:
+        if e.action in ("A", "D"):
+            file_events.append(commit_index, e.action, e.path)
+        elif e.action == "R" and e.previous_path:
+            file_events.append(commit_index, "R", e.previous_path, e.path)
+
+
+def architecture_chain(commits: list[CommitInfo]) -> list[CommitInfo]:
+    """The commits analyze_architecture_evolution replays, oldest first."""
+    return list(reversed(_first_parent_chain(commits)))
+
+
 def analyze_architecture_evolution(
     reader: GitReader,
     commits: list[CommitInfo],
     tag_shas: set[str],
     *,
     sample_revs: int = 20,
+    file_events: FileEventLog | None = None,
+    root: str = "",
+    changed: set[str] | None = None,
 ) -> ArchitectureEvolution:
     """
-    Build snapshots of directory/module structure at key revisions (tags + sampled).
+    Build snapshots of directory/module structure at key revisions (tags + sampled)
+    and at the end of every month, by replaying file add/delete/rename events along
+    the first-parent chain from a single tree listing.
     Track file additions/renames/deletions for evolution narrative.
+    file_events, if given, is the already collected log of architecture_chain(commits).
+    With root, only that subdirectory is described, with paths relative to it;
+    changed is passed on to collect_file_events.
     """
-    commits_by_sha = {c.sha: i for i, c in enumerate(commits)}
+    chain = _first_parent_chain(commits)
     # Key revisions: tagged commits + evenly sampled commits
-    key_revs: list[tuple[str, str, str]] = []  # (sha, display, date)
-    for c in commits:
-        date = c.authored_date.strftime("%Y-%m-%d") if c.authored_date else ""
+    key_revs: dict[str, str] = {}  # sha -> display
+    for c in chain:
         if c.sha in tag_shas and c.tags:
-            key_revs.append((c.sha, c.tags[0], date))
-    # Add sampled commits if we have many
-    step = max(1, len(commits) // max(1, sample_revs))
-    for i in range(0, len(commits), step):
-        c = commits[i]
-        if not any(r[0] == c.sha for r in key_revs):
-            key_revs.append((c.sha, c.short_sha, c.authored_date.strftime("%Y-%m-%d") if c.authored_date else ""))
-    key_revs.sort(key=lambda x: commits_by_sha.get(x[0], 0))
+            key_revs[c.sha] = c.tags[0]
+    step = max(1, len(chain) // max(1, sample_revs))
+    for i in range(0, len(chain), step):
+        key_revs.setdefault(chain[i].sha, chain[i].short_sha)
+    if chain:
+        key_revs.setdefault(chain[0].sha, chain[0].short_sha)  # always end at HEAD
+
+    oldest = chain[-1] if chain else None
+    base = []
+    if oldest and oldest.parent_shas:
+        base = reader.get_file_paths_at_rev(oldest.parent_shas[0])
+    chronological = list(reversed(chain))
+    if file_events is None:
+        file_events = collect_file_events(reader, chronological, changed=changed)
+    if root:
+        prefix = root.strip("/") + "/"
+        base = [p[len(prefix) :] for p in base if p.startswith(prefix)]
+        file_events = file_events.scoped(root)
+    replay = DirectoryReplay(base)
 
     snapshots: list[ArchitectureSnapshot] = []
-    for sha, display, date in key_revs:
-        paths = reader.get_file_paths_at_rev(sha)
-        top_level = sorted(set(_top_level(p) for p in paths))
-        modules: dict[str, ModuleNode] = {}
-        for top in top_level:
-            files_in = [p for p in paths if _top_level(p) == top]
-            modules[top] = ModuleNode(
-                path=top,
-                file_count=len(files_in),
-                first_seen_commit=None,
-                last_modified_commit=sha,
-                child_paths=[],
-            )
-        snapshots.append(
-            ArchitectureSnapshot(
-                rev=sha,
-                rev_display=display,
-                date=date,
-                top_level_dirs=top_level,
-                modules=modules,
-                total_files=len(paths),
+    time_series: list[ArchitectureSnapshot] = []
+    # High-level: first appearance of a top-level directory after the starting tree
+    high_level_changes: list[tuple[str, str, str]] = []
+    seen_top_level = set(replay.counts)
+
+    paths, event_commit = file_events.paths, file_events.commit_idx
+    actions, path_ids, other_ids = file_events.action, file_events.path_id, file_events.other_id
+    pos, n_events = 0, len(file_events)
+    for i, c in enumerate(chronological):
+        new_tops: list[str] = []
+        while pos < n_events and event_commit[pos] == i:
+            action = chr(actions[pos])
+            path = paths[path_ids[pos]]
+            other = paths[other_ids[pos]] if other_ids[pos] != NO_PATH else None
+            pos += 1
+            replay.apply_logged(action, path, other)
+            if action != "D":
+                top = _top_level(other if other is not None else path)
+                if top and top not in seen_top_level and (i > 0 or base):
+                    seen_top_level.add(top)
+                    new_tops.append(top)
+        if i == 0 and not base:
+            seen_top_level.update(replay.counts)  # root commit: the initial layout
+        if new_tops:
+            high_level_changes.append(
+                (c.sha, "new_top_level", f"Top-level directory '{new_tops[0]}' appears")
             )
-        )
 
-    # File lifetime: which commits added/renamed/deleted key files (sample)
-    file_lifetime: dict[str, list[tuple[str, str]]] = defaultdict(list)
-    high_level_changes: list[tuple[str, str, str]] = []
-    seen_commits_for_change: set[str] = set()
-    for c in commits:
-        try:
-            stats = reader.get_diff_stats(c.sha)
-        except Exception:
-            continue
-        added = [s.path for s in stats if s.insertions and not s.deletions and not s.renamed_from]
-        deleted = [s.path for s in stats if s.deletions and not s.insertions]
-        renamed = [(s.renamed_from, s.path) for s in stats if getattr(s, "renamed_from", None)]
-        for path in added[:30]:  # cap to avoid huge dict
-            file_lifetime[path].append((c.sha, "A"))
-        for path in deleted[:30]:
-            file_lifetime[path].append((c.sha, "D"))
-        for a, b in renamed[:20]:
-            if a:
-                file_lifetime[a].append((c.sha, "R->" + b))
-
-        # High-level: new top-level dir or big rename
-        for path in added:
-            top = _top_level(path)
-            if top and top not in (snapshots[0].top_level_dirs if snapshots else []) and c.sha not in seen_commits_for_change:
-                high_level_changes.append((c.sha, "new_top_level", f"Top-level directory '{top}' appears"))
-                seen_commits_for_change.add(c.sha)
+        date = c.authored_date.strftime("%Y-%m-%d") if c.authored_date else ""
+        if c.sha in key_revs:
+            snapshots.append(replay.snapshot(c.sha, key_revs[c.sha], date))
+        nxt = chronological[i + 1] if i + 1 < len(chronological) else None
+        month = c.authored_date.strftime("%Y-%m") if c.authored_date else ""
+        if nxt is None or (nxt.authored_date and nxt.authored_date.strftime("%Y-%m") != month):
+            time_series.append(replay.snapshot(c.sha, month or c.short_sha, date))
+    high_level_changes.reverse()  # newest first, like the commit list
 
     return ArchitectureEvolution(
         snapshots=snapshots,
-        file_lifetime=dict(file_lifetime),
+        file_events=file_events,
         high_level_changes=high_level_changes,
+        time_series=time_series,
     )
+
+
+def measure_snapshot_sizes(
+    reader: GitReader,
+    evolution: ArchitectureEvolution,
+    *,
+    root: str = "",
+    size_cache=None,
+) -> None:
+    """
+    Fill in the byte size of every top-level module (and the total) of each
+    snapshot and monthly snapshot. Each series needs one tree listing at its first
+    snapshot and one diff-tree between consecutive snapshots for the blob SHAs;
+    the distinct blobs of all snapshots are then sized in one batched lookup
+    (cached by blob SHA in size_cache). Blob contents are never read. A
+    metadata-only reader has no sizes: they stay None.
+    """
+    if reader.metadata_only:
+        return
+    prefix = root.strip("/") + "/" if root else ""
+    series = [snaps for snaps in (evolution.snapshots, evolution.time_series) if snaps]
+    pairs = [(a.rev, b.rev) for snaps in series for a, b in zip(snaps, snaps[1:])]
+    try:
+        bases = [reader.get_tree_blobs(snaps[0].rev) for snaps in series]
+        deltas = list(reader.iter_tree_changes(pairs))
+    except Exception:
+        return
+    if len(deltas) != len(pairs):
+        return
+    blobs = {sha for base in bases for sha in base.values()}
+    blobs.update(sha for delta in deltas for _path, sha in delta if sha is not None)
+    sizes = reader.get_blob_sizes(blobs, cache=size_cache)
+    if size_cache is not None:
+        size_cache.save()
+
+    delta_iter = iter(deltas)
+    for snaps, base in zip(series, bases):
+        current: dict[str, str] = {}
+        totals: Counter[str] = Counter()
+
+        def apply(path: str, sha: str | None) -> None:
+            if prefix:
+                if not path.startswith(prefix):
+                    return
+                path = path[len(prefix) :]
+            top = _top_level(path)
+            old = current.pop(path, None)
+            if old is not None:
+                totals[top] -= sizes.get(old, 0)
+            if sha is not None:
+                current[path] = sha
+                totals[top] += sizes.get(sha, 0)
+
+        for path, sha in base.items():
+            apply(path, sha)
+        for i, snap in enumerate(snaps):
+            if i:
+                for path, sha in next(delta_iter):
+                    apply(path, sha)
+            for top, node in snap.modules.items():
+                node.size = totals.get(top, 0)
+            snap.total_size = sum(totals.values())
@@ -5,11 +5,12 @@ Deterministic: only uses patterns in commit text and diff magnitude.
 
 from __future__ import annotations
 
+import hashlib
 import re
+from collections.abc import Iterable
 from dataclasses import dataclass
 
-from gitscribe.git_reader import CommitInfo, GitReader, DiffStat
-
+from gitscribe.git_reader import CommitInfo, GitReader
 
 BREAKING_PATTERNS = [
     re.compile(r"\bBREAKING\s+CHANGE[S]?\b", re.IGNORECASE),
@@ -24,6 +25,15 @@ BREAKING_PATTERNS = [
 # Conventional commits
 CONVENTIONAL_BREAKING = re.compile(r"^(\w+)(\([^)]*\))?!\s*:", re.IGNORECASE)
 
+LARGE_DELETION_THRESHOLD = 500
+
+
+def rules_fingerprint() -> str:
+    """A digest of the detection rules; changes whenever a rule does."""
+    rules = [(p.pattern, p.flags) for p in (*BREAKING_PATTERNS, CONVENTIONAL_BREAKING)]
+    rules.append(("large_deletion", LARGE_DELETION_THRESHOLD))
+    return hashlib.sha1(repr(rules).encode("utf-8")).hexdigest()[:16]
+
 
 @dataclass
 class BreakingChange:
@@ -40,7 +50,7 @@ def detect_breaking_changes(
     reader: GitReader,
     commits: list[CommitInfo],
     *,
-    large_deletion_threshold: int = 500,
+    large_deletion_threshold: int = LARGE_DELETION_THRESHOLD,
 ) -> list[BreakingChange]:
     """
     Identify commits that likely represent breaking changes.
@@ -54,31 +64,15 @@ def detect_breaking_changes(
             continue
         full_text = f"{c.message_subject}\n{c.message_body}"
 
-        # 1) Explicit BREAKING in message
-        for pat in BREAKING_PATTERNS:
-            if pat.search(full_text):
-                result.append(
-                    BreakingChange(
-                        commit_sha=c.sha,
-                        short_sha=c.short_sha,
-                        subject=c.message_subject,
-                        evidence="message_breaking_keyword",
-                        message_snippet=_truncate(full_text, 200),
-                    )
-                )
-                seen_shas.add(c.sha)
-                break
-        if c.sha in seen_shas:
-            continue
-
-        # 2) Conventional commit with !
-        if CONVENTIONAL_BREAKING.match(c.message_subject.strip()):
+        # 1) Explicit BREAKING in message, 2) conventional commit with !
+        evidence = breaking_message_evidence(c)
+        if evidence:
             result.append(
                 BreakingChange(
                     commit_sha=c.sha,
                     short_sha=c.short_sha,
                     subject=c.message_subject,
-                    evidence="conventional_breaking",
+                    evidence=evidence,
                     message_snippet=_truncate(full_text, 200),
                 )
             )
@@ -87,9 +81,9 @@ def detect_breaking_changes(
 
         # 3) Heuristic: very large net deletion (often API/module removal)
         try:
-            stats = reader.get_diff_stats(c.sha)
-            total_del = sum(s.deletions for s in stats)
-            total_ins = sum(s.insertions for s in stats)
+            totals = reader.get_diff_totals(c.sha)
+            total_del = totals.deletions
+            total_ins = totals.insertions
             if total_del >= large_deletion_threshold and total_del > total_ins * 2:
                 result.append(
                     BreakingChange(
@@ -107,6 +101,28 @@ def detect_breaking_changes(
     return result
 
 
+def merge_breaking_changes(parts: Iterable[list[BreakingChange]]) -> list[BreakingChange]:
+    """Join the results of consecutive commit ranges, keeping the first hit per commit."""
+    result: list[BreakingChange] = []
+    seen_shas: set[str] = set()
+    for part in parts:
+        for b in part:
+            if b.commit_sha not in seen_shas:
+                seen_shas.add(b.commit_sha)
+                result.append(b)
+    return result
+
+
+def breaking_message_evidence(commit: CommitInfo) -> str | None:
+    """Return the message rule that marks commit as breaking, or None (no diff needed)."""
+    full_text = f"{commit.message_subject}\n{commit.message_body}"
+    if any(pat.search(full_text) for pat in BREAKING_PATTERNS):
+        return "message_breaking_keyword"
+    if CONVENTIONAL_BREAKING.match(commit.message_subject.strip()):
+        return "conventional_breaking"
+    return None
+
+
 def _truncate(s: str, max_len: int) -> str:
     s = s.strip()
     if len(s) <= max_len:
@@ -5,10 +5,10 @@ Deterministic: only commit count and line deltas per file.
 
 from __future__ import annotations
 
-from collections import defaultdict
+from collections import Counter
 from dataclasses import dataclass
 
-from gitscribe.git_reader import CommitInfo, GitReader, DiffStat
+from gitscribe.git_reader import CommitInfo, DiffStat, GitReader
 
 
 @dataclass
@@ -31,6 +31,111 @@ class ChurnReport:
     unstable_paths: list[str]  # Paths with very high churn relative to size (optional heuristic)
 
 
+class ChurnCounts:
+    """
+    Per-file and per-directory change counters, the mergeable state behind a
+    ChurnReport. Counting disjoint commit ranges separately and merging the
+    results in commit order gives exactly the counts (and ranking ties) of one pass.
+    """
+
+    def __init__(self) -> None:
+        self.path_commits: Counter[str] = Counter()
+        self.path_ins: Counter[str] = Counter()
+        self.path_del: Counter[str] = Counter()
+        self.dir_commits: Counter[str] = Counter()
+        self.dir_lines: Counter[str] = Counter()
+        self.path_first: dict[str, float] = {}  # path -> oldest counted change (epoch seconds)
+        self.path_last: dict[str, float] = {}  # path -> newest counted change
+
+    def add(self, stats: list[DiffStat], when: float | None = None) -> None:
+        """Count one commit's per-file stats; when is the commit time (epoch seconds)."""
+        dirs: dict[str, None] = {}
+        first, last = self.path_first, self.path_last
+        for s in stats:
+            if when is not None:
+                if first.get(s.path, when) >= when:
+                    first[s.path] = when
+                if last.get(s.path, when) <= when:
+                    last[s.path] = when
+            self.path_commits[s.path] += 1
+            self.path_ins[s.path] += s.insertions
+            self.path_del[s.path] += s.deletions
+            d = _dir_of(s.path)
+            if d:
+                dirs[d] = None
+                self.dir_lines[d] += s.insertions + s.deletions
+        for d in dirs:
+            self.dir_commits[d] += 1
+
+    def merge(self, other: ChurnCounts) -> ChurnCounts:
+        """Add the counts of a later commit range (in place); returns self."""
+        for mine, theirs in (
+            (self.path_commits, other.path_commits),
+            (self.path_ins, other.path_ins),
+            (self.path_del, other.path_del),
+            (self.dir_commits, other.dir_commits),
+            (self.dir_lines, other.dir_lines),
+        ):
+            for key, n in theirs.items():
+                mine[key] += n
+        for path, when in other.path_first.items():
+            if self.path_first.get(path, when) >= when:
+                self.path_first[path] = when
+        for path, when in other.path_last.items():
+            if self.path_last.get(path, when) <= when:
+                self.path_last[path] = when
+        return self
+
+    def report(self, *, top_n_files: int = 50, top_n_dirs: int = 20) -> ChurnReport:
+        """Rank the counted files and directories."""
+        path_ins, path_del = self.path_ins, self.path_del
+        file_churns = [
+            FileChurn(
+                path=p,
+                commit_count=n,
+                total_insertions=path_ins[p],
+                total_deletions=path_del[p],
+                total_changes=path_ins[p] + path_del[p],
+            )
+            for p, n in self.path_commits.items()
+        ]
+        file_churns.sort(key=lambda x: x.commit_count + (x.total_changes // 100), reverse=True)
+        file_churns = file_churns[: top_n_files * 2]  # keep more then filter by total_changes too
+        file_churns.sort(key=lambda x: (x.total_changes, x.commit_count), reverse=True)
+        file_churns = file_churns[:top_n_files]
+
+        # Directory-level: commits touching any file below the directory, and their lines
+        dir_commits, dir_lines = self.dir_commits, self.dir_lines
+        dir_churns = [
+            (d, dir_commits[d], dir_lines[d])
+            for d in sorted(dir_commits.keys(), key=lambda x: (-dir_lines[x], -dir_commits[x]))
+        ][:top_n_dirs]
+
+        # Unstable: high commit count but not huge lines (churned often, refactored)
+        unstable = [
+            fc.path for fc in file_churns
+            if fc.commit_count >= 10 and fc.total_changes < 500
+        ][:30]
+
+        return ChurnReport(
+            file_churns=file_churns,
+            dir_churns=dir_churns,
+            unstable_paths=unstable,
+        )
+
+
+def count_churn(reader: GitReader, commits: list[CommitInfo]) -> ChurnCounts:
+    """Count per-file and per-directory changes over commits."""
+    counts = ChurnCounts()
+    for c in commits:
+        try:
+            stats = reader.get_diff_stats(c.sha)
+        except Exception:
+            continue
+        counts.add(stats, c.committed_date.timestamp() if c.committed_date else None)
+    return counts
+
+
 def compute_churn_report(
     reader: GitReader,
     commits: list[CommitInfo],
@@ -41,60 +146,7 @@ def compute_churn_report(
     """
     Aggregate per-file and per-directory change counts over the commit history.
     """
-    path_commits: dict[str, set[str]] = defaultdict(set)
-    path_ins: dict[str, int] = defaultdict(int)
-    path_del: dict[str, int] = defaultdict(int)
-
-    for c in commits:
-        try:
-            stats = reader.get_diff_stats(c.sha)
-        except Exception:
-            continue
-        for s in stats:
-            path_commits[s.path].add(c.sha)
-            path_ins[s.path] += s.insertions
-            path_del[s.path] += s.deletions
-
-    file_churns = [
-        FileChurn(
-            path=p,
-            commit_count=len(path_commits[p]),
-            total_insertions=path_ins[p],
-            total_deletions=path_del[p],
-            total_changes=path_ins[p] + path_del[p],
-        )
-        for p in path_commits
-    ]
-    file_churns.sort(key=lambda x: x.commit_count + (x.total_changes // 100), reverse=True)
-    file_churns = file_churns[: top_n_files * 2]  # keep more then filter by total_changes too
-    file_churns.sort(key=lambda x: (x.total_changes, x.commit_count), reverse=True)
-    file_churns = file_churns[:top_n_files]
-
-    # Directory-level: sum by directory from full path aggregates
-    dir_commits = defaultdict(set)
-    dir_lines = defaultdict(int)
-    for p, commits_set in path_commits.items():
-        d = _dir_of(p)
-        if d:
-            dir_commits[d].update(commits_set)
-            dir_lines[d] += path_ins[p] + path_del[p]
-
-    dir_churns = [
-        (d, len(dir_commits[d]), dir_lines[d])
-        for d in sorted(dir_commits.keys(), key=lambda x: (-dir_lines[x], -len(dir_commits[x])))
-    ][:top_n_dirs]
-
-    # Unstable: high commit count but not huge lines (churned often, refactored)
-    unstable = [
-        fc.path for fc in file_churns
-        if fc.commit_count >= 10 and fc.total_changes < 500
-    ][:30]
-
-    return ChurnReport(
-        file_churns=file_churns,
-        dir_churns=dir_churns,
-        unstable_paths=unstable,
-    )
+    return count_churn(reader, commits).report(top_n_files=top_n_files, top_n_dirs=top_n_dirs)
 
 
 def _dir_of(path: str) -> str:
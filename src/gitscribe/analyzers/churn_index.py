@@ -0,0 +1,202 @@
+"""
+Windowed churn: per-file change counts over any range of the analyzed commits
+("the last 90 days", "between v2.0 and v3.0"), answered from cumulative counters
+built in one pass instead of a new analysis run.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from gitscribe.analyzers.churn import FileChurn
+from gitscribe.git_reader import CommitInfo, DiffStat, GitReader, in_scope
+
+
+@dataclass
+class ChurnWindow:
+    """The most changed files over one range of commits."""
+
+    label: str  # e.g. "v3.0" or "since 2024-01-01"
+    start: str  # display of the first commit's boundary ("" for the start of history)
+    end: str
+    commits: int  # analyzed commits in the range
+    file_churns: list[FileChurn] = field(default_factory=list)
+
+
+class _PathSeries:
+    """One path's touches: commit positions and running insertion/deletion totals."""
+
+    __slots__ = ("positions", "cum_ins", "cum_del")
+
+    def __init__(self) -> None:
+        self.positions = array("I")
+        self.cum_ins = array("Q")
+        self.cum_del = array("Q")
+
+    def append(self, position: int, insertions: int, deletions: int) -> None:
+        base_ins = self.cum_ins[-1] if self.cum_ins else 0
+        base_del = self.cum_del[-1] if self.cum_del else 0
+        self.positions.append(position)
+        self.cum_ins.append(base_ins + insertions)
+        self.cum_del.append(base_del + deletions)
+
+    def totals(self, start: int, end: int) -> tuple[int, int, int]:
+        """(commits, insertions, deletions) over positions [start, end)."""
+        i = bisect_left(self.positions, start)
+        j = bisect_left(self.positions, end)
+        if j <= i:
+            return 0, 0, 0
+        ins = self.cum_ins[j - 1] - (self.cum_ins[i - 1] if i else 0)
+        dels = self.cum_del[j - 1] - (self.cum_del[i - 1] if i else 0)
+        return j - i, ins, dels
+
+
+class ChurnIndex:
+    """
+    Per-path prefix sums over commit order (position 0 is the oldest analyzed
+    commit). A path's churn over any range is two binary searches; ranking a
+    range visits each path once. The index only grows at the new end, so plain
+    cumulative arrays suffice (no Fenwick tree needed). Indexes of consecutive
+    commit ranges concatenate with extend().
+    """
+
+    def __init__(self) -> None:
+        self.shas: list[str] = []
+        self.dates = array("d")  # running maximum of commit times (epoch seconds)
+        self.paths: dict[str, _PathSeries] = {}
+        self._positions: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.shas)
+
+    def add(self, commit: CommitInfo, stats: list[DiffStat]) -> None:
+        """Append the next (newer) commit and its per-file stats."""
+        position = len(self.shas)
+        self.shas.append(commit.sha)
+        self._positions[commit.sha] = position
+        when = commit.committed_date.timestamp() if commit.committed_date else 0.0
+        self.dates.append(max(when, self.dates[-1]) if self.dates else when)
+        paths = self.paths
+        for s in stats:
+            series = paths.get(s.path)
+            if series is None:
+                series = paths[s.path] = _PathSeries()
+            series.append(position, s.insertions, s.deletions)
+
+    def extend(self, later: ChurnIndex) -> ChurnIndex:
+        """Append the index of the directly following commit range (in place); returns self."""
+        offset = len(self.shas)
+        for sha in later.shas:
+            self._positions[sha] = len(self.shas)
+            self.shas.append(sha)
+        floor = self.dates[-1] if self.dates else 0.0
+        self.dates.extend(max(d, floor) for d in later.dates)
+        for path, theirs in later.paths.items():
+            mine = self.paths.get(path)
+            if mine is None:
+                mine = self.paths[path] = _PathSeries()
+            base_ins = mine.cum_ins[-1] if mine.cum_ins else 0
+            base_del = mine.cum_del[-1] if mine.cum_del else 0
+            mine.positions.extend(p + offset for p in theirs.positions)
+            mine.cum_ins.extend(n + base_ins for n in theirs.cum_ins)
+            mine.cum_del.extend(n + base_del for n in theirs.cum_del)
+        return self
+
+    def position(self, sha: str) -> int | None:
+        return self._positions.get(sha)
+
+    def position_at(self, when: datetime) -> int:
+        """Position of the first commit made at or after when (len(self) if none)."""
+        return bisect_left(self.dates, when.timestamp())
+
+    def window(
+        self, start: int, end: int, *, label: str = "", top_n: int = 20, scope: str = ""
+    ) -> ChurnWindow:
+        """The top_n most changed files (within scope, a file or directory) over [start, end)."""
+        start, end = max(0, start), min(len(self.shas), end)
+        churns = []
+        for path, series in self.paths.items():
+            if scope and not in_scope(path, scope):
+                continue
+            n, ins, dels = series.totals(start, end)
+            if n:
+                churns.append(FileChurn(path, n, ins, dels, ins + dels))
+        churns.sort(key=lambda fc: (-fc.total_changes, -fc.commit_count, fc.path))
+        return ChurnWindow(
+            label=label,
+            start=self.shas[start - 1] if 0 < start <= len(self.shas) else "",
+            end=self.shas[end - 1] if end > 0 else "",
+            commits=max(0, end - start),
+            file_churns=churns[:top_n],
+        )
+
+    def between(self, old_sha: str | None, new_sha: str, **kwargs) -> ChurnWindow:
+        """
+        Churn of the commits after old_sha up to and including new_sha (old None:
+        from the start); keyword arguments as for window().
+        """
+        end = self.position(new_sha)
+        if end is None:
+            raise KeyError(new_sha)
+        start = 0
+        if old_sha is not None:
+            old = self.position(old_sha)
+            if old is None:
+                raise KeyError(old_sha)
+            start = old + 1
+        return self.window(start, end + 1, **kwargs)
+
+    def since(self, when: datetime, **kwargs) -> ChurnWindow:
+        return self.window(self.position_at(when), len(self.shas), **kwargs)
+
+
+def parse_since(value: str, now: datetime | None = None) -> datetime:
+    """An ISO date/time, or a span back from now such as 90d or 12w; raises ValueError."""
+    units = {"d": 1, "w": 7}
+    if value[:-1].isdigit() and value[-1:] in units:
+        now = now or datetime.now(timezone.utc)
+        return now - timedelta(days=int(value[:-1]) * units[value[-1]])
+    try:
+        when = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"not a date or span (e.g. 2024-01-31, 90d, 12w): {value!r}") from None
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+def build_churn_index(reader: GitReader, commits: list[CommitInfo]) -> ChurnIndex:
+    """Index the per-file diff stats of commits (given newest first, like the commit list)."""
+    index = ChurnIndex()
+    for c in reversed(commits):
+        try:
+            stats = reader.get_diff_stats(c.sha)
+        except Exception:
+            stats = []
+        index.add(c, stats)
+    return index
+
+
+def release_churn(
+    index: ChurnIndex,
+    commits: list[CommitInfo],
+    tags_by_sha: dict[str, list[str]],
+    *,
+    releases: int = 5,
+    top_n: int = 10,
+) -> list[ChurnWindow]:
+    """Churn of each of the newest releases since the previous tag, newest first."""
+    from gitscribe.analyzers.releases import release_ranges
+
+    windows = []
+    for tag_sha, previous in release_ranges(commits, tags_by_sha)[:releases]:
+        if index.position(tag_sha) is None or (
+            previous is not None and index.position(previous) is None
+        ):
+            continue
+        window = index.between(previous, tag_sha, label=tags_by_sha[tag_sha][0], top_n=top_n)
+        window.start = tags_by_sha[previous][0] if previous is not None else ""
+        window.end = window.label
+        windows.append(window)
+    return windows
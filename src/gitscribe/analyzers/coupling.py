@@ -0,0 +1,274 @@
+"""
+Co-change (logical coupling) analysis: pairs of files that keep changing in the
+same commits, a hint of hidden dependencies. Reads the per-commit path lists of
+get_diff_stats.
+
+Counting every pair is quadratic in the files of a commit, so commits touching
+more than max_files files (mass renames, reformatting, vendor drops) are skipped,
+and the pair table is bounded: past max_pairs entries the rarest pairs are
+evicted. For very large histories, MinHashCoChange estimates the same report from
+fixed-size per-file signatures instead of a pair table.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from array import array
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Union
+
+from gitscribe.git_reader import CommitInfo, GitReader
+
+MAX_FILES_PER_COMMIT = 30
+MAX_PAIRS = 250_000
+MIN_SHARED = 3
+MINHASH_SIZE = 64
+LSH_BANDS = 32  # 2 rows per band: pairs from ~20% Jaccard similarity become candidates
+LSH_MAX_BUCKET = 200  # larger buckets (files with identical histories) are sampled
+METHODS = ("pairs", "minhash")
+
+
+@dataclass
+class CoupledPair:
+    """Two files changed together; path sorts before other."""
+
+    path: str
+    other: str
+    shared: int  # commits changing both (an estimate with MinHash)
+    degree: float  # shared / mean number of commits of the two files (0..1)
+
+
+@dataclass
+class CouplingReport:
+    """The most strongly coupled file pairs and how they were counted."""
+
+    pairs: list[CoupledPair]
+    commits_counted: int = 0
+    commits_skipped: int = 0  # over the per-commit file limit
+    method: str = "pairs"
+    evicted_below: int = 0  # pairs with at most this many shared commits may be missing
+
+
+def _rank(pairs: list[CoupledPair], top_n: int) -> list[CoupledPair]:
+    pairs.sort(key=lambda p: (-p.shared, -p.degree, p.path, p.other))
+    return pairs[:top_n]
+
+
+def _degree(shared: int, n_a: int, n_b: int) -> float:
+    return round(2 * shared / (n_a + n_b), 4) if n_a + n_b else 0.0
+
+
+class CoChangeCounts:
+    """
+    Sparse co-occurrence counters (pair key: two interned path ids in one int).
+    Mergeable like ChurnCounts; exact until the table first exceeds max_pairs,
+    after which the rarest pairs are evicted down to half the budget.
+    """
+
+    method = "pairs"
+
+    def __init__(
+        self, *, max_files: int = MAX_FILES_PER_COMMIT, max_pairs: int = MAX_PAIRS
+    ) -> None:
+        self.max_files = max_files
+        self.max_pairs = max_pairs
+        self.paths: list[str] = []
+        self._ids: dict[str, int] = {}
+        self.file_commits: Counter[int] = Counter()
+        self.pairs: Counter[int] = Counter()
+        self.evicted_below = 0
+        self.commits_counted = 0
+        self.commits_skipped = 0
+
+    def _intern(self, path: str) -> int:
+        i = self._ids.get(path)
+        if i is None:
+            i = self._ids[path] = len(self.paths)
+            self.paths.append(path)
+        return i
+
+    def add(self, commit_sha: str, paths: Iterable[str]) -> None:
+        """Count one commit's changed paths."""
+        files = set(paths)
+        if len(files) > self.max_files:
+            self.commits_skipped += 1
+            return
+        self.commits_counted += 1
+        ids = sorted(self._intern(p) for p in files)
+        pairs, file_commits = self.pairs, self.file_commits
+        for x, a in enumerate(ids):
+            file_commits[a] += 1
+            high = a << 32
+            for b in ids[x + 1 :]:
+                pairs[high | b] += 1
+        if len(pairs) > self.max_pairs:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the rarest pairs (one pass) until at most half the budget is used."""
+        histogram = Counter(self.pairs.values())
+        remaining = len(self.pairs)
+        floor = 0
+        for count in sorted(histogram):
+            if remaining <= self.max_pairs // 2:
+                break
+            remaining -= histogram[count]
+            floor = count
+        self.pairs = Counter({k: n for k, n in self.pairs.items() if n > floor})
+        self.evicted_below = max(self.evicted_below, floor)
+
+    def merge(self, other: CoChangeCounts) -> CoChangeCounts:
+        """Add the counts of another commit range (in place); returns self."""
+        remap = [self._intern(p) for p in other.paths]
+        for i, n in other.file_commits.items():
+            self.file_commits[remap[i]] += n
+        for key, n in other.pairs.items():
+            a, b = remap[key >> 32], remap[key & 0xFFFFFFFF]
+            self.pairs[(a << 32 | b) if a < b else (b << 32 | a)] += n
+        self.commits_counted += other.commits_counted
+        self.commits_skipped += other.commits_skipped
+        self.evicted_below = max(self.evicted_below, other.evicted_below)
+        if len(self.pairs) > self.max_pairs:
+            self._evict()
+        return self
+
+    def report(self, *, top_n: int = 30, min_shared: int = MIN_SHARED) -> CouplingReport:
+        paths, file_commits = self.paths, self.file_commits
+        pairs = []
+        for key, n in self.pairs.items():
+            if n < min_shared:
+                continue
+            a, b = key >> 32, key & 0xFFFFFFFF
+            pa, pb = sorted((paths[a], paths[b]))
+            pairs.append(CoupledPair(pa, pb, n, _degree(n, file_commits[a], file_commits[b])))
+        return CouplingReport(
+            pairs=_rank(pairs, top_n),
+            commits_counted=self.commits_counted,
+            commits_skipped=self.commits_skipped,
+            method=self.method,
+            evicted_below=self.evicted_below,
+        )
+
+
+class MinHashCoChange:
+    """
+    Approximate co-change counting in O(files x num_hashes) memory. Each file keeps
+    the minimum of num_hashes commit hashes over the commits changing it; the share
+    of equal minima estimates the Jaccard similarity of two files' commit sets, and
+    LSH banding finds the similar pairs without comparing all of them.
+    """
+
+    method = "minhash"
+
+    def __init__(
+        self,
+        *,
+        max_files: int = MAX_FILES_PER_COMMIT,
+        num_hashes: int = MINHASH_SIZE,
+        bands: int = LSH_BANDS,
+    ) -> None:
+        if num_hashes % bands:
+            raise ValueError("num_hashes must be a multiple of bands")
+        self.max_files = max_files
+        self.num_hashes = num_hashes
+        self.bands = bands
+        self.signatures: dict[str, array] = {}  # path -> num_hashes uint32 minima
+        self.file_commits: Counter[str] = Counter()
+        self.commits_counted = 0
+        self.commits_skipped = 0
+
+    def add(self, commit_sha: str, paths: Iterable[str]) -> None:
+        files = set(paths)
+        if len(files) > self.max_files:
+            self.commits_skipped += 1
+            return
+        self.commits_counted += 1
+        digest = hashlib.shake_128(commit_sha.encode("ascii")).digest(4 * self.num_hashes)
+        hashes = array("I", digest)
+        signatures = self.signatures
+        for p in files:
+            self.file_commits[p] += 1
+            sig = signatures.get(p)
+            signatures[p] = array("I", hashes) if sig is None else array("I", map(min, sig, hashes))
+
+    def merge(self, other: MinHashCoChange) -> MinHashCoChange:
+        for p, sig in other.signatures.items():
+            mine = self.signatures.get(p)
+            merged = sig if mine is None else map(min, mine, sig)
+            self.signatures[p] = array("I", merged)
+        self.file_commits.update(other.file_commits)
+        self.commits_counted += other.commits_counted
+        self.commits_skipped += other.commits_skipped
+        return self
+
+    def report(self, *, top_n: int = 30, min_shared: int = MIN_SHARED) -> CouplingReport:
+        file_commits = self.file_commits
+        files = sorted(p for p, n in file_commits.items() if n >= min_shared)
+        rows = self.num_hashes // self.bands
+        candidates: set[tuple[str, str]] = set()
+        for band in range(self.bands):
+            buckets: dict[tuple[int, ...], list[str]] = {}
+            lo = band * rows
+            for p in files:
+                buckets.setdefault(tuple(self.signatures[p][lo : lo + rows]), []).append(p)
+            for members in buckets.values():
+                members = members[:LSH_MAX_BUCKET]
+                for x, a in enumerate(members):
+                    for b in members[x + 1 :]:
+                        candidates.add((a, b))
+        pairs = []
+        for a, b in candidates:
+            sig_a, sig_b = self.signatures[a], self.signatures[b]
+            jaccard = sum(1 for x, y in zip(sig_a, sig_b) if x == y) / self.num_hashes
+            # |A ∩ B| from J = |A ∩ B| / |A ∪ B| and |A ∪ B| = |A| + |B| - |A ∩ B|
+            n_a, n_b = file_commits[a], file_commits[b]
+            shared = min(round(jaccard * (n_a + n_b) / (1 + jaccard)), n_a, n_b)
+            if shared >= min_shared:
+                pairs.append(CoupledPair(a, b, shared, _degree(shared, n_a, n_b)))
+        return CouplingReport(
+            pairs=_rank(pairs, top_n),
+            commits_counted=self.commits_counted,
+            commits_skipped=self.commits_skipped,
+            method=self.method,
+        )
+
+
+CoChangeState = Union[CoChangeCounts, MinHashCoChange]
+
+
+def new_co_change_state(method: str = "pairs") -> CoChangeState:
+    if method == "minhash":
+        return MinHashCoChange()
+    if method == "pairs":
+        return CoChangeCounts()
+    raise ValueError(f"unknown coupling method: {method!r}")
+
+
+def count_co_changes(
+    reader: GitReader, commits: list[CommitInfo], *, method: str = "pairs"
+) -> CoChangeState:
+    """Count which files change together over commits."""
+    state = new_co_change_state(method)
+    for c in commits:
+        try:
+            stats = reader.get_diff_stats(c.sha)
+        except Exception:
+            continue
+        if reader.get_diff_overflow(c.sha) is not None:
+            state.commits_skipped += 1  # more files than are listed
+            continue
+        state.add(c.sha, (s.path for s in stats))
+    return state
+
+
+def compute_coupling_report(
+    reader: GitReader,
+    commits: list[CommitInfo],
+    *,
+    method: str = "pairs",
+    top_n: int = 30,
+) -> CouplingReport:
+    """The top_n most often co-changed file pairs over the commit history."""
+    return count_co_changes(reader, commits, method=method).report(top_n=top_n)
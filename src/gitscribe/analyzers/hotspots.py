@@ -0,0 +1,83 @@
+"""
+Hotspots: files that are both large and changed often (and recently), the
+likeliest places for defects and costly maintenance. Churn comes from the
+ChurnCounts of the analyzed commits; sizes are blob sizes at HEAD, read from object
+headers (never from blob contents) and cached by blob SHA.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from gitscribe.analyzers.churn import ChurnCounts
+from gitscribe.git_reader import GitReader
+
+RECENCY_HALF_LIFE_DAYS = 365  # a file untouched for a year counts half as hot
+
+
+@dataclass
+class Hotspot:
+    """One file's hotspot score and the facts behind it."""
+
+    path: str
+    commits: int
+    lines_changed: int
+    size: int  # bytes at the analyzed revision
+    first_changed: str  # date of the oldest analyzed change (YYYY-MM-DD)
+    last_changed: str  # date of the newest analyzed change
+    age_days: int  # from the oldest analyzed change to the newest commit
+    score: float  # commits x size in KiB, halved per RECENCY_HALF_LIFE_DAYS since last change
+
+
+def _date(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def rank_hotspots(
+    reader: GitReader,
+    counts: ChurnCounts,
+    *,
+    now: datetime | None = None,
+    rev: str = "HEAD",
+    size_cache=None,
+    top_n: int = 25,
+) -> list[Hotspot]:
+    """
+    Rank the changed files that still exist at rev by churn x size x recency. now is
+    the reference time for recency and age (use the newest commit's date, so the
+    output does not depend on when it is generated). Only the changed files are sized;
+    a metadata-only reader has no sizes, so no hotspots.
+    """
+    if reader.metadata_only:
+        return []
+    blobs = reader.get_tree_blobs(rev)
+    changed = [p for p in counts.path_commits if p in blobs]
+    sizes = reader.get_blob_sizes((blobs[p] for p in changed), cache=size_cache)
+    if size_cache is not None:
+        size_cache.save()
+    ref = now.timestamp() if now is not None else max(counts.path_last.values(), default=0.0)
+
+    hotspots: list[Hotspot] = []
+    for path in changed:
+        size = sizes.get(blobs[path])
+        if not size:
+            continue
+        commits = counts.path_commits[path]
+        first = counts.path_first.get(path, ref)
+        last = counts.path_last.get(path, ref)
+        idle_days = max(0.0, (ref - last) / 86400)
+        hotspots.append(
+            Hotspot(
+                path=path,
+                commits=commits,
+                lines_changed=counts.path_ins[path] + counts.path_del[path],
+                size=size,
+                first_changed=_date(first),
+                last_changed=_date(last),
+                age_days=max(0, int((ref - first) // 86400)),
+                score=round(commits * size / 1024 * 0.5 ** (idle_days / RECENCY_HALF_LIFE_DAYS), 2),
+            )
+        )
+    hotspots.sort(key=lambda h: (-h.score, h.path))
+    return hotspots[:top_n]
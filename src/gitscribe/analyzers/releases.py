@@ -0,0 +1,113 @@
+"""
+Per-release size: files changed and lines added/removed between consecutive tags.
+Deterministic: one tree-to-tree diff per release, cached by the tag commit SHAs.
+"""
+
+from __future__ import annotations
+
+from gitscribe.cache import JsonCache, cache_key
+from gitscribe.git_reader import CommitInfo, DiffSummary, GitReader
+
+
+def release_ranges(
+    commits: list[CommitInfo], tags_by_sha: dict[str, list[str]]
+) -> list[tuple[str, str | None]]:
+    """
+    (tag commit, previous tag commit or None) for each tagged commit, newest first,
+    in the order the changelog lists releases. The previous release is the nearest
+    tagged ancestor: the walk down parent links stops at the first tags it meets,
+    and of those the one listed first wins. On a first-parent history that is the
+    next tag in the list; with full history, a tag on a side branch only counts if
+    it was merged before the release.
+    """
+    sha_to_commit = {c.sha: c for c in commits}
+    position = {c.sha: i for i, c in enumerate(commits)}
+    ranges: list[tuple[str, str | None]] = []
+    for c in commits:
+        if c.sha not in tags_by_sha:
+            continue
+        found: list[str] = []
+        seen: set[str] = set()
+        stack = list(c.parent_shas)
+        while stack:
+            sha = stack.pop()
+            if sha in seen or sha not in sha_to_commit:
+                continue
+            seen.add(sha)
+            if sha in tags_by_sha:
+                found.append(sha)  # older releases lie beyond it
+                continue
+            stack.extend(sha_to_commit[sha].parent_shas)
+        ranges.append((c.sha, min(found, key=position.__getitem__) if found else None))
+    return ranges
+
+
+def release_owners(
+    commits: list[CommitInfo], tags_by_sha: dict[str, list[str]], *, full_history: bool = False
+) -> dict[str, str]:
+    """
+    commit -> the tag commit of the release whose changelog section lists it (a
+    tagged commit maps to itself; unreleased commits are left out). First-parent:
+    the nearest tag at or above it in the newest-first list. Full history: the
+    oldest tag that reaches it through parent links, so each commit is listed once.
+    """
+    owner: dict[str, str] = {}
+    if not full_history:
+        current = None
+        for c in commits:  # a tag owns the older commits up to the next tag
+            if c.sha in tags_by_sha:
+                current = c.sha
+            if current is not None:
+                owner[c.sha] = current
+        return owner
+    sha_to_commit = {c.sha: c for c in commits}
+    ordered = [c.sha for c in commits if c.sha in tags_by_sha]
+    owner = {sha: sha for sha in ordered}
+    for tag_sha in reversed(ordered):  # oldest tag claims first
+        stack = list(sha_to_commit[tag_sha].parent_shas)
+        while stack:
+            sha = stack.pop()
+            if sha in owner or sha not in sha_to_commit:
+                continue
+            owner[sha] = tag_sha
+            stack.extend(sha_to_commit[sha].parent_shas)
+    return owner
+
+
+def compute_release_stats(
+    reader: GitReader,
+    commits: list[CommitInfo],
+    tags_by_sha: dict[str, list[str]],
+    *,
+    cache: JsonCache | None = None,
+) -> dict[str, DiffSummary]:
+    """
+    tag commit SHA -> diff totals since the previous release (the oldest release
+    counts everything in its tree). A range between two commits never changes, so
+    results are kept in cache keyed by the SHA pair and the include/exclude pathspecs.
+    """
+    stats: dict[str, DiffSummary] = {}
+    todo: list[tuple[str, str | None, str]] = []
+    ranges = release_ranges(commits, tags_by_sha)
+    for tag_sha, previous in ranges:
+        key = cache_key(previous or "root", tag_sha, reader.pathspecs)
+        if reader.metadata_only:
+            key += ":files"  # totals without line counts
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            stats[tag_sha] = DiffSummary(*cached)
+        else:
+            todo.append((key, previous, tag_sha))
+    # All uncached ranges in one pipelined batch to the reader's diff-tree session.
+    reader.prefetch_tree_diffs((previous, tag_sha) for _, previous, tag_sha in todo)
+    for key, previous, tag_sha in todo:
+        try:
+            totals = reader.get_tree_diff_totals(previous, tag_sha)
+        except Exception:
+            continue
+        stats[tag_sha] = totals
+        if cache is not None:
+            cache.set(key, [totals.files, totals.insertions, totals.deletions])
+    if cache is not None:
+        cache.save()
+    return {tag_sha: stats[tag_sha] for tag_sha, _ in ranges if tag_sha in stats}
@@ -0,0 +1,111 @@
+"""
+Select a representative subset of commits for the diff-stat-heavy analyzers.
+Deterministic: systematic sampling over history order, plus commits that must
+never be dropped (tagged releases, commits whose message marks a breaking change).
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+
+from gitscribe.git_reader import CommitInfo, GitReader
+
+
+@dataclass
+class SamplingInfo:
+    """How the analyzed commits were drawn from the full history."""
+
+    total_commits: int
+    sampled_commits: int
+    forced_commits: int  # tagged / breaking-marked commits included regardless of rate
+    rate: float  # requested sampling rate (0, 1]
+    margin_of_error: float  # 95% half-width for proportions over the systematic draws
+
+    @property
+    def ratio(self) -> float:
+        return self.sampled_commits / self.total_commits if self.total_commits else 1.0
+
+    def describe(self) -> str:
+        text = (
+            f"Sampled analysis: {self.sampled_commits} of {self.total_commits} commits "
+            f"({self.ratio:.1%}, including {self.forced_commits} tagged or breaking-marked). "
+            f"Diff-based counts cover the sample only; proportions are within "
+            f"±{self.margin_of_error:.1%} at 95% confidence"
+        )
+        if self.forced_commits:
+            return text + " for the evenly drawn commits (forced commits are outside the estimate)."
+        return text + "."
+
+
+def sample_commits(
+    commits: list[CommitInfo],
+    rate: float,
+    *,
+    always_include: set[str] | None = None,
+) -> tuple[list[CommitInfo], SamplingInfo]:
+    """
+    Return every commit in always_include plus a systematic sample of the rest.
+    History is cut into strata of 1/rate consecutive commits and one commit is
+    kept per stratum, so the sample is spread evenly over time. Order is preserved.
+    """
+    always_include = always_include or set()
+    total = len(commits)
+    rate = min(1.0, max(0.0, rate))
+    sampled: list[CommitInfo] = []
+    forced = 0
+    last_stratum = -1
+    for i, c in enumerate(commits):
+        if c.sha in always_include:
+            sampled.append(c)
+            forced += 1
+            continue
+        stratum = math.floor(i * rate)
+        if stratum != last_stratum:
+            sampled.append(c)
+            last_stratum = stratum
+    # Forced commits are not random draws: the margin covers the systematic sample
+    # of the remaining commits only.
+    drawn, population = len(sampled) - forced, total - forced
+    if drawn and population > 1:
+        fpc = (population - drawn) / (population - 1)
+        margin = 1.96 * math.sqrt(0.25 / drawn * fpc)
+    else:
+        margin = 0.0 if drawn == population else 1.0
+    return sampled, SamplingInfo(
+        total_commits=total,
+        sampled_commits=len(sampled),
+        forced_commits=forced,
+        rate=rate,
+        margin_of_error=margin,
+    )
+
+
+def budget_sample_rate(
+    reader: GitReader,
+    commits: list[CommitInfo],
+    budget_seconds: float,
+    *,
+    pilot_size: int = 200,
+    merge_diffs: bool = True,
+) -> float:
+    """
+    Estimate the sampling rate that fits the diff-stat work into budget_seconds.
+    Times a small evenly spread pilot (whose stats stay cached for the real run)
+    and extrapolates the per-commit cost.
+    """
+    if not commits:
+        return 1.0
+    pilot, _ = sample_commits(commits, min(1.0, pilot_size / len(commits)))
+    start = time.perf_counter()
+    reader.prefetch_diff_stats(pilot, merge_diffs=merge_diffs)
+    elapsed = time.perf_counter() - start
+    remaining = budget_seconds - elapsed
+    if remaining <= 0:
+        return len(pilot) / len(commits)
+    per_commit = elapsed / max(1, len(pilot))
+    if per_commit <= 0:
+        return 1.0
+    affordable = len(pilot) + remaining / per_commit
+    return min(1.0, affordable / len(commits))
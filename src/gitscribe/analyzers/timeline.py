@@ -5,11 +5,11 @@ Derived from: commit messages, tags, diff size, and file renames/deletes.
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import datetime
 
-from gitscribe.git_reader import CommitInfo, GitReader, DiffStat
-
+from gitscribe.git_reader import CommitInfo, DiffSummary, GitReader
 
 # Keywords that often indicate a notable change (feature/refactor/decision)
 FEATURE_LIKE = ("feat", "feature", "add", "implement", "support", "introduce")
@@ -42,17 +42,18 @@ def build_development_timeline(
     *,
     max_events: int = 150,
     min_diff_lines: int = 30,
+    min_diff_files: int = 3,
 ) -> list[TimelineEvent]:
     """
     Produce a chronological list of notable events (newest first in input = oldest first in output).
-    Uses commit message keywords, tags (releases), and diff size.
+    Uses commit message keywords, tags (releases), and diff size. A metadata-only
+    reader has no line counts, so diff size is the number of files changed.
     """
     events: list[TimelineEvent] = []
+    line_counts = not reader.metadata_only
 
     for c in commits:
         subject_lower = (c.message_subject or "").lower()
-        body_lower = (c.message_body or "").lower()
-        combined = subject_lower + " " + body_lower
 
         kind = "other"
         if c.sha in tag_shas and c.tags:
@@ -73,16 +74,22 @@ def build_development_timeline(
             kind = "chore"
 
         try:
-            stats = reader.get_diff_stats(c.sha)
+            totals = reader.get_diff_totals(c.sha)
         except Exception:
-            stats = []
-        total_ins = sum(s.insertions for s in stats)
-        total_del = sum(s.deletions for s in stats)
-        num_files = len(stats)
-        scope = f"{num_files} files, +{total_ins} -{total_del}"
+            totals = DiffSummary()
+        total_ins = totals.insertions
+        total_del = totals.deletions
+        num_files = totals.files
+        scope = f"{num_files} files"
+        if line_counts:
+            scope += f", +{total_ins} -{total_del}"
 
         # Skip tiny commits unless release or clearly tagged
-        if kind == "other" and (total_ins + total_del) < min_diff_lines and not c.tags:
+        if line_counts:
+            small = (total_ins + total_del) < min_diff_lines
+        else:
+            small = num_files < min_diff_files
+        if kind == "other" and small and not c.tags:
             continue
 
         events.append(
@@ -101,3 +108,18 @@ def build_development_timeline(
             break
 
     return events
+
+
+def merge_timelines(
+    parts: Iterable[list[TimelineEvent]], *, max_events: int = 150
+) -> list[TimelineEvent]:
+    """
+    Join the timelines of consecutive commit ranges (newest range first). Each range
+    keeps at most max_events itself, so the result equals one pass over all ranges.
+    """
+    events: list[TimelineEvent] = []
+    for part in parts:
+        events.extend(part[: max_events - len(events)])
+        if len(events) >= max_events:
+            break
+    return events
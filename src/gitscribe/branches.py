@@ -0,0 +1,86 @@
+"""
+Multi-branch analysis. The histories of several branches come from one git log
+over all their tips (GitReader.get_branch_histories), so the commits they share
+are parsed, diffed and replayed once. Each tag is documented on one branch: the
+nearest one that reaches it.
+"""
+
+from __future__ import annotations
+
+from gitscribe.analyzers.architecture import FileEventLog, log_file_events
+from gitscribe.git_reader import CommitInfo, GitReader
+
+
+def landing_commits(chain: list[CommitInfo], by_sha: dict[str, CommitInfo]) -> dict[str, str]:
+    """
+    Map every commit reachable from a first-parent chain (newest first) to the
+    chain commit that brought it in: itself, or the merge of its side branch.
+    """
+    landed: dict[str, str] = {}
+    for c in reversed(chain):
+        landed[c.sha] = c.sha
+        stack = list(c.parent_shas[1:])
+        while stack:
+            sha = stack.pop()
+            if sha in landed or sha not in by_sha:
+                continue
+            landed[sha] = c.sha
+            stack.extend(by_sha[sha].parent_shas)
+    return landed
+
+
+def assign_tags(
+    histories: dict[str, list[CommitInfo]],
+    by_sha: dict[str, CommitInfo],
+    tags_by_sha: dict[str, list[str]],
+    *,
+    full_history: bool = False,
+) -> dict[str, dict[str, list[str]]]:
+    """
+    Split tags_by_sha between branches (histories and by_sha as returned by
+    get_branch_histories, before any --max-commits cut). A tag goes to the branch
+    that reaches its commit in the fewest commits from the tip (ties: the branch
+    given first). On a first-parent history, a tag of a merged side-branch commit
+    is attached to the merge that brought it in.
+    """
+    places: list[dict[str, tuple[int, str]]] = []  # per branch: tag sha -> (distance, commit)
+    for history in histories.values():
+        positions = {c.sha: i for i, c in enumerate(history)}
+        if full_history:
+            places.append({sha: (positions[sha], sha) for sha in tags_by_sha if sha in positions})
+            continue
+        landed = landing_commits(history, by_sha)
+        places.append(
+            {sha: (positions[landed[sha]], landed[sha]) for sha in tags_by_sha if sha in landed}
+        )
+
+    assigned: dict[str, dict[str, list[str]]] = {name: {} for name in histories}
+    names = list(histories)
+    analyzed = {c.sha for history in histories.values() for c in history}
+    # Tags of analyzed commits first, so a merge keeps its own tag as display name.
+    for sha, tags in sorted(tags_by_sha.items(), key=lambda item: item[0] not in analyzed):
+        found = [(place[sha], i) for i, place in enumerate(places) if sha in place]
+        if not found:
+            continue
+        (_, commit), i = min(found, key=lambda f: (f[0][0], f[1]))
+        assigned[names[i]].setdefault(commit, []).extend(tags)
+    return assigned
+
+
+def shared_file_events(reader: GitReader, chains: list[list[CommitInfo]]) -> list[FileEventLog]:
+    """
+    The FileEventLog of each oldest-first first-parent chain, as collect_file_events
+    would log it, from one diff-tree pass in which every shared commit is diffed once.
+    """
+    union: dict[str, CommitInfo] = {}
+    for chain in chains:
+        for c in chain:
+            union.setdefault(c.sha, c)
+    events = {c.sha: found for c, found in reader.iter_first_parent_events(list(union.values()))}
+    logs = []
+    for chain in chains:
+        file_events = FileEventLog()
+        for c in chain:
+            log_file_events(file_events, file_events.add_commit(c.sha), events.get(c.sha, []))
+        logs.append(file_events)
+    return logs
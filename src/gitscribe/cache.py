@@ -0,0 +1,158 @@
+"""
+Persistent caches for results derived only from immutable Git objects.
+Keys are built from object SHAs, so an entry never goes stale; each cache is one
+JSON file under the repository's Git directory (see GitReader.cache_dir).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any
+
+CACHE_VERSION = 1
+
+
+def cache_key(*parts: object) -> str:
+    """A stable key from SHAs and settings; long or non-SHA parts are hashed."""
+    return ":".join(
+        p if isinstance(p, str) and len(p) <= 64 and ":" not in p
+        else hashlib.sha1(repr(p).encode("utf-8")).hexdigest()[:16]
+        for p in parts
+    )
+
+
+class JsonCache:
+    """
+    A key -> JSON value map loaded from and saved to one file. A missing, unreadable
+    or old-version file is an empty cache; failing to save is silently ignored (the
+    cache is an optimization, e.g. for read-only repositories). path None disables it.
+    """
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self._entries: dict[str, Any] = {}
+        self._dirty = False
+        if path is not None:
+            try:
+                doc = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                doc = None
+            if isinstance(doc, dict) and doc.get("version") == CACHE_VERSION:
+                self._entries = dict(doc.get("entries") or {})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        if self.path is not None and self._entries.get(key) != value:
+            self._entries[key] = value
+            self._dirty = True
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(
+                json.dumps(
+                    {"version": CACHE_VERSION, "entries": self._entries}, separators=(",", ":")
+                ),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            pass
+
+
+def open_cache(cache_dir: Path | None, name: str) -> JsonCache:
+    """The named cache under cache_dir, or a disabled cache when cache_dir is None."""
+    return JsonCache(cache_dir / f"{name}.json" if cache_dir is not None else None)
+
+
+_SIZES_MAGIC = b"GSSIZES\0"
+
+
+class SizeCache:
+    """
+    Blob SHA -> size in bytes. Blobs never change, so records are only ever
+    appended to one binary file (it stays small and fast to load for hundreds of
+    thousands of blobs). A truncated tail is cut off before the next append, and a
+    file with a foreign header is rewritten. path None disables it.
+    """
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self._sizes: dict[str, int] = {}
+        self._new: dict[str, int] = {}
+        self._end: int | None = None  # end of the last complete record; None: rewrite
+        if path is None:
+            return
+        try:
+            raw = path.read_bytes()
+        except OSError:
+            return
+        if raw[:8] != _SIZES_MAGIC or raw[8:12] != struct.pack("<I", CACHE_VERSION):
+            return
+        pos = 12
+        try:
+            while pos < len(raw):
+                hash_len = raw[pos]
+                oid = raw[pos + 1 : pos + 1 + hash_len]
+                (size,) = struct.unpack_from("<Q", raw, pos + 1 + hash_len)
+                self._sizes[oid.hex()] = size
+                pos += 9 + hash_len
+        except (struct.error, IndexError):
+            pass  # truncated tail (interrupted write): keep what was complete
+        self._end = pos
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def get(self, sha: str) -> int | None:
+        return self._sizes.get(sha)
+
+    def set(self, sha: str, size: int) -> None:
+        if self.path is not None and sha not in self._sizes:
+            self._sizes[sha] = self._new[sha] = size
+
+    def save(self) -> None:
+        if self.path is None or not self._new:
+            return
+        rewrite = self._end is None
+        data = b"".join(
+            bytes((len(oid),)) + oid + struct.pack("<Q", size)
+            for oid, size in (
+                (bytes.fromhex(sha), size)
+                for sha, size in (self._sizes if rewrite else self._new).items()
+            )
+        )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if rewrite:
+                data = _SIZES_MAGIC + struct.pack("<I", CACHE_VERSION) + data
+                with self.path.open("wb") as fh:
+                    fh.write(data)
+                self._end = len(data)
+            else:
+                with self.path.open("r+b") as fh:
+                    fh.truncate(self._end)
+                    fh.seek(self._end)
+                    fh.write(data)
+                self._end += len(data)
+            self._new.clear()
+        except OSError:
+            pass
+
+
+def open_size_cache(cache_dir: Path | None) -> SizeCache:
+    """The blob size cache under cache_dir, or a disabled cache when cache_dir is None."""
+    return SizeCache(cache_dir / "blob-sizes.bin" if cache_dir is not None else None)
@@ -8,25 +8,16 @@ import argparse
 import sys
 from pathlib import Path
 
-from git.exc import InvalidGitRepositoryError
-
 from gitscribe import __version__
-from gitscribe.git_reader import GitReader
-from gitscribe.analyzers import (
-    detect_breaking_changes,
-    analyze_architecture_evolution,
-    build_development_timeline,
-    compute_churn_report,
-)
-from gitscribe.generators import (
-    generate_changelog_md,
-    generate_architecture_md,
-    generate_development_md,
-    generate_summary_md,
-)
-
-
-def main() -> int:
+
+# GitPython, the analyzers and the generators are imported inside main() once the
+# arguments are parsed, so --help/--version and argument errors stay cheap.
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in _COMMANDS:
+        return _COMMANDS[argv[0]](argv[1:])
     parser = argparse.ArgumentParser(
         description="GitScribe — History-driven documentation from Git repository analysis.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -36,6 +27,11 @@ Outputs (Markdown, written to docs/ inside the repo, or --output-dir):
   ARCHITECTURE.md Module structure and how it evolved over time
   DEVELOPMENT.md  Timeline of major features, refactors, and decisions
   SUMMARY.md      (optional) High-churn files and unstable components
+
+Commands:
+  gitscribe index build|verify   Precomputed history index (see --index)
+  gitscribe churn                Most changed files --since a date or --between two tags
+  gitscribe serve REPO...        Answer changelog/churn/breaking/architecture queries over HTTP
         """,
     )
     parser.add_argument(
@@ -56,12 +52,151 @@ Outputs (Markdown, written to docs/ inside the repo, or --output-dir):
         action="store_true",
         help="Also generate SUMMARY.md (high-churn and unstable components)",
     )
+    parser.add_argument(
+        "--only",
+        type=str,
+        default=None,
+        metavar="OUTPUTS",
+        help="Comma-separated outputs to generate: changelog, architecture, development, "
+        "summary (default: the first three, plus summary with --with-summary). "
+        "Analyses no requested output needs are skipped",
+    )
     parser.add_argument(
         "--max-commits",
         type=int,
         default=5000,
         help="Maximum commits to analyze (default: 5000)",
     )
+    parser.add_argument(
+        "--full-history",
+        action="store_true",
+        help="Walk every commit in the DAG, not only the first-parent chain "
+        "(merged commits are analyzed individually)",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        metavar="PATHSPEC",
+        help="Only diff paths matching this git pathspec (repeatable)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        metavar="PATHSPEC",
+        help="Never diff paths matching this git pathspec, e.g. vendor/ (repeatable)",
+    )
+    parser.add_argument(
+        "--path",
+        action="append",
+        default=None,
+        metavar="DIR",
+        help="Document only the subproject in directory DIR. Repeat it (or use "
+        "--paths-from) to document several from one history pass, each into "
+        "OUTPUT_DIR/DIR",
+    )
+    parser.add_argument(
+        "--paths-from",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Subproject directories for --path, one per line",
+    )
+    parser.add_argument(
+        "--branch",
+        action="append",
+        default=None,
+        metavar="NAME",
+        help="Document this branch instead of HEAD. Repeat it to document several "
+        "from one history walk, each into OUTPUT_DIR/NAME; every tag is listed on "
+        "the nearest branch that reaches it",
+    )
+    parser.add_argument(
+        "--split-by",
+        choices=("release", "year"),
+        default=None,
+        help="Write CHANGELOG.md and DEVELOPMENT.md as index pages linking to one page "
+        "per release or per year (in changelog/ and development/)",
+    )
+    parser.add_argument(
+        "--max-files-per-commit",
+        type=int,
+        default=10000,
+        metavar="N",
+        help="Keep per-file stats for at most N files of a commit; the rest are only "
+        "counted (default: 10000, 0 for no limit)",
+    )
+    parser.add_argument(
+        "--metadata-only",
+        action="store_true",
+        help="Never read file contents, for partial clones (--filter=blob:none): changes "
+        "are taken from tree diffs, so line counts and sizes are left out",
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=float,
+        default=None,
+        metavar="RATE",
+        help="Run the diff-based analyses on an evenly spread fraction of commits "
+        "(0 < RATE <= 1); tagged and breaking-marked commits are always included",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Pick the sample rate so the diff-based analyses take about SECONDS",
+    )
+    parser.add_argument(
+        "--coupling",
+        choices=("pairs", "minhash"),
+        default="pairs",
+        help="How SUMMARY.md finds files that change together: exact pair counts "
+        "(default) or MinHash estimates for very large histories",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Split the history into N shards analyzed in parallel processes "
+        "(0: one per CPU; default: 1). The output is the same as with one job",
+    )
+    parser.add_argument(
+        "--export",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Also save the analysis results to FILE (.ndjson, .json or .msgpack)",
+    )
+    parser.add_argument(
+        "--export-format",
+        choices=("ndjson", "json", "msgpack"),
+        default=None,
+        help="Format for --export (default: from the file extension, else ndjson)",
+    )
+    parser.add_argument(
+        "--from-export",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Render Markdown from results saved with --export instead of reading Git",
+    )
+    parser.add_argument(
+        "--index",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Read history up to the tip of a 'gitscribe index build' file from it; "
+        "only newer commits are read from Git",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the result caches kept in the repository's Git directory",
+    )
     parser.add_argument(
         "-q",
         "--quiet",
@@ -74,66 +209,965 @@ Outputs (Markdown, written to docs/ inside the repo, or --output-dir):
         action="version",
         version=f"%(prog)s {__version__}",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.sample_rate is not None and not 0 < args.sample_rate <= 1:
+        parser.error("--sample-rate must be in (0, 1]")
+    if args.budget is not None and args.budget <= 0:
+        parser.error("--budget must be positive")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or more")
+    scopes = _scopes(args, parser)
+    if scopes and args.include:
+        parser.error("--path cannot be combined with --include")
+    if scopes and args.from_export:
+        parser.error("--path cannot be combined with --from-export")
+    branches = list(dict.fromkeys(args.branch or []))
+    if branches and scopes:
+        parser.error("--branch cannot be combined with --path")
+    if branches and args.from_export:
+        parser.error("--branch cannot be combined with --from-export")
+    if branches and args.index:
+        parser.error("--branch cannot be combined with --index")
+    if args.metadata_only and args.index:
+        parser.error("--metadata-only cannot be combined with --index")
+    for several, what in ((scopes, "--path subprojects"), (branches, "--branch names")):
+        if len(several) < 2:
+            continue
+        for flag, value in (
+            ("--export", args.export),
+            ("--jobs", args.jobs != 1),
+            ("--sample-rate", args.sample_rate is not None),
+            ("--budget", args.budget is not None),
+        ):
+            if value:
+                parser.error(f"{flag} cannot be used with several {what}")
+
+    from gitscribe.plan import DEFAULT_OUTPUTS, parse_outputs, plan_for_outputs
+
+    if args.only:
+        try:
+            outputs = parse_outputs(args.only)
+        except ValueError as e:
+            parser.error(f"--only: {e}")
+    else:
+        outputs = DEFAULT_OUTPUTS + (("summary",) if args.with_summary else ())
+    plan = plan_for_outputs(outputs)
+
+    from gitscribe.cache import open_cache
+    from gitscribe.export import read_results, write_results
 
     repo_path = Path(args.repo_path).resolve()
     output_dir = Path(args.output_dir).resolve() if args.output_dir else (repo_path / "docs")
 
+    if args.from_export:
+        try:
+            results = read_results(Path(args.from_export))
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            print(f"fatal: cannot load {args.from_export}: {e}", file=sys.stderr)
+            return 1
+        if not args.quiet:
+            print(f"GitScribe: rendering from {args.from_export}", flush=True)
+        _write_docs(args, plan, results, output_dir)
+    else:
+        runs = _analyze(args, repo_path, plan, scopes, branches)
+        if runs is None:
+            return 1
+        section_cache = None
+        for (results, reader), branch in zip(runs, branches or [None] * len(runs)):
+            if not args.no_cache and section_cache is None:
+                section_cache = open_cache(reader.cache_dir, "changelog-sections")
+            if args.export:
+                try:
+                    write_results(results, Path(args.export), args.export_format)
+                except (OSError, ValueError, RuntimeError) as e:
+                    print(f"fatal: cannot export to {args.export}: {e}", file=sys.stderr)
+                    return 1
+                if not args.quiet:
+                    print(f"  Exported: {Path(args.export).resolve()}", flush=True)
+            if len(scopes) > 1:
+                run_dir = output_dir / reader.scope
+            elif len(branches) > 1:
+                run_dir = output_dir / branch
+            else:
+                run_dir = output_dir
+            _write_docs(
+                args,
+                plan,
+                results,
+                run_dir,
+                section_cache=section_cache,
+                cache_context=repr(reader.pathspecs) + (" files" if reader.metadata_only else ""),
+            )
+        for _, reader in runs:
+            reader.close()
+
+    if not args.quiet:
+        print("Done.", flush=True)
+    return 0
+
+
+def _scopes(args: argparse.Namespace, parser: argparse.ArgumentParser) -> list[str]:
+    """The subproject directories from --path and --paths-from, in order, without repeats."""
+    from gitscribe.git_reader import normalize_scope
+    from gitscribe.subprojects import read_scope_list
+
+    scopes: list[str] = []
+    for path in args.path or []:
+        scope = normalize_scope(path)
+        if not scope:
+            parser.error(f"--path {path!r} is not a subdirectory")
+        if scope not in scopes:
+            scopes.append(scope)
+    if args.paths_from:
+        try:
+            scopes += [s for s in read_scope_list(Path(args.paths_from)) if s not in scopes]
+        except OSError as e:
+            parser.error(f"--paths-from: {e}")
+    return scopes
+
+
+def _write_docs(
+    args: argparse.Namespace,
+    plan,
+    results,
+    output_dir: Path,
+    *,
+    section_cache=None,
+    cache_context: str = "",
+) -> None:
+    """Render the requested outputs the results cover and write them to output_dir."""
+    from gitscribe.generators import (
+        generate_architecture_md,
+        generate_changelog_md,
+        generate_changelog_pages,
+        generate_development_md,
+        generate_development_pages,
+        generate_summary_md,
+    )
+    from gitscribe.plan import OUTPUT_FILES
+
+    repo_name = results.repo_name
+    sampling = results.sampling
+    split_by = args.split_by
+
+    # Generators (only for requested outputs the results actually cover). Each
+    # output is one file, or with --split-by an index file plus a directory of pages.
+    rendered: dict[str, dict[str, str]] = {}  # output -> relative path -> text
+    for name in plan.outputs:
+        if name not in results.outputs:
+            print(f"warning: {name} was not part of the saved analysis; skipped", file=sys.stderr)
+        elif name == "changelog":
+            options = dict(
+                full_history=results.full_history,
+                sampling=sampling,
+                release_stats=results.release_stats,
+                line_counts=results.line_counts,
+                section_cache=section_cache,
+                cache_context=cache_context,
+            )
+            inputs = (results.commits, results.tags_by_sha, results.breaking, repo_name)
+            if split_by:
+                rendered[name] = generate_changelog_pages(*inputs, split_by=split_by, **options)
+            else:
+                rendered[name] = {OUTPUT_FILES[name]: generate_changelog_md(*inputs, **options)}
+        elif name == "architecture":
+            rendered[name] = {
+                OUTPUT_FILES[name]: generate_architecture_md(results.evolution, repo_name)
+            }
+        elif name == "development":
+            if split_by:
+                rendered[name] = generate_development_pages(
+                    results.timeline,
+                    repo_name,
+                    sampling=sampling,
+                    split_by=split_by,
+                    release_of=_release_names(results) if split_by == "release" else None,
+                )
+            else:
+                text = generate_development_md(results.timeline, repo_name, sampling=sampling)
+                rendered[name] = {OUTPUT_FILES[name]: text}
+        elif name == "summary":
+            rendered[name] = {
+                OUTPUT_FILES[name]: generate_summary_md(
+                    results.churn,
+                    repo_name,
+                    sampling=sampling,
+                    coupling=results.coupling,
+                    hotspots=results.hotspots,
+                    release_churn=results.release_churn,
+                    line_counts=results.line_counts,
+                )
+            }
+
+    # Write files; unchanged files are left alone (and keep their modification time).
+    # Pages carry a marker line so later runs only ever remove pages written here.
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, files in rendered.items():
+        index_rel = OUTPUT_FILES[name]
+        files = {
+            rel: text if rel == index_rel else f"{_PAGE_MARKER}\n{text}"
+            for rel, text in files.items()
+        }
+        written = sum(_write_if_changed(output_dir / rel, text) for rel, text in files.items())
+        if len(files) > 1:
+            _remove_stale_pages(output_dir, files)
+        if not args.quiet:
+            index = output_dir / index_rel
+            if len(files) > 1:
+                print(f"  Wrote: {index} and {len(files) - 1} pages ({written} changed)")
+            else:
+                print(f"  Wrote: {index}" + ("" if written else " (unchanged)"))
+
+
+def _write_if_changed(path: Path, text: str) -> bool:
+    """Write text to path unless it already holds exactly that; True if written."""
+    data = text.encode("utf-8")
     try:
-        reader = GitReader(repo_path)
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
+
+
+_PAGE_MARKER = "<!-- Generated by GitScribe --split-by; removed when no longer produced. -->"
+
+
+def _remove_stale_pages(output_dir: Path, files: dict[str, str]) -> None:
+    """
+    Delete pages earlier runs left in the page directories (e.g. for deleted tags or
+    another --split-by). Only files starting with the page marker are touched.
+    """
+    marker = _PAGE_MARKER.encode("utf-8")
+    for directory in {Path(rel).parent for rel in files} - {Path(".")}:
+        for page in (output_dir / directory).glob("*.md"):
+            if (directory / page.name).as_posix() in files:
+                continue
+            try:
+                with page.open("rb") as f:
+                    generated = f.readline().rstrip(b"\r\n") == marker
+            except OSError:
+                continue
+            if generated:
+                page.unlink()
+
+
+def _release_names(results) -> dict[str, str]:
+    """Commit SHA -> name of the release that lists it, for release pages."""
+    from gitscribe.analyzers.releases import release_owners
+
+    owners = release_owners(results.commits, results.tags_by_sha, full_history=results.full_history)
+    return {sha: (results.tags_by_sha.get(tag) or [tag[:7]])[0] for sha, tag in owners.items()}
+
+
+def _analyze(
+    args: argparse.Namespace, repo_path: Path, plan, scopes: list[str], branches: list[str]
+):
+    """
+    Read the repository and run the planned analyzers, once per subproject in
+    scopes or per branch in branches (or once for the whole repository). Returns
+    a list of (results, reader), or None if repo_path is not a Git repo or a
+    branch does not exist.
+    """
+    from git.exc import InvalidGitRepositoryError
+
+    from gitscribe.git_reader import GitReader
+
+    try:
+        reader = GitReader(
+            repo_path,
+            include=args.include,
+            exclude=args.exclude,
+            max_files_per_commit=args.max_files_per_commit or None,
+            scope=scopes[0] if len(scopes) == 1 else None,
+            metadata_only=args.metadata_only,
+        )
     except InvalidGitRepositoryError:
         print("fatal: not a Git repository (or .git not found)", file=sys.stderr)
-        return 1
+        return None
+    if not args.metadata_only and reader.is_partial_clone:
+        print(
+            "warning: this is a partial clone; diffs may need to fetch file contents "
+            "(use --metadata-only to work from trees only)",
+            file=sys.stderr,
+        )
 
     if not args.quiet:
         print("GitScribe: analyzing Git history...", flush=True)
+    if args.index:
+        index = _open_verified_index(reader, Path(args.index))
+        if index is not None:
+            reader.use_index(index)
+            if not args.quiet:
+                print(f"  Index: {len(index)} commits up to {index.tip[:12]}", flush=True)
 
-    commits = reader.get_all_commits()
+    tags_by_sha: dict[str, list[str]] = {}
+    for t in reader.get_tags():
+        if t.sha:
+            tags_by_sha.setdefault(t.sha, []).append(t.name)
+    if branches:
+        return _analyze_branches(args, plan, reader, branches, tags_by_sha)
+
+    commits = reader.get_all_commits(first_parent=not args.full_history)
     if args.max_commits and len(commits) > args.max_commits:
         commits = commits[: args.max_commits]
     if not args.quiet:
         print(f"  Commits analyzed: {len(commits)}", flush=True)
 
-    tags = reader.get_tags()
-    tags_by_sha: dict[str, list[str]] = {}
-    tag_shas: set[str] = set()
-    for t in tags:
-        if t.sha:
-            tags_by_sha.setdefault(t.sha, []).append(t.name)
-            tag_shas.add(t.sha)
+    if len(scopes) > 1:
+        return _analyze_subprojects(args, plan, reader, commits, tags_by_sha, scopes)
+    return [(_analyze_history(args, plan, reader, commits, tags_by_sha), reader)]
 
-    repo_name = repo_path.name or "Repository"
 
-    # Analyses (deterministic)
-    breaking = detect_breaking_changes(reader, commits)
-    evolution = analyze_architecture_evolution(reader, commits, tag_shas)
-    timeline = build_development_timeline(reader, commits, tag_shas)
-    churn = compute_churn_report(reader, commits)
+def _analyze_history(
+    args: argparse.Namespace,
+    plan,
+    reader,
+    history,
+    tags_by_sha,
+    *,
+    file_events=None,
+    name=None,
+    report_ingest=True,
+):
+    """
+    Run the planned analyzers over history (newest first) as seen by reader.
+    file_events, if given, is the architecture file event log of history; name
+    replaces the repository name in the documents.
+    """
+    from gitscribe.analyzers import (
+        analyze_architecture_evolution,
+        budget_sample_rate,
+        build_churn_index,
+        build_development_timeline,
+        compute_coupling_report,
+        detect_breaking_changes,
+        release_churn,
+        sample_commits,
+    )
+    from gitscribe.analyzers.architecture import architecture_chain, measure_snapshot_sizes
+    from gitscribe.analyzers.breaking import breaking_message_evidence
+    from gitscribe.analyzers.churn import count_churn
+    from gitscribe.analyzers.releases import compute_release_stats
+    from gitscribe.cache import open_cache
+    from gitscribe.export import AnalysisResults
+    from gitscribe.parallel import analyze_sharded, default_jobs
+    from gitscribe.subprojects import commits_in_scope
 
-    # Generators
-    changelog_md = generate_changelog_md(commits, tags_by_sha, breaking, repo_name)
-    architecture_md = generate_architecture_md(evolution, repo_name)
-    development_md = generate_development_md(timeline, repo_name)
-    summary_md = generate_summary_md(churn, repo_name)
+    merge_diffs = not args.full_history
+    commits = history
+    changed = None
+    if reader.scope:
+        # Only the commits that change the subproject (tagged ones mark its releases)
+        changed = _scope_candidates(args, reader, history)
+        reader.skip_diff_stats(c.sha for c in history if c.sha not in changed)
+        reader.prefetch_diff_stats(
+            [c for c in history if c.sha in changed], merge_diffs=merge_diffs
+        )
+        commits = commits_in_scope(reader, history)
+        if not args.quiet:
+            print(f"  Commits touching {reader.scope}/: {len(commits)}", flush=True)
 
-    # Write files
-    output_dir.mkdir(parents=True, exist_ok=True)
-    (output_dir / "CHANGELOG.md").write_text(changelog_md, encoding="utf-8")
-    (output_dir / "ARCHITECTURE.md").write_text(architecture_md, encoding="utf-8")
-    (output_dir / "DEVELOPMENT.md").write_text(development_md, encoding="utf-8")
-    if args.with_summary:
-        (output_dir / "SUMMARY.md").write_text(summary_md, encoding="utf-8")
+    # Diff-based analyses may run on a sample; the changelog always lists every commit.
+    analysis_commits = commits
+    sampling = None
+    wants_numstat = bool(plan.sources & {"numstat", "numstat:unmatched"})
+    if wants_numstat and (args.sample_rate is not None or args.budget is not None):
+        rate = args.sample_rate if args.sample_rate is not None else 1.0
+        if args.budget is not None:
+            budget_rate = budget_sample_rate(reader, commits, args.budget, merge_diffs=merge_diffs)
+            rate = min(rate, budget_rate)
+        forced = {c.sha for c in commits if c.sha in tags_by_sha or breaking_message_evidence(c)}
+        analysis_commits, sampling = sample_commits(commits, rate, always_include=forced)
+        if not args.quiet:
+            print(
+                f"  Sampled for diff analysis: {sampling.sampled_commits} "
+                f"({sampling.ratio:.1%})",
+                flush=True,
+            )
 
+    # One bulk diff pass, limited to the commits a planned analyzer will read.
+    jobs = args.jobs or default_jobs()
+    numstat_commits = plan.numstat_commits(analysis_commits)
+    if numstat_commits and jobs == 1:
+        reader.prefetch_diff_stats(numstat_commits, merge_diffs=merge_diffs)
     if not args.quiet:
-        print(f"  Wrote: {output_dir / 'CHANGELOG.md'}")
-        print(f"  Wrote: {output_dir / 'ARCHITECTURE.md'}")
-        print(f"  Wrote: {output_dir / 'DEVELOPMENT.md'}")
-        if args.with_summary:
-            print(f"  Wrote: {output_dir / 'SUMMARY.md'}")
-        print("Done.", flush=True)
+        print(f"  Diffed commits: {len(numstat_commits)}", flush=True)
 
+    tag_shas = set(tags_by_sha)
+    repo_name = name or reader.repo_path.name or "Repository"
+    # Analyses (deterministic); skipped analyzers leave empty results
+    results = AnalysisResults(
+        repo_name=f"{repo_name}/{reader.scope}" if reader.scope else repo_name,
+        commits=commits,
+        tags_by_sha=tags_by_sha,
+        full_history=args.full_history,
+        sampling=sampling,
+        line_counts=not reader.metadata_only,
+        outputs=plan.outputs,
+    )
+    if plan.runs("releases"):
+        # Tag-to-tag tree diffs, cheap and independent of the commit sample
+        cache_dir = None if args.no_cache else reader.cache_dir
+        results.release_stats = compute_release_stats(
+            reader, commits, tags_by_sha, cache=open_cache(cache_dir, "release-stats")
+        )
+    if jobs > 1:
+        # Map-reduce: per-commit work in worker processes, merged in commit order
+        shards = analyze_sharded(
+            reader,
+            plan,
+            analysis_commits,
+            architecture_chain(history) if plan.runs("architecture") else [],
+            tag_shas,
+            jobs=jobs,
+            include=args.include,
+            exclude=args.exclude,
+            merge_diffs=merge_diffs,
+            index_path=Path(args.index) if reader.has_index else None,
+            coupling_method=args.coupling,
+        )
+        results.breaking = shards.breaking
+        results.timeline = shards.timeline
+        if plan.runs("churn"):
+            _churn_results(args, plan, reader, results, shards.churn)
+        if shards.churn_index is not None:
+            results.release_churn = release_churn(shards.churn_index, commits, tags_by_sha)
+        if shards.coupling is not None:
+            results.coupling = shards.coupling.report()
+        if plan.runs("architecture"):
+            results.evolution = analyze_architecture_evolution(
+                reader, history, tag_shas, file_events=shards.file_events, root=reader.scope
+            )
+            measure_snapshot_sizes(
+                reader, results.evolution, root=reader.scope, size_cache=_size_cache(args, reader)
+            )
+        pipeline_stats = {**reader.pipeline_stats, **shards.pipeline_stats}
+        worker_processes = shards.git_processes
+        if not args.quiet:
+            print(f"  Shards: {jobs} worker processes", flush=True)
+    else:
+        if plan.runs("breaking"):
+            results.breaking = detect_breaking_changes(reader, analysis_commits)
+        if plan.runs("timeline"):
+            results.timeline = build_development_timeline(reader, analysis_commits, tag_shas)
+        if plan.runs("churn"):
+            _churn_results(args, plan, reader, results, count_churn(reader, analysis_commits))
+        if plan.runs("release_churn"):
+            index = build_churn_index(reader, analysis_commits)
+            results.release_churn = release_churn(index, commits, tags_by_sha)
+        if plan.runs("coupling"):
+            results.coupling = compute_coupling_report(
+                reader, analysis_commits, method=args.coupling
+            )
+        if plan.runs("architecture"):
+            # Architecture replays file events (no line counts), so it always sees every
+            # commit; in a subproject, only those that may change it are diffed.
+            results.evolution = analyze_architecture_evolution(
+                reader,
+                history,
+                tag_shas,
+                file_events=file_events,
+                root=reader.scope,
+                changed=changed,
+            )
+            measure_snapshot_sizes(
+                reader, results.evolution, root=reader.scope, size_cache=_size_cache(args, reader)
+            )
+        pipeline_stats = reader.pipeline_stats
+        worker_processes = 0
+    if report_ingest and not args.quiet:
+        _report_ingest(reader, pipeline_stats, worker_processes)
+    return results
+
+
+def _report_ingest(reader, pipeline_stats, worker_processes: int = 0) -> None:
+    """Print the ingest pipeline stats and how many git processes the run started."""
+    for stats in pipeline_stats.values():
+        print(f"  Ingest {stats.describe()}", flush=True)
+    print(f"  Git processes: {reader.git_processes + worker_processes}", flush=True)
+
+
+def _churn_results(args: argparse.Namespace, plan, reader, results, counts) -> None:
+    """Set results.churn, and the hotspots when planned, from merged ChurnCounts."""
+    from gitscribe.analyzers import rank_hotspots
+
+    results.churn = counts.report()
+    if plan.runs("hotspots"):
+        results.hotspots = rank_hotspots(
+            reader,
+            counts,
+            now=results.commits[0].committed_date if results.commits else None,
+            size_cache=_size_cache(args, reader),
+        )
+
+
+def _size_cache(args: argparse.Namespace, reader):
+    """The blob size cache for reader's repository (disabled with --no-cache)."""
+    from gitscribe.cache import open_size_cache
+
+    return open_size_cache(None if args.no_cache else reader.cache_dir)
+
+
+def _scope_candidates(args: argparse.Namespace, reader, commits) -> set[str]:
+    """The commits whose changed-path filters say they may touch reader.scope."""
+    from gitscribe.pathfilter import ChangedPathFilter
+
+    paths = ChangedPathFilter(reader, None if args.no_cache else reader.cache_dir)
+    changed = paths.candidates(commits, reader.scope)
+    if not args.quiet:
+        sources = ", ".join(f"{n} {k}" for k, n in paths.sources.items() if n)
+        print(f"  Path filter: {len(changed)} of {len(commits)} commits may touch "
+              f"{reader.scope}/ ({sources or 'no filters'})", flush=True)
+    return changed
+
+
+def _analyze_subprojects(args: argparse.Namespace, plan, reader, history, tags_by_sha, scopes):
+    """
+    Batch mode: read the whole repository once (every commit's diff stats and the
+    architecture file events), then analyze each subproject through a ScopedReader.
+    """
+    from gitscribe.analyzers import (
+        analyze_architecture_evolution,
+        build_churn_index,
+        build_development_timeline,
+        compute_coupling_report,
+        detect_breaking_changes,
+        release_churn,
+    )
+    from gitscribe.analyzers.architecture import (
+        architecture_chain,
+        collect_file_events,
+        measure_snapshot_sizes,
+    )
+    from gitscribe.analyzers.churn import count_churn
+    from gitscribe.analyzers.releases import compute_release_stats
+    from gitscribe.cache import open_cache
+    from gitscribe.export import AnalysisResults
+    from gitscribe.subprojects import ScopedReader, commits_in_scope
+
+    # Every commit is diffed once: the stats decide which commits each subproject has.
+    reader.prefetch_diff_stats(history, merge_diffs=not args.full_history)
+    file_events = None
+    if plan.runs("architecture"):
+        file_events = collect_file_events(reader, architecture_chain(history))
+    release_cache = open_cache(None if args.no_cache else reader.cache_dir, "release-stats")
+    tag_shas = set(tags_by_sha)
+    repo_name = reader.repo_path.name or "Repository"
+
+    runs = []
+    for scope in scopes:
+        view = ScopedReader(reader, scope)
+        commits = commits_in_scope(view, history)
+        if not args.quiet:
+            print(f"  {scope}/: {len(commits)} commits", flush=True)
+        results = AnalysisResults(
+            repo_name=f"{repo_name}/{scope}",
+            commits=commits,
+            tags_by_sha=tags_by_sha,
+            full_history=args.full_history,
+            line_counts=not reader.metadata_only,
+            outputs=plan.outputs,
+        )
+        if plan.runs("releases"):
+            results.release_stats = compute_release_stats(
+                view, commits, tags_by_sha, cache=release_cache
+            )
+        if plan.runs("breaking"):
+            results.breaking = detect_breaking_changes(view, commits)
+        if plan.runs("timeline"):
+            results.timeline = build_development_timeline(view, commits, tag_shas)
+        if plan.runs("churn"):
+            _churn_results(args, plan, view, results, count_churn(view, commits))
+        if plan.runs("release_churn"):
+            results.release_churn = release_churn(
+                build_churn_index(view, commits), commits, tags_by_sha
+            )
+        if plan.runs("coupling"):
+            results.coupling = compute_coupling_report(view, commits, method=args.coupling)
+        if plan.runs("architecture"):
+            results.evolution = analyze_architecture_evolution(
+                view, history, tag_shas, file_events=file_events, root=scope
+            )
+            measure_snapshot_sizes(
+                view, results.evolution, root=scope, size_cache=_size_cache(args, view)
+            )
+        runs.append((results, view))
+    if not args.quiet:
+        _report_ingest(reader, reader.pipeline_stats)
+    return runs
+
+
+def _analyze_branches(args: argparse.Namespace, plan, reader, branches, tags_by_sha):
+    """
+    Read the histories of all branches in one walk, diff the commits they share once
+    (line counts and architecture file events), then analyze each branch with the
+    tags assigned to it. A single branch keeps all tags and the plain repository
+    name, so its documents match a plain run.
+    """
+    from gitscribe.analyzers.architecture import architecture_chain
+    from gitscribe.branches import assign_tags, shared_file_events
+    from gitscribe.git_reader import CommitInfo
+
+    try:
+        histories, walked = reader.get_branch_histories(
+            branches, first_parent=not args.full_history
+        )
+    except ValueError as e:
+        print(f"fatal: {e}", file=sys.stderr)
+        return None
+    if len(histories) > 1:
+        branch_tags = assign_tags(histories, walked, tags_by_sha, full_history=args.full_history)
+    else:  # nothing to split: the tags a plain run of that branch would see
+        branch_tags = {name: tags_by_sha for name in histories}
+    if args.max_commits:
+        histories = {name: history[: args.max_commits] for name, history in histories.items()}
+
+    file_events = dict.fromkeys(histories)
+    if len(histories) > 1:
+        shared: dict[str, CommitInfo] = {}
+        for history in histories.values():
+            shared.update((c.sha, c) for c in plan.numstat_commits(history))
+        reader.prefetch_diff_stats(list(shared.values()), merge_diffs=not args.full_history)
+        if plan.runs("architecture"):
+            chains = [architecture_chain(history) for history in histories.values()]
+            file_events = dict(zip(histories, shared_file_events(reader, chains)))
+
+    repo_name = reader.repo_path.name or "Repository"
+    single = len(histories) == 1
+    runs = []
+    for name, history in histories.items():
+        if not args.quiet:
+            print(f"  {name}: {len(history)} commits, {len(branch_tags[name])} tagged", flush=True)
+        results = _analyze_history(
+            args,
+            plan,
+            reader,
+            history,
+            branch_tags[name],
+            file_events=file_events[name],
+            name=repo_name if single else f"{repo_name} ({name})",
+            report_ingest=single,
+        )
+        runs.append((results, reader))
+    if not single and not args.quiet:
+        _report_ingest(reader, reader.pipeline_stats)
+    return runs
+
+
+def _open_verified_index(reader, path: Path):
+    """The HistoryIndex at path if it matches reader's repository, else None (with a warning)."""
+    from gitscribe.history_index import open_index, verify_index
+
+    try:
+        index = open_index(path)
+    except (OSError, ValueError) as e:
+        print(f"warning: cannot use index {path}: {e}", file=sys.stderr)
+        return None
+    problem = verify_index(reader, index)
+    if problem:
+        print(f"warning: ignoring index {path}: {problem}", file=sys.stderr)
+        index.close()
+        return None
+    return index
+
+
+def index_main(argv: list[str]) -> int:
+    """gitscribe index build|verify: maintain a portable history index file."""
+    parser = argparse.ArgumentParser(
+        prog="gitscribe index",
+        description="Build, extend or check a precomputed history index for --index.",
+    )
+    parser.add_argument("action", choices=("build", "verify"))
+    parser.add_argument(
+        "repo_path", nargs="?", default=".", help="Path to the local Git repository"
+    )
+    parser.add_argument(
+        "--index",
+        "-f",
+        dest="index",
+        required=True,
+        metavar="FILE",
+        help="Index file to write (build) or check (verify)",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Build from scratch instead of extending an existing index",
+    )
+    parser.add_argument("--include", action="append", default=None, metavar="PATHSPEC")
+    parser.add_argument("--exclude", action="append", default=None, metavar="PATHSPEC")
+    parser.add_argument("--max-files-per-commit", type=int, default=10000, metavar="N")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress progress messages")
+    args = parser.parse_args(argv)
+
+    from git.exc import InvalidGitRepositoryError
+
+    from gitscribe.git_reader import GitReader
+    from gitscribe.history_index import build_index
+
+    try:
+        reader = GitReader(
+            Path(args.repo_path).resolve(),
+            include=args.include,
+            exclude=args.exclude,
+            max_files_per_commit=args.max_files_per_commit or None,
+        )
+    except InvalidGitRepositoryError:
+        print("fatal: not a Git repository (or .git not found)", file=sys.stderr)
+        return 1
+    path = Path(args.index)
+
+    if args.action == "verify":
+        index = _open_verified_index(reader, path)
+        if index is None:
+            return 1
+        if not args.quiet:
+            head = reader.rev_parse("HEAD") or ""
+            behind = int(reader.run_git("rev-list", "--count", f"{index.tip}..{head}") or 0)
+            print(
+                f"{path}: {len(index)} commits up to {index.tip[:12]}; "
+                f"{behind} newer commit(s) in HEAD"
+            )
+        index.close()
+        return 0
+
+    try:
+        total, read = build_index(reader, path, extend=not args.rebuild)
+    except (OSError, ValueError) as e:
+        print(f"fatal: cannot build index {path}: {e}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(f"{path}: {total} commits ({read} read from Git)")
+    return 0
+
+
+def _parse_since(value: str):
+    """--since: an ISO date/time, or a span back from now such as 90d or 12w."""
+    from gitscribe.analyzers.churn_index import parse_since
+
+    try:
+        return parse_since(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def churn_main(argv: list[str]) -> int:
+    """gitscribe churn: the most changed files over a time window or between two revisions."""
+    parser = argparse.ArgumentParser(
+        prog="gitscribe churn",
+        description="Rank files by line changes over part of the history (default: all of it).",
+    )
+    parser.add_argument(
+        "repo_path", nargs="?", default=".", help="Path to the local Git repository"
+    )
+    window = parser.add_mutually_exclusive_group()
+    window.add_argument(
+        "--since",
+        type=_parse_since,
+        default=None,
+        metavar="WHEN",
+        help="Commits made at or after WHEN: a date (2024-01-31) "
+        "or a span back from now (90d, 12w)",
+    )
+    window.add_argument(
+        "--between",
+        nargs=2,
+        default=None,
+        metavar=("OLD", "NEW"),
+        help="Commits after revision OLD up to and including NEW (tags, branches or SHAs)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=20, metavar="N", help="Files to list (default: 20)"
+    )
+    parser.add_argument(
+        "--path", default=None, metavar="DIR", help="Only count this subproject directory"
+    )
+    parser.add_argument("--include", action="append", default=None, metavar="PATHSPEC")
+    parser.add_argument("--exclude", action="append", default=None, metavar="PATHSPEC")
+    parser.add_argument(
+        "--full-history", action="store_true", help="Follow all parents, not only the first"
+    )
+    parser.add_argument("--max-commits", type=int, default=None, metavar="N")
+    parser.add_argument("--max-files-per-commit", type=int, default=10000, metavar="N")
+    parser.add_argument(
+        "--metadata-only",
+        action="store_true",
+        help="Never read file contents (partial clones): count commits, not lines",
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        metavar="FILE",
+        help="Read history from a 'gitscribe index build' file (fast repeated queries)",
+    )
+    args = parser.parse_args(argv)
+    if args.top < 1:
+        parser.error("--top must be at least 1")
+    if args.path and args.include:
+        parser.error("--path cannot be combined with --include")
+    if args.metadata_only and args.index:
+        parser.error("--metadata-only cannot be combined with --index")
+
+    from git.exc import InvalidGitRepositoryError
+
+    from gitscribe.analyzers import build_churn_index
+    from gitscribe.git_reader import GitReader
+    from gitscribe.subprojects import commits_in_scope
+
+    try:
+        reader = GitReader(
+            Path(args.repo_path).resolve(),
+            include=args.include,
+            exclude=args.exclude,
+            max_files_per_commit=args.max_files_per_commit or None,
+            scope=args.path,
+            metadata_only=args.metadata_only,
+        )
+    except InvalidGitRepositoryError:
+        print("fatal: not a Git repository (or .git not found)", file=sys.stderr)
+        return 1
+    if args.index:
+        index = _open_verified_index(reader, Path(args.index))
+        if index is not None:
+            reader.use_index(index)
+
+    commits = reader.get_all_commits(first_parent=not args.full_history)
+    if args.max_commits and len(commits) > args.max_commits:
+        commits = commits[: args.max_commits]
+    reader.prefetch_diff_stats(commits, merge_diffs=not args.full_history)
+    if reader.scope:
+        commits = commits_in_scope(reader, commits)
+    churn_index = build_churn_index(reader, commits)
+
+    if args.between:
+        old, new = (reader.rev_parse(rev) for rev in args.between)
+        for rev, sha in zip(args.between, (old, new)):
+            if sha is None:
+                print(f"fatal: unknown revision: {rev}", file=sys.stderr)
+                return 1
+        if churn_index.position(new) is None:
+            print(f"fatal: {args.between[1]} is not on the analyzed history", file=sys.stderr)
+            return 1
+        # An OLD outside the analyzed commits (older than --max-commits) starts at the beginning
+        start = churn_index.position(old)
+        label = f"{args.between[0]}..{args.between[1]}"
+        result = churn_index.window(
+            0 if start is None else start + 1,
+            churn_index.position(new) + 1,
+            label=label,
+            top_n=args.top,
+        )
+    elif args.since:
+        result = churn_index.since(args.since, label=f"since {args.since:%Y-%m-%d}", top_n=args.top)
+    else:
+        result = churn_index.window(
+            0, len(churn_index), label="all analyzed history", top_n=args.top
+        )
+
+    print(f"# Churn, {result.label} ({result.commits} commits)")
+    print()
+    if reader.metadata_only:
+        print("| Path | Commits |")
+        print("|------|---------|")
+        for fc in result.file_churns:
+            print(f"| `{fc.path}` | {fc.commit_count} |")
+        return 0
+    print("| Path | Commits | Insertions | Deletions | Total changes |")
+    print("|------|---------|------------|-----------|---------------|")
+    for fc in result.file_churns:
+        print(
+            f"| `{fc.path}` | {fc.commit_count} | {fc.total_insertions} "
+            f"| {fc.total_deletions} | {fc.total_changes} |"
+        )
     return 0
 
 
+def serve_main(argv: list[str]) -> int:
+    """gitscribe serve: answer history queries for one or more repositories over HTTP."""
+    parser = argparse.ArgumentParser(
+        prog="gitscribe serve",
+        description="Keep repositories' analyzed history in memory and answer queries over "
+        "HTTP (GET /, /REPO/changelog, /REPO/churn, /REPO/breaking, /REPO/architecture).",
+    )
+    parser.add_argument("repo_paths", nargs="*", default=["."], metavar="REPO")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (0 picks a free one)")
+    parser.add_argument("--socket", default=None, metavar="PATH", help="Listen on a Unix socket")
+    parser.add_argument("--include", action="append", default=None, metavar="PATHSPEC")
+    parser.add_argument("--exclude", action="append", default=None, metavar="PATHSPEC")
+    parser.add_argument("--full-history", action="store_true")
+    parser.add_argument("--max-commits", type=int, default=None, metavar="N")
+    parser.add_argument("--max-files-per-commit", type=int, default=10000, metavar="N")
+    parser.add_argument(
+        "--metadata-only",
+        action="store_true",
+        help="Never read file contents (partial clones): no line counts or sizes",
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="Check a repository's refs for changes at most this often (default: 2)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the file size cache")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not log requests")
+    args = parser.parse_args(argv)
+
+    from git.exc import InvalidGitRepositoryError
+
+    from gitscribe.cache import open_size_cache
+    from gitscribe.git_reader import GitReader
+    from gitscribe.server import RepoState, serve
+
+    repos = {}
+    for repo_path in args.repo_paths:
+        try:
+            reader = GitReader(
+                Path(repo_path).resolve(),
+                include=args.include,
+                exclude=args.exclude,
+                max_files_per_commit=args.max_files_per_commit or None,
+                metadata_only=args.metadata_only,
+            )
+        except InvalidGitRepositoryError:
+            print(f"fatal: not a Git repository: {repo_path}", file=sys.stderr)
+            return 1
+        name = reader.repo_path.name or "repository"
+        if name in repos:
+            parser.error(f"two repositories are named {name!r}")
+        repos[name] = RepoState(
+            reader,
+            name=name,
+            full_history=args.full_history,
+            max_commits=args.max_commits,
+            refresh_interval=args.refresh_interval,
+            size_cache=open_size_cache(None if args.no_cache else reader.cache_dir),
+        )
+    try:
+        serve(
+            repos,
+            host=args.host,
+            port=args.port,
+            socket_path=Path(args.socket) if args.socket else None,
+            quiet=args.quiet,
+        )
+    except FileExistsError as e:
+        print(f"fatal: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+# Subcommands; anything else is a repository path for the default documentation run.
+_COMMANDS = {
+    "index": index_main,
+    "churn": churn_main,
+    "serve": serve_main,
+}
+
+
 if __name__ == "__main__":
     sys.exit(main())
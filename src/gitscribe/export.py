@@ -0,0 +1,452 @@
+"""
+Machine-readable export of analysis results (NDJSON, compact JSON, MessagePack).
+Exports round-trip: read_results() rebuilds the same objects, so Markdown can be
+re-rendered from a saved file without reading the repository again.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any
+
+from gitscribe.analyzers.architecture import (
+    NO_PATH,
+    ArchitectureEvolution,
+    ArchitectureSnapshot,
+    FileEventLog,
+    ModuleNode,
+)
+from gitscribe.analyzers.breaking import BreakingChange
+from gitscribe.analyzers.churn import ChurnReport, FileChurn
+from gitscribe.analyzers.churn_index import ChurnWindow
+from gitscribe.analyzers.coupling import CoupledPair, CouplingReport
+from gitscribe.analyzers.hotspots import Hotspot
+from gitscribe.analyzers.sampling import SamplingInfo
+from gitscribe.analyzers.timeline import TimelineEvent
+from gitscribe.git_reader import CommitInfo, DiffSummary
+
+EXPORT_VERSION = 1
+_EVENT_CHUNK = 10000  # file events per "file_events" record
+FORMATS = ("ndjson", "json", "msgpack")
+
+
+@dataclass
+class AnalysisResults:
+    """Everything the generators need, as produced by one analysis run."""
+
+    repo_name: str
+    commits: list[CommitInfo]
+    tags_by_sha: dict[str, list[str]]
+    breaking: list[BreakingChange] = field(default_factory=list)
+    timeline: list[TimelineEvent] = field(default_factory=list)
+    churn: ChurnReport = field(default_factory=lambda: ChurnReport([], [], []))
+    release_churn: list[ChurnWindow] = field(default_factory=list)  # newest release first
+    coupling: CouplingReport = field(default_factory=lambda: CouplingReport([]))
+    hotspots: list[Hotspot] = field(default_factory=list)
+    evolution: ArchitectureEvolution = field(
+        default_factory=lambda: ArchitectureEvolution([], FileEventLog(), [])
+    )
+    release_stats: dict[str, DiffSummary] = field(default_factory=dict)  # tag commit -> totals
+    full_history: bool = False
+    sampling: SamplingInfo | None = None
+    line_counts: bool = True  # False: metadata-only run, insertions/deletions are all 0
+    outputs: tuple[str, ...] = ("changelog", "architecture", "development", "summary")
+
+
+def format_for_path(path: Path) -> str:
+    """Guess the export format from a file extension (default: ndjson)."""
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        return "json"
+    if suffix in (".msgpack", ".mpk"):
+        return "msgpack"
+    return "ndjson"
+
+
+# --- dataclass <-> plain dict ---------------------------------------------------
+
+
+def _dt(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _parse_dt(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _commit_to_dict(c: CommitInfo) -> dict[str, Any]:
+    return {
+        "sha": c.sha,
+        "short_sha": c.short_sha,
+        "author": c.author,
+        "author_email": c.author_email,
+        "authored_date": _dt(c.authored_date),
+        "committer": c.committer,
+        "committed_date": _dt(c.committed_date),
+        "message": c.message,
+        "message_subject": c.message_subject,
+        "message_body": c.message_body,
+        "parent_shas": c.parent_shas,
+        "tags": c.tags,
+        "branches": c.branches,
+    }
+
+
+def _commit_from_dict(d: dict[str, Any]) -> CommitInfo:
+    return CommitInfo(
+        sha=d["sha"],
+        short_sha=d["short_sha"],
+        author=d["author"],
+        author_email=d["author_email"],
+        authored_date=_parse_dt(d["authored_date"]),
+        committer=d["committer"],
+        committed_date=_parse_dt(d["committed_date"]),
+        message=d["message"],
+        message_subject=d["message_subject"],
+        message_body=d["message_body"],
+        parent_shas=list(d["parent_shas"]),
+        tags=list(d["tags"]),
+        branches=list(d["branches"]),
+    )
+
+
+def _breaking_to_dict(b: BreakingChange) -> dict[str, Any]:
+    return {
+        "commit_sha": b.commit_sha,
+        "short_sha": b.short_sha,
+        "subject": b.subject,
+        "evidence": b.evidence,
+        "message_snippet": b.message_snippet,
+    }
+
+
+def _event_to_dict(e: TimelineEvent) -> dict[str, Any]:
+    return {
+        "commit_sha": e.commit_sha,
+        "short_sha": e.short_sha,
+        "date": _dt(e.date),
+        "kind": e.kind,
+        "subject": e.subject,
+        "body_snippet": e.body_snippet,
+        "tags": e.tags,
+        "change_scope": e.change_scope,
+    }
+
+
+def _event_from_dict(d: dict[str, Any]) -> TimelineEvent:
+    return TimelineEvent(
+        commit_sha=d["commit_sha"],
+        short_sha=d["short_sha"],
+        date=_parse_dt(d["date"]),
+        kind=d["kind"],
+        subject=d["subject"],
+        body_snippet=d["body_snippet"],
+        tags=list(d["tags"]),
+        change_scope=d["change_scope"],
+    )
+
+
+def _file_churn_to_dict(fc: FileChurn) -> dict[str, Any]:
+    return {
+        "path": fc.path,
+        "commit_count": fc.commit_count,
+        "total_insertions": fc.total_insertions,
+        "total_deletions": fc.total_deletions,
+        "total_changes": fc.total_changes,
+    }
+
+
+def _snapshot_to_dict(s: ArchitectureSnapshot) -> dict[str, Any]:
+    return {
+        "rev": s.rev,
+        "rev_display": s.rev_display,
+        "date": s.date,
+        "top_level_dirs": s.top_level_dirs,
+        "modules": {
+            name: {
+                "path": m.path,
+                "file_count": m.file_count,
+                "first_seen_commit": m.first_seen_commit,
+                "last_modified_commit": m.last_modified_commit,
+                "child_paths": m.child_paths,
+                "size": m.size,
+            }
+            for name, m in s.modules.items()
+        },
+        "total_files": s.total_files,
+        "total_size": s.total_size,
+    }
+
+
+def _snapshot_from_dict(d: dict[str, Any]) -> ArchitectureSnapshot:
+    return ArchitectureSnapshot(
+        rev=d["rev"],
+        rev_display=d["rev_display"],
+        date=d["date"],
+        top_level_dirs=list(d["top_level_dirs"]),
+        modules={
+            name: ModuleNode(
+                path=m["path"],
+                file_count=m["file_count"],
+                first_seen_commit=m["first_seen_commit"],
+                last_modified_commit=m["last_modified_commit"],
+                child_paths=list(m["child_paths"]),
+                size=m.get("size"),
+            )
+            for name, m in d["modules"].items()
+        },
+        total_files=d["total_files"],
+        total_size=d.get("total_size"),
+    )
+
+
+def _sampling_to_dict(s: SamplingInfo | None) -> dict[str, Any] | None:
+    if s is None:
+        return None
+    return {
+        "total_commits": s.total_commits,
+        "sampled_commits": s.sampled_commits,
+        "forced_commits": s.forced_commits,
+        "rate": s.rate,
+        "margin_of_error": s.margin_of_error,
+    }
+
+
+def _sampling_from_dict(d: dict[str, Any] | None) -> SamplingInfo | None:
+    return SamplingInfo(**d) if d else None
+
+
+# --- record stream ----------------------------------------------------------------
+# Every format is the same sequence of {"type": ..., ...} records; NDJSON writes one
+# per line, JSON and MessagePack wrap them in {"version": N, "records": [...]}.
+
+
+def iter_records(results: AnalysisResults) -> Iterator[dict[str, Any]]:
+    """Yield the export records for results, header first."""
+    yield {
+        "type": "header",
+        "version": EXPORT_VERSION,
+        "repo_name": results.repo_name,
+        "full_history": results.full_history,
+        "sampling": _sampling_to_dict(results.sampling),
+        "line_counts": results.line_counts,
+        "outputs": list(results.outputs),
+    }
+    for c in results.commits:
+        yield {"type": "commit", **_commit_to_dict(c)}
+    for sha, names in results.tags_by_sha.items():
+        yield {"type": "tag", "sha": sha, "names": names}
+    for sha, totals in results.release_stats.items():
+        yield {
+            "type": "release_stats",
+            "sha": sha,
+            "files": totals.files,
+            "insertions": totals.insertions,
+            "deletions": totals.deletions,
+        }
+    for b in results.breaking:
+        yield {"type": "breaking", **_breaking_to_dict(b)}
+    for e in results.timeline:
+        yield {"type": "timeline_event", **_event_to_dict(e)}
+    for fc in results.churn.file_churns:
+        yield {"type": "file_churn", **_file_churn_to_dict(fc)}
+    for d, n_commits, n_lines in results.churn.dir_churns:
+        yield {"type": "dir_churn", "path": d, "commits": n_commits, "lines": n_lines}
+    yield {"type": "unstable_paths", "paths": results.churn.unstable_paths}
+    for w in results.release_churn:
+        yield {
+            "type": "churn_window",
+            "label": w.label,
+            "start": w.start,
+            "end": w.end,
+            "commits": w.commits,
+            "file_churns": [_file_churn_to_dict(fc) for fc in w.file_churns],
+        }
+    for h in results.hotspots:
+        yield {"type": "hotspot", **asdict(h)}
+    coupling = results.coupling
+    yield {
+        "type": "coupling",
+        "commits_counted": coupling.commits_counted,
+        "commits_skipped": coupling.commits_skipped,
+        "method": coupling.method,
+        "evicted_below": coupling.evicted_below,
+    }
+    for p in coupling.pairs:
+        yield {
+            "type": "coupled_pair",
+            "path": p.path,
+            "other": p.other,
+            "shared": p.shared,
+            "degree": p.degree,
+        }
+    for s in results.evolution.snapshots:
+        yield {"type": "snapshot", **_snapshot_to_dict(s)}
+    for s in results.evolution.time_series:
+        yield {"type": "monthly_snapshot", **_snapshot_to_dict(s)}
+    log = results.evolution.file_events
+    yield {"type": "file_event_table", "commits": log.commit_shas, "paths": log.paths}
+    for start in range(0, len(log), _EVENT_CHUNK):
+        end = start + _EVENT_CHUNK
+        yield {
+            "type": "file_events",
+            "commit": log.commit_idx[start:end].tolist(),
+            "path": log.path_id[start:end].tolist(),
+            "action": log.action[start:end].tobytes().decode("ascii"),
+            "other": [None if o == NO_PATH else o for o in log.other_id[start:end]],
+        }
+    for sha, change_type, desc in results.evolution.high_level_changes:
+        yield {"type": "high_level_change", "sha": sha, "change": change_type, "description": desc}
+
+
+def results_from_records(records: Iterator[dict[str, Any]]) -> AnalysisResults:
+    """Rebuild AnalysisResults from a record stream produced by iter_records."""
+    header: dict[str, Any] | None = None
+    commits: list[CommitInfo] = []
+    tags_by_sha: dict[str, list[str]] = {}
+    release_stats: dict[str, DiffSummary] = {}
+    breaking: list[BreakingChange] = []
+    timeline: list[TimelineEvent] = []
+    file_churns: list[FileChurn] = []
+    dir_churns: list[tuple[str, int, int]] = []
+    unstable: list[str] = []
+    release_churn: list[ChurnWindow] = []
+    coupling = CouplingReport([])
+    hotspots: list[Hotspot] = []
+    snapshots: list[ArchitectureSnapshot] = []
+    time_series: list[ArchitectureSnapshot] = []
+    file_events = FileEventLog()
+    high_level: list[tuple[str, str, str]] = []
+
+    for rec in records:
+        kind = rec.pop("type", None)
+        if kind == "header":
+            if rec.get("version") != EXPORT_VERSION:
+                raise ValueError(f"unsupported export version: {rec.get('version')!r}")
+            header = rec
+        elif kind == "commit":
+            commits.append(_commit_from_dict(rec))
+        elif kind == "tag":
+            tags_by_sha[rec["sha"]] = list(rec["names"])
+        elif kind == "release_stats":
+            release_stats[rec["sha"]] = DiffSummary(
+                rec["files"], rec["insertions"], rec["deletions"]
+            )
+        elif kind == "breaking":
+            breaking.append(BreakingChange(**rec))
+        elif kind == "timeline_event":
+            timeline.append(_event_from_dict(rec))
+        elif kind == "file_churn":
+            file_churns.append(FileChurn(**rec))
+        elif kind == "dir_churn":
+            dir_churns.append((rec["path"], rec["commits"], rec["lines"]))
+        elif kind == "unstable_paths":
+            unstable = list(rec["paths"])
+        elif kind == "churn_window":
+            churns = [FileChurn(**fc) for fc in rec.pop("file_churns")]
+            release_churn.append(ChurnWindow(**rec, file_churns=churns))
+        elif kind == "hotspot":
+            hotspots.append(Hotspot(**rec))
+        elif kind == "coupling":
+            coupling = CouplingReport([], **rec)
+        elif kind == "coupled_pair":
+            coupling.pairs.append(CoupledPair(**rec))
+        elif kind == "snapshot":
+            snapshots.append(_snapshot_from_dict(rec))
+        elif kind == "monthly_snapshot":
+            time_series.append(_snapshot_from_dict(rec))
+        elif kind == "file_event_table":
+            for sha in rec["commits"]:
+                file_events.add_commit(sha)
+            for path in rec["paths"]:
+                file_events.intern_path(path)
+        elif kind == "file_events":
+            file_events.commit_idx.extend(rec["commit"])
+            file_events.path_id.extend(rec["path"])
+            file_events.action.frombytes(rec["action"].encode("ascii"))
+            file_events.other_id.extend(NO_PATH if o is None else o for o in rec["other"])
+        elif kind == "high_level_change":
+            high_level.append((rec["sha"], rec["change"], rec["description"]))
+        # Unknown record types are skipped so newer exports stay readable.
+
+    if header is None:
+        raise ValueError("export has no header record")
+    return AnalysisResults(
+        repo_name=header["repo_name"],
+        commits=commits,
+        tags_by_sha=tags_by_sha,
+        breaking=breaking,
+        timeline=timeline,
+        release_stats=release_stats,
+        churn=ChurnReport(file_churns=file_churns, dir_churns=dir_churns, unstable_paths=unstable),
+        release_churn=release_churn,
+        coupling=coupling,
+        hotspots=hotspots,
+        evolution=ArchitectureEvolution(
+            snapshots=snapshots,
+            file_events=file_events,
+            high_level_changes=high_level,
+            time_series=time_series,
+        ),
+        full_history=bool(header.get("full_history")),
+        sampling=_sampling_from_dict(header.get("sampling")),
+        line_counts=bool(header.get("line_counts", True)),
+        outputs=tuple(header.get("outputs") or AnalysisResults.outputs),
+    )
+
+
+# --- files ------------------------------------------------------------------------
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise RuntimeError(
+            "MessagePack export needs the msgpack package: pip install msgpack"
+        ) from e
+    return msgpack
+
+
+def write_ndjson(results: AnalysisResults, fh: IO[str]) -> None:
+    """Stream results to fh as newline-delimited JSON, one record per line."""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for rec in iter_records(results):
+        fh.write(dumps(rec))
+        fh.write("\n")
+
+
+def write_results(results: AnalysisResults, path: Path, fmt: str | None = None) -> None:
+    """Write results to path as ndjson (default), json or msgpack."""
+    fmt = fmt or format_for_path(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format: {fmt!r}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "ndjson":
+        with path.open("w", encoding="utf-8", newline="\n") as fh:
+            write_ndjson(results, fh)
+        return
+    doc = {"version": EXPORT_VERSION, "records": list(iter_records(results))}
+    if fmt == "json":
+        with path.open("w", encoding="utf-8") as fh:
+            json.dump(doc, fh, ensure_ascii=False, separators=(",", ":"))
+    else:
+        path.write_bytes(_msgpack().packb(doc, use_bin_type=True))
+
+
+def read_results(path: Path) -> AnalysisResults:
+    """Load results written by write_results; the format is detected from the content."""
+    with path.open("rb") as fh:
+        head = fh.read(8)
+    if head.startswith(b'{"type"'):
+        with path.open("r", encoding="utf-8") as fh:
+            return results_from_records(json.loads(line) for line in fh if line.strip())
+    data = path.read_bytes()
+    doc = json.loads(data) if head.startswith(b"{") else _msgpack().unpackb(data, raw=False)
+    if doc.get("version") != EXPORT_VERSION:
+        raise ValueError(f"unsupported export version: {doc.get('version')!r}")
+    return results_from_records(iter(doc["records"]))
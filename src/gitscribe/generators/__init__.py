@@ -1,13 +1,19 @@
 """Markdown document generators from analysis results."""
 
-from gitscribe.generators.changelog import generate_changelog_md
-from gitscribe.generators.architecture import generate_architecture_md
-from gitscribe.generators.development import generate_development_md
-from gitscribe.generators.summary import generate_summary_md
-
-__all__ = [
-    "generate_changelog_md",
-    "generate_architecture_md",
-    "generate_development_md",
-    "generate_summary_md",
-]
+from __future__ import annotations
+
+from gitscribe.lazy import lazy_exports
+
+# Public name -> defining module, imported on first access (see gitscribe.lazy).
+_EXPORTS = {
+    "generate_changelog_md": "gitscribe.generators.changelog",
+    "generate_changelog_pages": "gitscribe.generators.changelog",
+    "generate_architecture_md": "gitscribe.generators.architecture",
+    "generate_development_md": "gitscribe.generators.development",
+    "generate_development_pages": "gitscribe.generators.development",
+    "generate_summary_md": "gitscribe.generators.summary",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
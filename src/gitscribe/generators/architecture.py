@@ -7,8 +7,8 @@ from __future__ import annotations
 from gitscribe.analyzers.architecture import (
     ArchitectureEvolution,
     ArchitectureSnapshot,
-    ModuleNode,
 )
+from gitscribe.generators.formatting import format_size
 
 
 def generate_architecture_md(
@@ -43,13 +43,50 @@ def generate_architecture_md(
     for snap in evolution.snapshots[:-1][-10:]:  # last 10 excluding current
         lines.append(f"### At {snap.rev_display} ({snap.date})")
         lines.append("")
-        lines.append(f"- **Total files:** {snap.total_files}")
+        lines.append(f"- **Total files:** {snap.total_files}{_size_suffix(snap.total_size)}")
         lines.append(f"- **Top-level directories:** {', '.join(snap.top_level_dirs) or '(none)'}")
         lines.append("")
         for name in sorted(snap.modules.keys()):
             node = snap.modules[name]
             if "/" not in name:  # top-level only in summary
-                lines.append(f"- `{name}/` — {node.file_count} files")
+                lines.append(f"- `{name}/` — {node.file_count} files{_size_suffix(node.size)}")
+        lines.append("")
+
+    if len(evolution.snapshots) > 1:
+        lines.append("## File counts at every snapshot")
+        lines.append("")
+        lines.append("| Revision | Date | Total files | Top-level entries |")
+        lines.append("|----------|------|-------------|-------------------|")
+        for snap in reversed(evolution.snapshots):
+            lines.append(
+                f"| {snap.rev_display} | {snap.date} | {snap.total_files} "
+                f"| {len(snap.top_level_dirs)} |"
+            )
+        lines.append("")
+        lines.extend(_size_table(evolution.snapshots))
+
+    if evolution.time_series:
+        lines.append("## Growth by month")
+        lines.append("")
+        lines.append("Structure at the last commit of each month (newest first).")
+        lines.append("")
+        sized = all(snap.total_size is not None for snap in evolution.time_series)
+        if sized:
+            lines.append("| Month | Total files | Total size | Largest top-level modules |")
+            lines.append("|-------|-------------|------------|---------------------------|")
+        else:
+            lines.append("| Month | Total files | Largest top-level modules |")
+            lines.append("|-------|-------------|---------------------------|")
+        for snap in reversed(evolution.time_series):
+            largest = sorted(snap.modules.values(), key=lambda m: (-m.file_count, m.path))[:3]
+            desc = ", ".join(f"`{m.path}` {m.file_count}" for m in largest) or "(none)"
+            if sized:
+                lines.append(
+                    f"| {snap.rev_display} | {snap.total_files} "
+                    f"| {format_size(snap.total_size)} | {desc} |"
+                )
+            else:
+                lines.append(f"| {snap.rev_display} | {snap.total_files} | {desc} |")
         lines.append("")
 
     if evolution.high_level_changes:
@@ -66,18 +103,58 @@ def generate_architecture_md(
     return "\n".join(lines)
 
 
+def _size_suffix(size: int | None) -> str:
+    return f" ({format_size(size)})" if size is not None else ""
+
+
+def _size_table(snapshots: list[ArchitectureSnapshot], max_modules: int = 6) -> list[str]:
+    """Bytes per top-level module at every snapshot (newest first), if measured."""
+    if any(snap.total_size is None for snap in snapshots):
+        return []
+    latest = snapshots[-1]
+    modules = sorted(
+        (m for m in latest.modules.values() if "/" not in m.path),
+        key=lambda m: (-(m.size or 0), m.path),
+    )[:max_modules]
+    names = [m.path for m in modules]
+    out = [
+        "## Size at every snapshot",
+        "",
+        "Bytes of all files, and of the largest top-level modules at HEAD.",
+        "",
+        "| " + " | ".join(["Revision", "Total size", *(f"`{n}/`" for n in names)]) + " |",
+        "|" + "|".join("---" for _ in range(2 + len(names))) + "|",
+    ]
+    for snap in reversed(snapshots):
+        cells = [snap.rev_display, format_size(snap.total_size)]
+        cells += [
+            format_size(snap.modules[n].size or 0) if n in snap.modules else "—" for n in names
+        ]
+        out.append("| " + " | ".join(cells) + " |")
+    out.append("")
+    return out
+
+
 def _format_snapshot(snap: ArchitectureSnapshot) -> list[str]:
     out = [
-        f"- **Total files:** {snap.total_files}",
+        f"- **Total files:** {snap.total_files}{_size_suffix(snap.total_size)}",
         f"- **Top-level directories:** {', '.join(snap.top_level_dirs) or '(none)'}",
         "",
         "### Top-level modules",
         "",
     ]
-    for name in sorted(snap.modules.keys()):
-        node = snap.modules[name]
-        if "/" in name:
-            continue
-        out.append(f"| `{name}/` | {node.file_count} files |")
+    modules = [(name, snap.modules[name]) for name in sorted(snap.modules) if "/" not in name]
+    sized = all(node.size is not None for _, node in modules)
+    if sized:
+        out.append("| Module | Files | Size |")
+        out.append("|--------|-------|------|")
+    else:
+        out.append("| Module | Files |")
+        out.append("|--------|-------|")
+    for name, node in modules:
+        if sized:
+            out.append(f"| `{name}/` | {node.file_count} | {format_size(node.size)} |")
+        else:
+            out.append(f"| `{name}/` | {node.file_count} |")
     out.append("")
     return out
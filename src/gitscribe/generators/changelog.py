@@ -4,11 +4,19 @@ Generate CHANGELOG.md from tags, commit history, and detected breaking changes.
 
 from __future__ import annotations
 
+import dataclasses
+import hashlib
 from collections import defaultdict
-from datetime import datetime
 
-from gitscribe.git_reader import CommitInfo
-from gitscribe.analyzers.breaking import BreakingChange
+from gitscribe.analyzers.breaking import BreakingChange, rules_fingerprint
+from gitscribe.analyzers.releases import release_owners, release_ranges
+from gitscribe.analyzers.sampling import SamplingInfo
+from gitscribe.cache import JsonCache, cache_key
+from gitscribe.generators.formatting import PageNames
+from gitscribe.git_reader import CommitInfo, DiffSummary
+
+# Bump when the Markdown of a release section changes, to invalidate cached sections.
+TEMPLATE_VERSION = 2
 
 
 def generate_changelog_md(
@@ -16,33 +24,141 @@ def generate_changelog_md(
     tags_by_sha: dict[str, list[str]],
     breaking: list[BreakingChange],
     repo_name: str = "Repository",
+    *,
+    full_history: bool = False,
+    sampling: SamplingInfo | None = None,
+    release_stats: dict[str, DiffSummary] | None = None,
+    line_counts: bool = True,
+    section_cache: JsonCache | None = None,
+    cache_context: str = "",
 ) -> str:
     """
     Produce Markdown changelog: sections by version (from tags), commits grouped,
     with a dedicated breaking changes section where applicable.
+    release_stats (tag commit -> totals since the previous tag) adds a size line
+    to each release; without line_counts it only gives the number of files.
+    With full_history, commits is a full-DAG walk and each commit is listed under
+    the oldest release that contains it (by ancestry) rather than by list position.
     """
+    head, unreleased, releases = _changelog_parts(
+        commits,
+        tags_by_sha,
+        breaking,
+        repo_name,
+        full_history=full_history,
+        sampling=sampling,
+        release_stats=release_stats,
+        line_counts=line_counts,
+        section_cache=section_cache,
+        cache_context=cache_context,
+    )
+    lines = head + unreleased
+    for _tag_sha, section in releases:
+        lines.extend(section)
+    return "\n".join(lines)
+
+
+def generate_changelog_pages(
+    commits: list[CommitInfo],
+    tags_by_sha: dict[str, list[str]],
+    breaking: list[BreakingChange],
+    repo_name: str = "Repository",
+    *,
+    split_by: str = "release",
+    directory: str = "changelog",
+    **options,
+) -> dict[str, str]:
+    """
+    The changelog split into pages: CHANGELOG.md keeps the unreleased changes and
+    links to one page per release (split_by "release") or per year of release
+    ("year") under directory/. Returns relative path -> Markdown. options are
+    those of generate_changelog_md; a page is the same sections it would contain.
+    """
+    head, unreleased, releases = _changelog_parts(
+        commits, tags_by_sha, breaking, repo_name, **options
+    )
+    sha_to_commit = {c.sha: c for c in commits}
+    names = PageNames()
+    pages: dict[str, list[tuple[str, list[str]]]] = {}  # page label -> releases, newest first
+    for tag_sha, section in releases:
+        version = (tags_by_sha.get(tag_sha) or [tag_sha[:7]])[0]
+        if split_by == "year":
+            commit = sha_to_commit.get(tag_sha)
+            label = str(commit.authored_date.year) if commit and commit.authored_date else "undated"
+        else:
+            label = version
+        pages.setdefault(label, []).append((version, section))
+
+    index = head + unreleased + ["## Releases", ""]
+    out: dict[str, str] = {}
+    for label, sections in pages.items():
+        path = f"{directory}/{names.file(label)}"
+        if split_by == "year":
+            versions = ", ".join(version for version, _ in sections)
+            index.append(f"- [{label}]({path}) — {versions}")
+        else:
+            index.append(f"- [{label}]({path})")
+        lines = [
+            f"# Changelog — {label}",
+            "",
+            f"Releases of **{repo_name}**. [All releases](../CHANGELOG.md)",
+            "",
+            "---",
+            "",
+        ]
+        for _version, section in sections:
+            lines.extend(section)
+        out[path] = "\n".join(lines)
+    if not pages:
+        index.append("No tagged releases.")
+    index.append("")
+    return {"CHANGELOG.md": "\n".join(index), **out}
+
+
+def _changelog_parts(
+    commits: list[CommitInfo],
+    tags_by_sha: dict[str, list[str]],
+    breaking: list[BreakingChange],
+    repo_name: str = "Repository",
+    *,
+    full_history: bool = False,
+    sampling: SamplingInfo | None = None,
+    release_stats: dict[str, DiffSummary] | None = None,
+    line_counts: bool = True,
+    section_cache: JsonCache | None = None,
+    cache_context: str = "",
+) -> tuple[list[str], list[str], list[tuple[str, list[str]]]]:
+    """The title lines, the unreleased section and (tag commit, section lines) newest first."""
     lines = [
         "# Changelog",
         "",
         f"All notable changes to **{repo_name}** are documented here. "
         "Generated from Git history (tags and commits).",
         "",
+    ]
+    if sampling is not None:
+        lines.extend([f"> {sampling.describe()}", ""])
+    lines += [
         "---",
         "",
     ]
+    head, lines = lines, []
 
     sha_to_commit = {c.sha: c for c in commits}
     tagged_shas = set(tags_by_sha.keys())
     ordered_tag_shas = [c.sha for c in commits if c.sha in tagged_shas]
     breaking_by_sha = {b.commit_sha: b for b in breaking}
+    sections = _release_sections(commits, ordered_tag_shas) if full_history else None
 
     # Unreleased first
-    if not ordered_tag_shas:
+    if sections is not None:
+        unreleased = sections.get(None, [])
+    elif not ordered_tag_shas:
         unreleased = commits
     else:
         latest_tag_sha = ordered_tag_shas[0]
-        idx = next((i for i, c in enumerate(commits) if c.sha == latest_tag_sha), 0)
-        unreleased = commits[:idx] if idx else commits
+        idx = next(i for i, c in enumerate(commits) if c.sha == latest_tag_sha)
+        unreleased = commits[:idx]  # empty when the newest commit is tagged
     unreleased_breaking = [b for b in breaking if b.commit_sha in {c.sha for c in unreleased}]
     lines.append("## [Unreleased]")
     lines.append("")
@@ -64,60 +180,149 @@ def generate_changelog_md(
     lines.append("")
     lines.append("---")
     lines.append("")
+    unreleased_lines, releases = lines, []
 
     # Tagged releases (newest first in document)
-    rev_list = list(reversed(ordered_tag_shas))  # oldest ... newest
-    rev_newest_first = list(reversed(rev_list))
-    if rev_newest_first:
-        for i, tag_sha in enumerate(rev_newest_first):
-            tag_names = tags_by_sha.get(tag_sha, [])
-            version = tag_names[0] if tag_names else tag_sha[:7]
-            next_tag_sha = rev_newest_first[i + 1] if i + 1 < len(rev_newest_first) else None  # older tag
-            commit = sha_to_commit.get(tag_sha)
-            date_str = commit.authored_date.strftime("%Y-%m-%d") if commit and commit.authored_date else ""
-            lines.append(f"## [{version}] — {date_str}")
-            lines.append("")
-            section_commits = _commits_between(commits, tag_sha, next_tag_sha)
-            section_breaking = [breaking_by_sha[c.sha] for c in section_commits if c.sha in breaking_by_sha]
-            if section_breaking:
-                lines.append("### Breaking changes")
-                lines.append("")
-                for b in section_breaking:
-                    lines.append(f"- **{b.subject}** (`{b.short_sha}`)")
-                    if b.message_snippet:
-                        lines.append(f"  - {_escape_md(b.message_snippet[:200])}")
-                    lines.append("")
-                lines.append("### Other changes")
-                lines.append("")
-            for c in section_commits:
-                if c.sha in breaking_by_sha:
-                    continue
-                subj = c.message_subject or "(no subject)"
-                lines.append(f"- {_escape_md(subj)} (`{c.short_sha}`)")
-            lines.append("")
-            lines.append("---")
+    rev_newest_first = ordered_tag_shas
+    position = {c.sha: i for i, c in enumerate(commits)}
+    previous_tag = dict(release_ranges(commits, tags_by_sha))
+    # A section is immutable once both of its tags are known: cache its rendered text
+    # (never for a sample, whose breaking heuristic depends on the drawn commits).
+    cache = section_cache if sampling is None else None
+    lineage = _release_lineage(commits, rev_newest_first, full_history) if cache is not None else {}
+    for tag_sha in rev_newest_first:
+        next_tag_sha = previous_tag[tag_sha]  # the previous release, if any
+        totals = release_stats.get(tag_sha) if release_stats else None
+        key = None
+        if cache is not None and tag_sha in lineage:
+            key = cache_key(
+                "release",
+                TEMPLATE_VERSION,
+                rules_fingerprint(),
+                cache_context,
+                lineage[tag_sha],
+                repr((tags_by_sha.get(tag_sha), tags_by_sha.get(next_tag_sha or ""))),
+                repr(dataclasses.astuple(totals) if line_counts else totals.files)
+                if totals is not None
+                else "-",
+            )
+            cached = cache.get(key)
+            if isinstance(cached, list):
+                releases.append((tag_sha, cached))
+                continue
+        if sections is not None:
+            section_commits = sections.get(tag_sha, [])
+        else:
+            end = position[next_tag_sha] if next_tag_sha else len(commits)
+            section_commits = commits[position[tag_sha] : end]  # the tag commit first
+        section = _render_release(
+            tag_sha,
+            next_tag_sha,
+            sha_to_commit,
+            tags_by_sha,
+            section_commits,
+            breaking_by_sha,
+            totals,
+            line_counts=line_counts,
+        )
+        if key is not None:
+            cache.set(key, section)
+        releases.append((tag_sha, section))
+    if cache is not None:
+        cache.save()
+
+    return head, unreleased_lines, releases
+
+
+def _render_release(
+    tag_sha: str,
+    next_tag_sha: str | None,
+    sha_to_commit: dict[str, CommitInfo],
+    tags_by_sha: dict[str, list[str]],
+    section_commits: list[CommitInfo],
+    breaking_by_sha: dict[str, BreakingChange],
+    totals: DiffSummary | None,
+    *,
+    line_counts: bool = True,
+) -> list[str]:
+    """The Markdown lines of one ## [version] section."""
+    lines: list[str] = []
+    tag_names = tags_by_sha.get(tag_sha, [])
+    version = tag_names[0] if tag_names else tag_sha[:7]
+    commit = sha_to_commit.get(tag_sha)
+    date_str = commit.authored_date.strftime("%Y-%m-%d") if commit and commit.authored_date else ""
+    lines.append(f"## [{version}] — {date_str}")
+    lines.append("")
+    if totals is not None:
+        since = "initial release"
+        if next_tag_sha:
+            older = tags_by_sha.get(next_tag_sha, [])
+            since = f"since {older[0] if older else next_tag_sha[:7]}"
+        lines_changed = f", +{totals.insertions} -{totals.deletions}" if line_counts else ""
+        lines.append(f"*{totals.files} files changed{lines_changed} ({since})*")
+        lines.append("")
+    section_breaking = [breaking_by_sha[c.sha] for c in section_commits if c.sha in breaking_by_sha]
+    if section_breaking:
+        lines.append("### Breaking changes")
+        lines.append("")
+        for b in section_breaking:
+            lines.append(f"- **{b.subject}** (`{b.short_sha}`)")
+            if b.message_snippet:
+                lines.append(f"  - {_escape_md(b.message_snippet[:200])}")
             lines.append("")
+        lines.append("### Other changes")
+        lines.append("")
+    for c in section_commits:
+        if c.sha in breaking_by_sha:
+            continue
+        subj = c.message_subject or "(no subject)"
+        lines.append(f"- {_escape_md(subj)} (`{c.short_sha}`)")
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+    return lines
 
-    return "\n".join(lines)
+
+def _release_lineage(
+    commits: list[CommitInfo], ordered_tag_shas: list[str], full_history: bool
+) -> dict[str, str]:
+    """
+    tag commit -> the commits that fix its section's content, for tags whose section
+    can no longer change. First-parent: the tag and the previous tag (the chain
+    between two commits is fixed). Full history: the tag and every older tag, since
+    older releases claim shared commits first; only when the walk reached the roots.
+    """
+    if not full_history:
+        return {
+            sha: f"{sha}..{ordered_tag_shas[i + 1]}"
+            for i, sha in enumerate(ordered_tag_shas[:-1])
+        }
+    listed = {c.sha for c in commits}
+    if any(p not in listed for c in commits for p in c.parent_shas):
+        return {}  # truncated walk (--max-commits): the oldest sections are partial
+    lineage: dict[str, str] = {}
+    digest = hashlib.sha1(b"full-history")
+    for sha in reversed(ordered_tag_shas):
+        digest.update(sha.encode("ascii"))
+        lineage[sha] = digest.hexdigest()
+    return lineage
 
 
-def _commits_between(
+def _release_sections(
     commits: list[CommitInfo],
-    from_sha_excl: str | None,
-    to_sha_incl: str | None,
-) -> list[CommitInfo]:
-    """Commits strictly after from_sha_excl (newer) until to_sha_incl (older). List is newest-first."""
-    in_range = []
-    started = from_sha_excl is None
+    ordered_tag_shas: list[str],
+) -> dict[str | None, list[CommitInfo]]:
+    """
+    Assign each commit of a DAG walk to the oldest tag that reaches it through
+    parent links, so commits reachable from several tags are listed once. A tagged
+    commit is listed in its own release; commits no tag reaches are keyed by None
+    (unreleased). Lists keep input order.
+    """
+    owner = release_owners(commits, dict.fromkeys(ordered_tag_shas), full_history=True)
+    sections: dict[str | None, list[CommitInfo]] = defaultdict(list)
     for c in commits:
-        if to_sha_incl and c.sha == to_sha_incl:
-            break
-        if from_sha_excl and c.sha == from_sha_excl:
-            started = True
-            continue
-        if started:
-            in_range.append(c)
-    return in_range
+        sections[owner.get(c.sha)].append(c)
+    return dict(sections)
 
 
 def _escape_md(s: str) -> str:
@@ -4,12 +4,18 @@ Generate DEVELOPMENT.md from the development timeline (features, refactors, deci
 
 from __future__ import annotations
 
+from gitscribe.analyzers.sampling import SamplingInfo
 from gitscribe.analyzers.timeline import TimelineEvent
+from gitscribe.generators.formatting import PageNames
+
+_FOOTER = "*Generated from Git commits. Deterministic; no LLM inference.*"
 
 
 def generate_development_md(
     events: list[TimelineEvent],
     repo_name: str = "Repository",
+    *,
+    sampling: SamplingInfo | None = None,
 ) -> str:
     """
     Produce Markdown timeline of major features, refactors, and technical decisions.
@@ -20,50 +26,118 @@ def generate_development_md(
         f"Chronological view of notable development events for **{repo_name}**, "
         "derived from commit history (messages and change scope).",
         "",
+    ]
+    if sampling is not None:
+        lines.extend([f"> {sampling.describe()}", ""])
+    lines += [
         "---",
         "",
     ]
 
-    # Group by kind for a summary, then full timeline
+    lines.extend(_summary_by_type(events))
+    lines.append("## Timeline (newest first)")
+    lines.append("")
+
+    for e in events:
+        lines.extend(_render_event(e))
+
+    lines.append(_FOOTER)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def generate_development_pages(
+    events: list[TimelineEvent],
+    repo_name: str = "Repository",
+    *,
+    sampling: SamplingInfo | None = None,
+    split_by: str = "year",
+    release_of: dict[str, str] | None = None,
+    directory: str = "development",
+) -> dict[str, str]:
+    """
+    The timeline split into pages: DEVELOPMENT.md keeps the summary by type and
+    links to one page per year, or per release (split_by "release", with
+    release_of mapping commit SHA -> release name; unmapped events are
+    "Unreleased"), under directory/. Returns relative path -> Markdown.
+    """
+    pages: dict[str, list[TimelineEvent]] = {}  # label -> events, newest page first
+    for e in events:
+        if split_by == "release":
+            label = (release_of or {}).get(e.commit_sha, "Unreleased")
+        else:
+            label = str(e.date.year) if e.date else "undated"
+        pages.setdefault(label, []).append(e)
+
+    index = [
+        "# Development timeline",
+        "",
+        f"Chronological view of notable development events for **{repo_name}**, "
+        "derived from commit history (messages and change scope).",
+        "",
+    ]
+    if sampling is not None:
+        index.extend([f"> {sampling.describe()}", ""])
+    index += ["---", ""]
+    index.extend(_summary_by_type(events))
+    index.extend([f"## Timeline by {split_by} (newest first)", ""])
+    names = PageNames()
+    out: dict[str, str] = {}
+    for label, page_events in pages.items():
+        path = f"{directory}/{names.file(label)}"
+        index.append(f"- [{label}]({path}) — {len(page_events)} event(s)")
+        lines = [
+            f"# Development timeline — {label}",
+            "",
+            f"Notable development events for **{repo_name}**. [All pages](../DEVELOPMENT.md)",
+            "",
+            "---",
+            "",
+        ]
+        for e in page_events:
+            lines.extend(_render_event(e))
+        lines.append(_FOOTER)
+        lines.append("")
+        out[path] = "\n".join(lines)
+    index.extend(["", "---", "", _FOOTER, ""])
+    return {"DEVELOPMENT.md": "\n".join(index), **out}
+
+
+def _summary_by_type(events: list[TimelineEvent]) -> list[str]:
     by_kind: dict[str, list[TimelineEvent]] = {}
     for e in events:
         by_kind.setdefault(e.kind, []).append(e)
-    lines.append("## Summary by type")
-    lines.append("")
+    lines = ["## Summary by type", ""]
     for kind in ("release", "feature", "refactor", "fix", "doc", "perf", "test", "chore", "other"):
         if kind not in by_kind:
             continue
         count = len(by_kind[kind])
         lines.append(f"- **{kind}**: {count} notable commit(s)")
+    lines.extend(["", "---", ""])
+    return lines
+
+
+def _render_event(e: TimelineEvent) -> list[str]:
+    lines: list[str] = []
+    date_str = e.date.strftime("%Y-%m-%d") if e.date else ""
+    kind_badge = f"**[{e.kind}]**"
+    lines.append(f"### {date_str} — {e.short_sha} {kind_badge}")
     lines.append("")
-    lines.append("---")
-    lines.append("")
-    lines.append("## Timeline (newest first)")
+    lines.append(f"{e.subject}")
     lines.append("")
-
-    for e in events:
-        date_str = e.date.strftime("%Y-%m-%d") if e.date else ""
-        kind_badge = f"**[{e.kind}]**"
-        lines.append(f"### {date_str} — {e.short_sha} {kind_badge}")
+    if e.tags:
+        lines.append(f"Tags: `{'`, `'.join(e.tags)}`")
         lines.append("")
-        lines.append(f"{e.subject}")
+    lines.append(f"Scope: {e.change_scope}")
+    lines.append("")
+    if e.body_snippet:
+        lines.append("<details>")
+        lines.append("<summary>Commit body</summary>")
         lines.append("")
-        if e.tags:
-            lines.append(f"Tags: `{'`, `'.join(e.tags)}`")
-            lines.append("")
-        lines.append(f"Scope: {e.change_scope}")
+        lines.append(e.body_snippet)
         lines.append("")
-        if e.body_snippet:
-            lines.append("<details>")
-            lines.append("<summary>Commit body</summary>")
-            lines.append("")
-            lines.append(e.body_snippet)
-            lines.append("")
-            lines.append("</details>")
-            lines.append("")
-        lines.append("---")
+        lines.append("</details>")
         lines.append("")
-
-    lines.append("*Generated from Git commits. Deterministic; no LLM inference.*")
+    lines.append("---")
     lines.append("")
-    return "\n".join(lines)
+    return lines
@@ -0,0 +1,35 @@
+"""
+Small formatting helpers shared by the Markdown generators.
+"""
+
+from __future__ import annotations
+
+import re
+
+
+def format_size(size: int) -> str:
+    """Bytes as a short human-readable size (812 B, 1.5 KiB, 12.0 MiB)."""
+    if size < 1024:
+        return f"{size} B"
+    value = size / 1024
+    for unit in ("KiB", "MiB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+class PageNames:
+    """Unique, file-system-safe Markdown file names for page labels (tags, years)."""
+
+    def __init__(self) -> None:
+        self._used: set[str] = set()
+
+    def file(self, label: str) -> str:
+        stem = re.sub(r"[^A-Za-z0-9._-]+", "_", label).strip("._") or "page"
+        name, n = stem, 1
+        while name.lower() in self._used:  # case-insensitive file systems
+            n += 1
+            name = f"{stem}-{n}"
+        self._used.add(name.lower())
+        return f"{name}.md"
@@ -5,14 +5,26 @@ Generate optional summary report: high-churn files and unstable components.
 from __future__ import annotations
 
 from gitscribe.analyzers.churn import ChurnReport
+from gitscribe.analyzers.churn_index import ChurnWindow
+from gitscribe.analyzers.coupling import CouplingReport
+from gitscribe.analyzers.hotspots import RECENCY_HALF_LIFE_DAYS, Hotspot
+from gitscribe.analyzers.sampling import SamplingInfo
+from gitscribe.generators.formatting import format_size
 
 
 def generate_summary_md(
     churn: ChurnReport,
     repo_name: str = "Repository",
+    *,
+    sampling: SamplingInfo | None = None,
+    coupling: CouplingReport | None = None,
+    hotspots: list[Hotspot] | None = None,
+    release_churn: list[ChurnWindow] | None = None,
+    line_counts: bool = True,
 ) -> str:
     """
     Produce Markdown summary of high-churn files and directory activity.
+    Without line_counts (a metadata-only run) files are ranked by commits alone.
     """
     lines = [
         "# GitScribe summary report",
@@ -20,37 +32,162 @@ def generate_summary_md(
         f"High-churn and frequently changed areas in **{repo_name}**, "
         "computed from commit history (deterministic).",
         "",
+    ]
+    if sampling is not None:
+        lines.extend([f"> {sampling.describe()}", ""])
+    lines += [
         "---",
         "",
         "## High-churn files",
         "",
-        "Files with the most commits and line changes over the project history.",
-        "",
-        "| Path | Commits | Insertions | Deletions | Total changes |",
-        "|------|---------|------------|-----------|---------------|",
     ]
-    for fc in churn.file_churns[:40]:
-        lines.append(f"| `{fc.path}` | {fc.commit_count} | {fc.total_insertions} | {fc.total_deletions} | {fc.total_changes} |")
-    lines.append("")
-    lines.append("## Directory activity")
-    lines.append("")
-    lines.append("| Directory | Commits touching | Total line changes |")
-    lines.append("|-----------|-------------------|---------------------|")
-    for d, n_commits, n_lines in churn.dir_churns[:20]:
-        lines.append(f"| `{d}/` | {n_commits} | {n_lines} |")
-    lines.append("")
+    if not line_counts:
+        lines.append(
+            "Files with the most commits over the project history (line counts unavailable)."
+        )
+        lines.append("")
+        lines.extend(_commit_count_table(churn.file_churns[:40]))
+        lines.append("## Directory activity")
+        lines.append("")
+        lines.append("| Directory | Commits touching |")
+        lines.append("|-----------|-------------------|")
+        for d, n_commits, _lines in churn.dir_churns[:20]:
+            lines.append(f"| `{d}/` | {n_commits} |")
+        lines.append("")
+    else:
+        lines.append("Files with the most commits and line changes over the project history.")
+        lines.append("")
+        lines.append("| Path | Commits | Insertions | Deletions | Total changes |")
+        lines.append("|------|---------|------------|-----------|---------------|")
+        for fc in churn.file_churns[:40]:
+            lines.append(_line_churn_row(fc))
+        lines.append("")
+        lines.append("## Directory activity")
+        lines.append("")
+        lines.append("| Directory | Commits touching | Total line changes |")
+        lines.append("|-----------|-------------------|---------------------|")
+        for d, n_commits, n_lines in churn.dir_churns[:20]:
+            lines.append(f"| `{d}/` | {n_commits} | {n_lines} |")
+        lines.append("")
+
+    if release_churn:
+        lines.extend(_release_churn_section(release_churn, line_counts=line_counts))
+
+    if hotspots:
+        lines.extend(_hotspot_section(hotspots))
 
-    if churn.unstable_paths:
+    if churn.unstable_paths and line_counts:
         lines.append("## Unstable components")
         lines.append("")
-        lines.append("Files changed often with relatively small diffs (possible refactors or volatile logic):")
+        lines.append(
+            "Files changed often with relatively small diffs "
+            "(possible refactors or volatile logic):"
+        )
         lines.append("")
         for p in churn.unstable_paths[:25]:
             lines.append(f"- `{p}`")
         lines.append("")
 
+    if coupling is not None and coupling.commits_counted:
+        lines.extend(_coupling_section(coupling))
+
     lines.append("---")
     lines.append("")
-    lines.append("*Generated from Git diff stats. Offline and deterministic.*")
+    if line_counts:
+        lines.append("*Generated from Git diff stats. Offline and deterministic.*")
+    else:
+        lines.append(
+            "*Generated from Git tree diffs (no file contents). Offline and deterministic.*"
+        )
     lines.append("")
     return "\n".join(lines)
+
+
+def _line_churn_row(fc) -> str:
+    return (
+        f"| `{fc.path}` | {fc.commit_count} | {fc.total_insertions} "
+        f"| {fc.total_deletions} | {fc.total_changes} |"
+    )
+
+
+def _commit_count_table(file_churns) -> list[str]:
+    lines = ["| Path | Commits |", "|------|---------|"]
+    lines.extend(f"| `{fc.path}` | {fc.commit_count} |" for fc in file_churns)
+    lines.append("")
+    return lines
+
+
+def _release_churn_section(windows: list[ChurnWindow], *, line_counts: bool = True) -> list[str]:
+    lines = [
+        "## Churn by release",
+        "",
+        "The most changed files in each recent release, "
+        "counting the commits since the previous tag.",
+        "",
+    ]
+    for w in windows:
+        since = f"since {w.start}" if w.start else "from the start of history"
+        lines.append(f"### {w.label} ({since}, {w.commits} commits)")
+        lines.append("")
+        if not w.file_churns:
+            lines.extend(["No file changes.", ""])
+            continue
+        if not line_counts:
+            lines.extend(_commit_count_table(w.file_churns))
+            continue
+        lines.append("| Path | Commits | Insertions | Deletions | Total changes |")
+        lines.append("|------|---------|------------|-----------|---------------|")
+        for fc in w.file_churns:
+            lines.append(_line_churn_row(fc))
+        lines.append("")
+    return lines
+
+
+def _hotspot_section(hotspots: list[Hotspot]) -> list[str]:
+    lines = [
+        "## Hotspots",
+        "",
+        "Large files that change often: commits x size at HEAD, halved for every "
+        f"{RECENCY_HALF_LIFE_DAYS} days since the last change. "
+        "Age counts from the first analyzed change.",
+        "",
+        "| Path | Commits | Size | Last changed | Age (days) | Score |",
+        "|------|---------|------|--------------|------------|-------|",
+    ]
+    for h in hotspots:
+        lines.append(
+            f"| `{h.path}` | {h.commits} | {format_size(h.size)} "
+            f"| {h.last_changed} | {h.age_days} | {h.score:g} |"
+        )
+    lines.append("")
+    return lines
+
+
+def _coupling_section(coupling: CouplingReport) -> list[str]:
+    lines = [
+        "## Change coupling",
+        "",
+        "File pairs that keep changing in the same commits (possible hidden dependencies). "
+        "Degree is shared commits over the files' average commit count.",
+        "",
+    ]
+    notes = []
+    if coupling.commits_skipped:
+        notes.append(f"{coupling.commits_skipped} commit(s) touching many files were not counted.")
+    if coupling.method == "minhash":
+        notes.append("Shared commit counts are MinHash estimates.")
+    if coupling.evicted_below:
+        notes.append(
+            f"Pairs sharing {coupling.evicted_below} commits or fewer were dropped to bound memory."
+        )
+    if notes:
+        lines.extend([f"> {' '.join(notes)}", ""])
+    if not coupling.pairs:
+        lines.extend(["No file pairs changed together often enough to report.", ""])
+        return lines
+    lines.append("| File | Changes with | Shared commits | Degree |")
+    lines.append("|------|--------------|----------------|--------|")
+    for p in coupling.pairs:
+        lines.append(f"| `{p.path}` | `{p.other}` | {p.shared} | {p.degree:.0%} |")
+    lines.append("")
+    return lines
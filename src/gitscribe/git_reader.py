@@ -5,14 +5,21 @@ Uses GitPython in local-only mode; no network or external APIs.
 
 from __future__ import annotations
 
+import queue
+import subprocess
+import threading
+import time
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterator
+from typing import TypeVar
 
 from git import Repo
 from git.exc import GitCommandError, InvalidGitRepositoryError
 
+from gitscribe.git_session import GitSession
+
 
 @dataclass
 class CommitInfo:
@@ -45,6 +52,25 @@ class TagInfo:
     tag_message: str | None
 
 
+@dataclass
+class RefInfo:
+    """A ref as listed by git for-each-ref, peeled to the commit it names."""
+
+    name: str  # full ref name, e.g. "refs/tags/v1.0"
+    sha: str | None  # commit SHA (peeled for annotated tags); None if not a commit
+    is_annotated: bool
+    tagger: str | None
+    tag_date: datetime | None
+    tag_message: str | None
+
+    @property
+    def short_name(self) -> str:
+        for prefix in ("refs/heads/", "refs/tags/", "refs/remotes/"):
+            if self.name.startswith(prefix):
+                return self.name[len(prefix):]
+        return self.name
+
+
 @dataclass
 class DiffStat:
     """Per-file change stats for a commit."""
@@ -56,6 +82,15 @@ class DiffStat:
     renamed_from: str | None = None
 
 
+@dataclass
+class DiffSummary:
+    """Aggregate change counts, e.g. for the files of a commit beyond the per-commit cap."""
+
+    files: int = 0
+    insertions: int = 0
+    deletions: int = 0
+
+
 @dataclass
 class FileHistoryEntry:
     """One point in a file's history (commit + path at that time)."""
@@ -66,6 +101,105 @@ class FileHistoryEntry:
     previous_path: str | None = None
 
 
+@dataclass
+class PipelineStats:
+    """Throughput of one producer/consumer ingestion stage."""
+
+    stage: str
+    records: int = 0  # commits parsed by the consumer
+    seconds: float = 0.0
+    producer_stalls: int = 0  # queue full: Python parsing was the bottleneck
+    consumer_stalls: int = 0  # queue empty: git was the bottleneck
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+    def merge(self, other: PipelineStats) -> PipelineStats:
+        """Add another run of the same stage (e.g. a shard's) in place; returns self."""
+        self.records += other.records
+        self.seconds += other.seconds
+        self.producer_stalls += other.producer_stalls
+        self.consumer_stalls += other.consumer_stalls
+        return self
+
+    def describe(self) -> str:
+        return (
+            f"{self.stage}: {self.records} commits in {self.seconds:.2f}s "
+            f"({self.records_per_second:,.0f}/s; waits: git {self.consumer_stalls}, "
+            f"python {self.producer_stalls})"
+        )
+
+
+_T = TypeVar("_T")
+_DONE = object()
+
+
+def _pipelined(
+    source: Iterator[_T],
+    stats: PipelineStats,
+    *,
+    batch: int = 512,
+    maxsize: int = 64,
+) -> Iterator[_T]:
+    """
+    Drain source on a producer thread into a bounded queue of batches and yield its
+    items on the caller's thread. The queue bound is the backpressure: at most
+    batch * maxsize raw records are buffered, while git never waits on a full pipe
+    as long as the consumer keeps up.
+    """
+    q: queue.Queue = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def _put(item: object) -> bool:
+        if q.full():
+            stats.producer_stalls += 1
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            buf: list[_T] = []
+            for item in source:
+                buf.append(item)
+                if len(buf) >= batch:
+                    if not _put(buf):
+                        return
+                    buf = []
+            if buf and not _put(buf):
+                return
+            _put(_DONE)
+        except BaseException as e:  # handed to the consumer and re-raised there
+            _put(e)
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    start = time.perf_counter()
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            if q.empty():
+                stats.consumer_stalls += 1
+            item = q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        stop.set()
+        producer.join()
+        stats.seconds += time.perf_counter() - start
+
+
 def _safe_decode(b: bytes | str) -> str:
     if isinstance(b, str):
         return b
@@ -75,219 +209,1028 @@ def _safe_decode(b: bytes | str) -> str:
         return str(b)
 
 
+_TIMEZONES: dict[str, timezone] = {}  # "+hhmm" -> tzinfo; a history has few offsets
+
+
+def _parse_raw_date(raw: str) -> datetime | None:
+    """Parse git's raw date format ("<epoch> <+hhmm>") into an aware datetime."""
+    try:
+        epoch, offset = raw.split()
+        tz = _TIMEZONES.get(offset)
+        if tz is None:
+            sign = -1 if offset.startswith("-") else 1
+            delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+            tz = _TIMEZONES[offset] = timezone(sign * delta)
+        return datetime.fromtimestamp(int(epoch), tz)
+    except (ValueError, IndexError):
+        return None
+
+
+# One for-each-ref record: NUL-separated fields, terminated by a NUL.
+# The tag message is only requested for tag objects so lightweight tags and
+# branches do not pay for reading commit messages.
+_REF_FORMAT = "%00".join(
+    [
+        "%(refname)",
+        "%(objectname)",
+        "%(objecttype)",
+        "%(*objectname)",
+        "%(*objecttype)",
+        "%(taggername)",
+        "%(taggerdate:raw)",
+        "%(if:equals=tag)%(objecttype)%(then)%(contents)%(end)",
+    ]
+) + "%00"
+_REF_FIELDS = 8
+
+# The empty tree; git resolves it without it being stored in the repository.
+_EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+# One git log record per commit (records are NUL-separated with -z); fields are
+# separated by US (0x1f) and the raw message comes last, so it may contain anything.
+# %e is the commit's encoding header (empty for UTF-8).
+_LOG_FORMAT = "%x1f".join(["%H", "%P", "%an", "%ae", "%ad", "%cn", "%cd", "%e", "%B"])
+_LOG_FIELDS = 9
+
+# diff-tree arguments for bulk numstat: commits (optionally followed by the parent
+# to diff against) are read from stdin; -m keeps merges fed without an explicit
+# parent, and only their first (first-parent) block is used.
+_NUMSTAT_ARGS = ["diff-tree", "--stdin", "-r", "-m", "--root", "-M", "--numstat", "-z"]
+# Same input, but file-level A/M/D/R events (--raw) instead of line counts.
+_RAW_ARGS = ["diff-tree", "--stdin", "-r", "-m", "--root", "-M", "--raw", "-z"]
+# Rename detection of metadata-only readers: exact renames are found by comparing
+# blob SHAs, but scoring similar files would read (in a partial clone: fetch) blobs.
+_EXACT_RENAMES = "-M100%"
+
+
+def _raw_entry(token: bytes, tokens: Iterator[bytes]) -> tuple[str, str, str | None]:
+    """
+    (status letter, path, previous path or None) of one --raw -z entry, token being
+    its ":<old mode> <new mode> <old sha> <new sha> <status>" header; the paths are
+    read from tokens.
+    """
+    action = token.rsplit(b" ", 1)[-1][:1].decode("ascii", errors="replace")
+    path = _safe_decode(next(tokens, b""))
+    if action in ("R", "C"):
+        return action, _safe_decode(next(tokens, b"")), path
+    return action, path, None
+
+
+def _numstat_entry(token: bytes, tokens: Iterator[bytes]) -> DiffStat:
+    """One --numstat -z entry as a DiffStat; a rename's paths are read from tokens."""
+    add_s, del_s, path_b = token.split(b"\t", 2)
+    renamed_from: str | None = None
+    if not path_b:
+        # Rename/copy: "<add>\t<del>\t" NUL <old path> NUL <new path>
+        renamed_from = _safe_decode(next(tokens, b""))
+        path_b = next(tokens, b"")
+    return DiffStat(
+        path=_safe_decode(path_b),
+        insertions=int(add_s) if add_s != b"-" else 0,
+        deletions=int(del_s) if del_s != b"-" else 0,
+        is_binary=add_s == b"-" and del_s == b"-",
+        renamed_from=renamed_from,
+    )
+
+
+def _raw_stat(token: bytes, tokens: Iterator[bytes]) -> DiffStat:
+    """One --raw -z entry as a DiffStat without line counts (metadata-only)."""
+    action, path, previous = _raw_entry(token, tokens)
+    return DiffStat(path, 0, 0, is_binary=False, renamed_from=previous if action == "R" else None)
+
+
+def _decode_text(b: bytes, encoding: str) -> str:
+    """
+    Decode a commit text field. git log re-encodes to UTF-8, except for commits whose
+    encoding header it cannot convert: those come verbatim, so try that encoding next.
+    """
+    try:
+        return b.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    if encoding:
+        try:
+            return b.decode(encoding, errors="replace")
+        except LookupError:
+            pass
+    return b.decode("utf-8", errors="replace")
+
+
+class _decoded_once:
+    """
+    Like functools.cached_property without its lock (3.8-3.11): the first access
+    computes the value and stores it on the instance, which shadows this descriptor.
+    """
+
+    def __init__(self, fn) -> None:
+        self.fn = fn
+        self.name = fn.__name__
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name] = self.fn(obj)
+        return value
+
+
+class LazyCommit(CommitInfo):
+    """
+    A CommitInfo over the raw fields of one git log record. The SHA and parents are
+    decoded up front; names, emails, dates and message parts on first access (then
+    cached), so commits that are only listed by subject never decode the rest.
+    """
+
+    def __init__(self, fields: list[bytes]) -> None:
+        # CommitInfo.__init__ is not called: the properties below fill in the rest.
+        self._raw = fields
+        self.sha = fields[0].decode("ascii").strip()
+        self.short_sha = self.sha[:7]
+        self.parent_shas = fields[1].decode("ascii").split()
+        self.tags = []
+        self.branches = []
+
+    def _text(self, b: bytes) -> str:
+        return _decode_text(b, self._raw[7].decode("ascii", errors="replace").strip())
+
+    @_decoded_once
+    def author(self) -> str:
+        return self._text(self._raw[2])
+
+    @_decoded_once
+    def author_email(self) -> str:
+        return self._text(self._raw[3])
+
+    @_decoded_once
+    def authored_date(self) -> datetime | None:
+        return _parse_raw_date(self._raw[4].decode("ascii"))
+
+    @_decoded_once
+    def committer(self) -> str:
+        return self._text(self._raw[5])
+
+    @_decoded_once
+    def committed_date(self) -> datetime | None:
+        return _parse_raw_date(self._raw[6].decode("ascii"))
+
+    @_decoded_once
+    def message(self) -> str:
+        return self._text(self._raw[8])
+
+    @_decoded_once
+    def message_subject(self) -> str:
+        return self._text(self._raw[8].partition(b"\n")[0]).strip()
+
+    @_decoded_once
+    def message_body(self) -> str:
+        return self._text(self._raw[8].partition(b"\n")[2]).strip()
+
+
+def _parse_log_record(record: bytes) -> CommitInfo | None:
+    """Wrap one _LOG_FORMAT record in a LazyCommit."""
+    fields = record.split(b"\x1f", _LOG_FIELDS - 1)
+    if len(fields) < _LOG_FIELDS:
+        return None
+    return LazyCommit(fields)
+
+
+def normalize_scope(scope: str | None) -> str:
+    """'./sub/dir/' -> 'sub/dir'; '' for the whole repository."""
+    if not scope:
+        return ""
+    p = scope.replace("\\", "/").strip()
+    while p.startswith("./"):
+        p = p[2:]
+    return p.strip("/")
+
+
+def in_scope(path: str | None, scope: str) -> bool:
+    """Whether a repository path lies in the scope directory (always true without one)."""
+    if not scope:
+        return True
+    return path is not None and (path == scope or path.startswith(scope + "/"))
+
+
 class GitReader:
     """Reads repository history and structure from .git only."""
 
-    def __init__(self, repo_path: str | Path) -> None:
+    def __init__(
+        self,
+        repo_path: str | Path,
+        *,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_files_per_commit: int | None = None,
+        scope: str | None = None,
+        metadata_only: bool = False,
+    ) -> None:
+        """
+        include/exclude are git pathspecs passed through to the diff commands, so
+        excluded paths are never diffed. Files of a commit beyond max_files_per_commit
+        are only counted (see get_diff_overflow), not kept as DiffStat entries.
+        scope restricts every diff, file event and tree listing to one subdirectory.
+        metadata_only never reads file contents, for partial clones without blobs:
+        diffs compare trees only (DiffStat line counts are 0, only exact renames are
+        found) and blob sizes are not looked up.
+        """
         path = Path(repo_path).resolve()
         if not (path / ".git").exists():
             raise InvalidGitRepositoryError(str(path))
-        self.repo = Repo(path, odbt=type(Repo(path).odb))  # ensure no remote ops
+        self.repo = Repo(path)  # local object database only; no remote ops
         self.repo_path = path
+        self.scope = normalize_scope(scope)
+        self.pathspecs = list(include or []) + [
+            p if p.startswith(":") else f":(exclude){p}" for p in exclude or []
+        ]
+        if self.scope:
+            self.pathspecs.append(self.scope)
+        self._tree_paths: dict[str, list[str]] = {}
+        self._tree_blobs: dict[str, dict[str, str]] = {}
+        self._blob_sizes: dict[str, int] = {}
+        self._tree_diffs: dict[tuple[str | None, str], list[DiffStat]] = {}
+        self.max_files_per_commit = max_files_per_commit
+        self.metadata_only = metadata_only
+        self._refs: list[RefInfo] | None = None
+        self._diff_stats: dict[str, list[DiffStat]] = {}
+        self._diff_overflow: dict[str, DiffSummary] = {}
+        self.pipeline_stats: dict[str, PipelineStats] = {}
+        self._index = None  # HistoryIndex attached with use_index()
+        self._index_stats = False
+        git = getattr(self.repo.git, "GIT_PYTHON_GIT_EXECUTABLE", None) or "git"
+        self._session = GitSession(str(path), git)  # long-lived cat-file / diff-tree
+        self._git_calls = 0  # processes started outside the session
 
-    def get_commit_count(self) -> int:
+    def close(self) -> None:
+        """End the session's git processes (the next request starts them again)."""
+        self._session.close()
+
+    def __enter__(self) -> GitReader:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def git_processes(self) -> int:
+        """How many git processes this reader has started so far."""
+        return self._git_calls + self._session.started
+
+    def run_git(self, command: str, *args: str) -> str:
+        """Output of a one-off git command (for calls made a fixed number of times per run)."""
+        self._git_calls += 1
+        return getattr(self.repo.git, command.replace("-", "_"))(*args)
+
+    def use_index(self, index) -> None:
+        """
+        Serve commits, and file events, up to index.tip from a HistoryIndex (see
+        gitscribe.history_index); Git is only asked about newer commits. The stored diff
+        stats are used only if the index was built with this reader's pathspecs and cap.
+        """
+        from gitscribe.history_index import index_options
+
+        self._index = index
+        options = index_options(self.pathspecs, self.max_files_per_commit)
+        self._index_stats = index.options == options
+
+    @property
+    def has_index(self) -> bool:
+        return self._index is not None
+
+    @property
+    def is_partial_clone(self) -> bool:
+        """True for a partial clone (git clone --filter=...), which may lack blobs."""
         try:
-            return self.repo.git.rev_list("--count", "HEAD")
+            return bool(
+                self.run_git(
+                    "config",
+                    "--get-regexp", r"^(extensions\.partialclone|remote\..*\.promisor)$"
+                ).strip()
+            )
         except GitCommandError:
+            return False
+
+    def _diff_args(self, args: list[str]) -> list[str]:
+        """args with exact-only rename detection if the reader is metadata-only."""
+        return [_EXACT_RENAMES if a == "-M" else a for a in args] if self.metadata_only else args
+
+    def rev_parse(self, rev: str = "HEAD") -> str | None:
+        """Full SHA of the commit rev names, or None (looked up in the session)."""
+        return self._resolve([rev], "commit")[0]
+
+    def _resolve(self, revs: list[str], kind: str) -> list[str | None]:
+        """SHA of the commit or tree (kind) each revision names, in one session batch."""
+        try:
+            found = self._session.object_info([f"{rev}^{{{kind}}}" for rev in revs])
+        except GitCommandError:
+            return [None] * len(revs)
+        return [info[0] if info is not None else None for info in found]
+
+    def is_ancestor(self, ancestor: str, rev: str = "HEAD") -> bool:
+        try:
+            self.run_git("merge-base", "--is-ancestor", ancestor, rev)
+            return True
+        except GitCommandError:
+            return False
+
+    def get_commit_count(self) -> int:
+        try:
+            return int(self.run_git("rev-list", "--count", "HEAD") or 0)
+        except (GitCommandError, ValueError):
             return 0
 
+    def _stage(self, name: str) -> PipelineStats:
+        return self.pipeline_stats.setdefault(name, PipelineStats(name))
+
     def iter_commits(
         self,
-        rev: str = "HEAD",
+        rev: str | list[str] = "HEAD",
         max_count: int | None = None,
         skip: int = 0,
         first_parent: bool = True,
     ) -> Iterator[CommitInfo]:
-        """Yield commits in reverse chronological order (newest first)."""
+        """
+        Yield commits in reverse chronological order (newest first); rev may be a
+        list of revisions, walked together.
+        git log runs on a producer thread; records are parsed here as they arrive.
+        """
+        args = ["log", "-z", "--date=raw", f"--format={_LOG_FORMAT}"]
+        if max_count is not None:
+            args.append(f"--max-count={max_count}")
+        if skip:
+            args.append(f"--skip={skip}")
+        if first_parent:
+            args.append("--first-parent")
+        args += [rev] if isinstance(rev, str) else list(rev)
+        args.append("--")
+        stats = self._stage("log")
         try:
-            kwargs: dict = {"rev": rev}
-            if max_count is not None:
-                kwargs["max_count"] = max_count
-            if skip:
-                kwargs["skip"] = skip
-            if first_parent:
-                kwargs["first_parent"] = True
-            for c in self.repo.iter_commits(**kwargs):
-                subject, _, body = (c.message or "").partition("\n")
-                subject = subject.strip()
-                body = body.strip()
-                yield CommitInfo(
-                    sha=c.hexsha,
-                    short_sha=c.hexsha[:7],
-                    author=_safe_decode(getattr(c.author, "name", "") or ""),
-                    author_email=_safe_decode(getattr(c.author, "email", "") or ""),
-                    authored_date=c.authored_datetime,
-                    committer=_safe_decode(getattr(c.committer, "name", "") or ""),
-                    committed_date=c.committed_datetime,
-                    message=c.message or "",
-                    message_subject=subject,
-                    message_body=body,
-                    parent_shas=[p.hexsha for p in c.parents],
-                    tags=[],
-                    branches=[],
-                )
+            for record in _pipelined(self._stream_git(args), stats):
+                commit = _parse_log_record(record)
+                if commit is not None:
+                    stats.records += 1
+                    yield commit
         except (GitCommandError, ValueError, TypeError):
             return
 
     def get_all_commits(self, first_parent: bool = True) -> list[CommitInfo]:
         """Return all commits on the default branch (newest first)."""
-        commits = list(self.iter_commits(first_parent=first_parent))
+        if self._index is not None:
+            commits = self._commits_from_index(first_parent)
+        else:
+            commits = list(self.iter_commits(first_parent=first_parent))
         self._attach_refs(commits)
         return commits
 
+    def get_branch_histories(
+        self, branches: list[str], first_parent: bool = True
+    ) -> tuple[dict[str, list[CommitInfo]], dict[str, CommitInfo]]:
+        """
+        The commits of each branch (newest first, as get_all_commits) from a single
+        git log over all the tips, and every commit that walk read, by SHA; a commit
+        several branches share is one CommitInfo. Raises ValueError for a name that
+        is not a commit.
+        """
+        tips: dict[str, str] = {}
+        for name in branches:
+            sha = self.rev_parse(name)
+            if sha is None:
+                raise ValueError(f"not a branch or commit: {name}")
+            tips[name] = sha
+        walk = list(self.iter_commits(list(dict.fromkeys(tips.values())), first_parent=False))
+        self._attach_refs(walk)
+        by_sha = {c.sha: c for c in walk}
+        histories: dict[str, list[CommitInfo]] = {}
+        for name, tip in tips.items():
+            if first_parent:
+                chain: list[CommitInfo] = []
+                commit = by_sha.get(tip)
+                while commit is not None:
+                    chain.append(commit)
+                    commit = by_sha.get(commit.parent_shas[0]) if commit.parent_shas else None
+                histories[name] = chain
+            else:
+                reachable: set[str] = set()
+                stack = [tip]
+                while stack:
+                    sha = stack.pop()
+                    if sha in reachable or sha not in by_sha:
+                        continue
+                    reachable.add(sha)
+                    stack.extend(by_sha[sha].parent_shas)
+                histories[name] = [c for c in walk if c.sha in reachable]
+        return histories, by_sha
+
+    def _commits_from_index(self, first_parent: bool) -> list[CommitInfo]:
+        """get_all_commits with an index: only commits after its tip come from Git."""
+        index = self._index
+        head = self.rev_parse("HEAD")
+        if head is None:
+            return []
+        new: dict[str, CommitInfo] = {}
+        if head != index.tip:
+            new = {c.sha: c for c in self.iter_commits(f"{index.tip}..{head}", first_parent=False)}
+
+        def lookup(sha: str) -> CommitInfo | None:
+            if sha in new:
+                return new[sha]
+            i = index.position(sha)
+            return index.commit(i) if i is not None else None
+
+        if first_parent:
+            chain: list[CommitInfo] = []
+            commit = lookup(head)
+            while commit is not None:
+                chain.append(commit)
+                commit = lookup(commit.parent_shas[0]) if commit.parent_shas else None
+            return chain
+        if not new:
+            return index.commits()
+        # Merged side branches can interleave by date: take the order from rev-list.
+        try:
+            order = self.run_git("rev-list", head).split()
+        except GitCommandError:
+            return []
+        return [c for c in map(lookup, order) if c is not None]
+
+    def get_refs(self) -> list[RefInfo]:
+        """
+        Return all refs with their peeled commit SHA and tag metadata.
+        Read with a single git for-each-ref call (tags of tags are peeled with one
+        batch to the session's cat-file) and cached for the reader's lifetime.
+        """
+        if self._refs is not None:
+            return self._refs
+        refs: list[RefInfo] = []
+        try:
+            output = self.run_git("for-each-ref", f"--format={_REF_FORMAT}")
+        except GitCommandError:
+            output = ""
+        fields = output.split("\0")
+        nested: list[int] = []  # tags of tags, which older git peels one level only
+        for i in range(0, len(fields) - _REF_FIELDS + 1, _REF_FIELDS):
+            name, obj_sha, obj_type, peeled_sha, peeled_type, tagger, date, message = (
+                fields[i : i + _REF_FIELDS]
+            )
+            name = name.lstrip("\n")
+            is_annotated = obj_type == "tag"
+            if obj_type == "commit":
+                sha = obj_sha
+            elif is_annotated and peeled_type == "commit":
+                sha = peeled_sha
+            else:
+                sha = None  # tag of a tree/blob, or a tag of a tag (peeled below)
+                if is_annotated and peeled_type == "tag":
+                    nested.append(len(refs))
+            refs.append(
+                RefInfo(
+                    name=name,
+                    sha=sha,
+                    is_annotated=is_annotated,
+                    tagger=(tagger or None) if is_annotated else None,
+                    tag_date=_parse_raw_date(date) if is_annotated else None,
+                    tag_message=(message.rstrip("\n") or None) if is_annotated else None,
+                )
+            )
+        if nested:
+            try:
+                found = self._session.object_info([f"{refs[i].name}^{{commit}}" for i in nested])
+            except GitCommandError:
+                found = [None] * len(nested)
+            for i, info in zip(nested, found):
+                refs[i].sha = info[0] if info else None
+        self._refs = refs
+        return refs
+
+    def refs_fingerprint(self) -> str:
+        """A string that changes whenever HEAD or any ref moves (one git show-ref)."""
+        try:
+            return self.run_git("show-ref", "--head")
+        except GitCommandError:
+            return ""
+
+    def reload_refs(self, commits: list[CommitInfo]) -> None:
+        """Forget the cached refs and attach the current tag and branch names to commits."""
+        self._refs = None
+        for c in commits:
+            c.tags.clear()
+            c.branches.clear()
+        self._attach_refs(commits)
+
     def _attach_refs(self, commits: list[CommitInfo]) -> None:
         """Attach tag and branch names to commits by SHA."""
         sha_to_commit = {c.sha: c for c in commits}
-        for ref in self.repo.refs:
-            try:
-                sha = ref.commit.hexsha if hasattr(ref, "commit") else None
-                if not sha:
-                    continue
-                name = ref.name
-                if name.startswith("refs/tags/"):
-                    tag_name = name.replace("refs/tags/", "")
-                    if sha in sha_to_commit:
-                        sha_to_commit[sha].tags.append(tag_name)
-                elif name.startswith("refs/heads/"):
-                    branch_name = name.replace("refs/heads/", "")
-                    if sha in sha_to_commit:
-                        sha_to_commit[sha].branches.append(branch_name)
-            except (GitCommandError, ValueError, TypeError):
+        for ref in self.get_refs():
+            commit = sha_to_commit.get(ref.sha) if ref.sha else None
+            if commit is None:
                 continue
+            if ref.name.startswith("refs/tags/"):
+                commit.tags.append(ref.short_name)
+            elif ref.name.startswith("refs/heads/"):
+                commit.branches.append(ref.short_name)
 
     def get_tags(self) -> list[TagInfo]:
         """Return all tags with commit SHA and optional annotation."""
-        result: list[TagInfo] = []
-        for tag_ref in self.repo.tags:
-            try:
-                tag = tag_ref.tag
-                if tag is not None:
-                    result.append(
-                        TagInfo(
-                            name=tag_ref.name,
-                            sha=tag.commit.hexsha if hasattr(tag, "commit") else None,
-                            is_annotated=True,
-                            tagger=getattr(tag.tagger, "name", None) if hasattr(tag, "tagger") else None,
-                            tag_date=getattr(tag, "tagged_date", None),
-                            tag_message=getattr(tag, "message", None) or None,
-                        )
-                    )
-                else:
-                    result.append(
-                        TagInfo(
-                            name=tag_ref.name,
-                            sha=tag_ref.commit.hexsha if hasattr(tag_ref, "commit") else None,
-                            is_annotated=False,
-                            tagger=None,
-                            tag_date=None,
-                            tag_message=None,
-                        )
-                    )
-            except (GitCommandError, ValueError, TypeError, AttributeError):
-                result.append(
-                    TagInfo(
-                        name=tag_ref.name,
-                        sha=None,
-                        is_annotated=False,
-                        tagger=None,
-                        tag_date=None,
-                        tag_message=None,
-                    )
-                )
-        return result
+        return [
+            TagInfo(
+                name=ref.short_name,
+                sha=ref.sha,
+                is_annotated=ref.is_annotated,
+                tagger=ref.tagger,
+                tag_date=ref.tag_date,
+                tag_message=ref.tag_message,
+            )
+            for ref in self.get_refs()
+            if ref.name.startswith("refs/tags/")
+        ]
 
     def get_branches(self) -> list[tuple[str, str]]:
         """Return (branch_name, head_sha) for each local branch."""
-        out: list[tuple[str, str]] = []
-        for ref in self.repo.heads:
-            try:
-                out.append((ref.name, ref.commit.hexsha))
-            except (GitCommandError, ValueError):
+        return [
+            (ref.short_name, ref.sha)
+            for ref in self.get_refs()
+            if ref.name.startswith("refs/heads/") and ref.sha
+        ]
+
+    def _stream_git(
+        self,
+        args: list[str],
+        stdin_lines: Iterable[str] | None = None,
+        sep: bytes = b"\0",
+    ) -> Iterator[bytes]:
+        """
+        Run a git command and yield its stdout split on sep, as it is produced.
+        stdin_lines are written from a helper thread so git never blocks on a full pipe.
+        """
+        git = getattr(self.repo.git, "GIT_PYTHON_GIT_EXECUTABLE", None) or "git"
+        cmd = [git, "-C", str(self.repo_path), *args]
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if stdin_lines is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise GitCommandError(cmd, 127, str(e)) from e
+        self._git_calls += 1
+
+        feeder: threading.Thread | None = None
+        if stdin_lines is not None:
+
+            def _feed() -> None:
+                try:
+                    for line in stdin_lines:
+                        proc.stdin.write(line.encode("utf-8") + b"\n")
+                except (BrokenPipeError, ValueError):
+                    pass
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except (BrokenPipeError, OSError):
+                        pass
+
+            feeder = threading.Thread(target=_feed, daemon=True)
+            feeder.start()
+
+        finished = False
+        try:
+            pending = b""
+            for chunk in iter(lambda: proc.stdout.read(1 << 16), b""):
+                pending += chunk
+                *parts, pending = pending.split(sep)
+                yield from parts
+            if pending:
+                yield pending
+            finished = True
+        finally:
+            if not finished:
+                proc.kill()
+            proc.stdout.close()
+            returncode = proc.wait()
+            if feeder is not None:
+                feeder.join()
+        if returncode != 0:
+            raise GitCommandError(cmd, returncode)
+
+    def _read_numstat(
+        self, lines: list[str]
+    ) -> tuple[dict[str, list[DiffStat]], dict[str, DiffSummary]]:
+        """
+        Run one bulk diff-tree --numstat over the given stdin lines.
+        Returns per-commit stats plus, for commits over max_files_per_commit, the
+        totals of the files that were streamed past instead of kept.
+        """
+        if self.metadata_only:
+            return self._read_changed_files(lines)
+        args = _NUMSTAT_ARGS + (["--", *self.pathspecs] if self.pathspecs else [])
+        cap = self.max_files_per_commit
+        result: dict[str, list[DiffStat]] = {}
+        overflow: dict[str, DiffSummary] = {}
+        sha = ""
+        current: list[DiffStat] | None = None
+        stats = self._stage("numstat")
+        tokens = iter(_pipelined(self._stream_git(args, lines), stats))
+        for token in tokens:
+            if b"\t" not in token:
+                # Commit header. -m repeats it once per parent; keep the first block.
+                sha = _safe_decode(token).strip()
+                current = None if sha in result else result.setdefault(sha, [])
+                if current is not None:
+                    stats.records += 1
+                continue
+            stat = _numstat_entry(token, tokens)
+            if current is None:
+                continue
+            if cap is not None and len(current) >= cap:
+                summary = overflow.setdefault(sha, DiffSummary())
+                summary.files += 1
+                summary.insertions += stat.insertions
+                summary.deletions += stat.deletions
                 continue
-        return out
+            current.append(stat)
+        return result, overflow
 
-    def get_diff_stats(self, commit_sha: str, parent_sha: str | None = None) -> list[DiffStat]:
-        """Return per-file diff stats for a commit using git show --numstat (accurate counts)."""
+    def _read_changed_files(
+        self, lines: list[str]
+    ) -> tuple[dict[str, list[DiffStat]], dict[str, DiffSummary]]:
+        """_read_numstat of a metadata-only reader: changed files from --raw, no line counts."""
+        args = self._diff_args(_RAW_ARGS) + (["--", *self.pathspecs] if self.pathspecs else [])
+        cap = self.max_files_per_commit
+        result: dict[str, list[DiffStat]] = {}
+        overflow: dict[str, DiffSummary] = {}
+        sha = ""
+        current: list[DiffStat] | None = None
+        stats = self._stage("files")
+        tokens = iter(_pipelined(self._stream_git(args, lines), stats))
+        for token in tokens:
+            if not token.startswith(b":"):
+                # Commit header. -m repeats it once per parent; keep the first block.
+                sha = _safe_decode(token).strip()
+                current = None if sha in result else result.setdefault(sha, [])
+                if current is not None:
+                    stats.records += 1
+                continue
+            stat = _raw_stat(token, tokens)
+            if current is None:
+                continue
+            if cap is not None and len(current) >= cap:
+                overflow.setdefault(sha, DiffSummary()).files += 1
+                continue
+            current.append(stat)
+        return result, overflow
+
+    def prefetch_diff_stats(self, commits: list[CommitInfo], *, merge_diffs: bool = True) -> None:
+        """
+        Load per-file diff stats for many commits with a single git diff-tree process
+        and cache them for get_diff_stats.
+
+        With merge_diffs, a merge is diffed against its first parent, so work merged
+        from a side branch is attributed to the merge (the right view for first-parent
+        histories). Without it, merges get no stats: in a full-DAG walk the merged
+        commits are analyzed themselves and counting the merge would double them.
+        """
+        lines: list[str] = []
+        for c in commits:
+            if c.sha in self._diff_stats:
+                continue
+            if len(c.parent_shas) > 1 and not merge_diffs:
+                self._diff_stats[c.sha] = []
+                continue
+            if self._stats_from_index(c.sha):
+                continue
+            if len(c.parent_shas) > 1:
+                lines.append(f"{c.sha} {c.parent_shas[0]}")
+            else:
+                lines.append(c.sha)
+        if not lines:
+            return
         try:
-            import re
-            output = self.repo.git.show(commit_sha, "--numstat", "--format=")
-            result: list[DiffStat] = []
-            for line in output.splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split("\t")
-                if len(parts) < 3:
-                    continue
-                add_s, del_s, path = parts[0], parts[1], parts[2]
-                insertions = int(add_s) if add_s != "-" else 0
-                deletions = int(del_s) if del_s != "-" else 0
-                result.append(
-                    DiffStat(
+            loaded, overflow = self._read_numstat(lines)
+        except (GitCommandError, ValueError):
+            return
+        for line in lines:
+            sha = line.split(" ", 1)[0]
+            self._diff_stats[sha] = loaded.get(sha, [])
+        self._diff_overflow.update(overflow)
+
+    def _read_raw(
+        self, lines: list[str], *, scoped: bool = True
+    ) -> Iterator[tuple[str, list[FileHistoryEntry]]]:
+        """Stream (commit_sha, file events) per commit header of a bulk diff-tree --raw."""
+        sha: str | None = None
+        seen: set[str] = set()
+        entries: list[FileHistoryEntry] | None = None
+        stats = self._stage("raw")
+        args = self._diff_args(_RAW_ARGS) + (["--", self.scope] if scoped and self.scope else [])
+        tokens = iter(_pipelined(self._stream_git(args, lines), stats))
+        for token in tokens:
+            if not token.startswith(b":"):
+                if sha is not None and entries is not None:
+                    yield sha, entries
+                # Commit header. -m repeats it once per parent; keep the first block.
+                sha = _safe_decode(token).strip()
+                entries = None if sha in seen else []
+                if entries is not None:
+                    stats.records += 1
+                seen.add(sha)
+                continue
+            action, path, previous = _raw_entry(token, tokens)
+            if entries is not None and sha is not None:
+                entries.append(
+                    FileHistoryEntry(
+                        commit_sha=sha,
                         path=path,
-                        insertions=insertions,
-                        deletions=deletions,
-                        is_binary=add_s == "-" and del_s == "-",
+                        action=action,
+                        previous_path=previous,
                     )
                 )
-            return result
-        except (GitCommandError, ValueError, TypeError):
-            return []
+        if sha is not None and entries is not None:
+            yield sha, entries
 
-    def get_file_history(self, path: str, rev: str = "HEAD") -> list[FileHistoryEntry]:
-        """Return history of a file (commits that touched it) in chronological order."""
-        try:
-            log = self.repo.git.log(rev, "--follow", "--name-status", "--", path)
-            entries: list[FileHistoryEntry] = []
-            current_sha: str | None = None
-            for line in log.splitlines():
-                if not line:
-                    continue
-                if line.startswith("commit "):
-                    current_sha = line.split()[1].strip()
+    def iter_file_events(
+        self, commits: list[CommitInfo]
+    ) -> Iterator[tuple[CommitInfo, list[FileHistoryEntry]]]:
+        """
+        Yield (commit, file add/modify/delete/rename events) for each commit of an
+        oldest-first list, in order, from a single git diff-tree process. Each commit
+        is compared with the previous entry of the list, so any slice of a first-parent
+        chain replays exactly; the first entry is compared with its own first parent
+        (or the empty tree for a root commit).
+        """
+        bases = [
+            commits[i - 1].sha if i > 0 else (c.parent_shas[0] if c.parent_shas else None)
+            for i, c in enumerate(commits)
+        ]
+        return self._iter_events(commits, bases)
+
+    def iter_first_parent_events(
+        self, commits: list[CommitInfo], *, scoped: bool = True
+    ) -> Iterator[tuple[CommitInfo, list[FileHistoryEntry]]]:
+        """
+        Like iter_file_events, but every commit is compared with its own first parent.
+        scoped=False ignores the reader's scope (all paths).
+        """
+        bases = [c.parent_shas[0] if c.parent_shas else None for c in commits]
+        return self._iter_events(commits, bases, scoped=scoped)
+
+    def _iter_events(
+        self, commits: list[CommitInfo], bases: list[str | None], *, scoped: bool = True
+    ) -> Iterator[tuple[CommitInfo, list[FileHistoryEntry]]]:
+        scope = self.scope if scoped else ""
+        index = self._index
+        from_index: dict[str, int] = {}
+        lines: list[str] = []
+        for c, base in zip(commits, bases):
+            if index is not None and base == (c.parent_shas[0] if c.parent_shas else None):
+                i = index.position(c.sha)
+                if i is not None:
+                    from_index[c.sha] = i  # stored events are against the first parent
                     continue
-                if current_sha and line[0] in "AMDTRC" and "\t" in line:
-                    action = line[0]
-                    parts = line[1:].strip().split("\t")
-                    p = parts[0].strip() if parts else ""
-                    prev = parts[1].strip() if len(parts) > 1 else None
-                    if action == "R" and prev:
-                        entries.append(
-                            FileHistoryEntry(
-                                commit_sha=current_sha,
-                                path=p,
-                                action=action,
-                                previous_path=prev,
-                            )
-                        )
-                    else:
-                        entries.append(
-                            FileHistoryEntry(
-                                commit_sha=current_sha,
-                                path=p,
-                                action=action,
-                                previous_path=prev if action == "R" else None,
-                            )
-                        )
-            return entries
+            lines.append(f"{c.sha} {base}" if base else c.sha)
+        try:
+            stream = self._read_raw(lines, scoped=scoped) if lines else iter(())
+            pending = next(stream, None)
+            for c in commits:
+                if c.sha in from_index:
+                    events = index.file_events(from_index[c.sha])
+                    if scope:
+                        events = [
+                            e for e in events
+                            if in_scope(e.path, scope) or in_scope(e.previous_path, scope)
+                        ]
+                    yield c, events
+                elif pending is not None and pending[0] == c.sha:
+                    yield c, pending[1]
+                    pending = next(stream, None)
+                else:
+                    yield c, []  # no file changes (diff-tree prints nothing)
+        except (GitCommandError, ValueError):
+            return
+
+    def get_diff_stats(self, commit_sha: str, parent_sha: str | None = None) -> list[DiffStat]:
+        """
+        Return per-file diff stats for a commit (against parent_sha, or its first parent).
+        Served from the prefetch cache when available; otherwise read on demand from
+        the session's diff-tree. At most max_files_per_commit entries; the rest are
+        in get_diff_overflow().
+        """
+        if parent_sha is None and (
+            commit_sha in self._diff_stats or self._stats_from_index(commit_sha)
+        ):
+            return self._diff_stats[commit_sha]
+        new, old = self._resolve([commit_sha, parent_sha or f"{commit_sha}^1"], "tree")
+        if new is None or (old is None and parent_sha is not None):
+            return []
+        try:
+            stats = self._diff_trees([(old or _EMPTY_TREE, new)])[0]  # root commit: all added
         except (GitCommandError, ValueError, TypeError):
             return []
+        cap = self.max_files_per_commit
+        if cap is not None and len(stats) > cap:
+            stats, rest = stats[:cap], stats[cap:]
+            if parent_sha is None:
+                self._diff_overflow[commit_sha] = DiffSummary(
+                    files=len(rest),
+                    insertions=sum(s.insertions for s in rest),
+                    deletions=sum(s.deletions for s in rest),
+                )
+        if parent_sha is None:
+            self._diff_stats[commit_sha] = stats
+        return stats
+
+    def skip_diff_stats(self, commit_shas: Iterable[str]) -> None:
+        """Record commits known not to change any diffed path, so they are never diffed."""
+        for sha in commit_shas:
+            self._diff_stats.setdefault(sha, [])
+
+    def _stats_from_index(self, commit_sha: str) -> bool:
+        """Load a commit's first-parent diff stats from the index into the cache."""
+        if not self._index_stats:
+            return False
+        i = self._index.position(commit_sha)
+        if i is None:
+            return False
+        stats, overflow = self._index.diff_stats(i)
+        self._diff_stats[commit_sha] = stats
+        if overflow is not None:
+            self._diff_overflow[commit_sha] = overflow
+        return True
+
+    def get_diff_overflow(self, commit_sha: str) -> DiffSummary | None:
+        """Totals for the files of a commit beyond max_files_per_commit, if it had any."""
+        return self._diff_overflow.get(commit_sha)
+
+    def get_diff_totals(self, commit_sha: str) -> DiffSummary:
+        """Files changed and lines added/removed by a commit, overflow included."""
+        stats = self.get_diff_stats(commit_sha)
+        total = DiffSummary(
+            files=len(stats),
+            insertions=sum(s.insertions for s in stats),
+            deletions=sum(s.deletions for s in stats),
+        )
+        extra = self._diff_overflow.get(commit_sha)
+        if extra is not None:
+            total.files += extra.files
+            total.insertions += extra.insertions
+            total.deletions += extra.deletions
+        return total
 
     def get_file_paths_at_rev(self, rev: str = "HEAD") -> list[str]:
-        """Return all tracked file paths at a revision (tree walk)."""
+        """Return all tracked file paths (within the scope) at a revision (one git ls-tree)."""
+        if rev in self._tree_paths:
+            return self._tree_paths[rev]
+        args = ["ls-tree", "-r", "-z", "--name-only", rev]
+        if self.scope:
+            args += ["--", self.scope]
         try:
-            commit = self.repo.commit(rev)
-            out: list[str] = []
-            for item in commit.tree.traverse():
-                if item.type == "blob":
-                    out.append(item.path)
-            return sorted(out)
+            paths = sorted(_safe_decode(p) for p in self._stream_git(args) if p)
         except (GitCommandError, ValueError, TypeError):
             return []
+        self._tree_paths[rev] = paths
+        return paths
 
-    def get_commit_message(self, sha: str) -> str:
-        """Return full commit message for a SHA."""
+    def get_tree_blobs(self, rev: str = "HEAD") -> dict[str, str]:
+        """Path -> blob SHA of every file (within the scope) at a revision (one git ls-tree)."""
+        if rev in self._tree_blobs:
+            return self._tree_blobs[rev]
+        args = ["ls-tree", "-r", "-z", rev]
+        if self.scope:
+            args += ["--", self.scope]
+        blobs: dict[str, str] = {}
         try:
-            return self.repo.commit(sha).message or ""
+            for entry in self._stream_git(args):
+                meta, _, path = entry.partition(b"\t")
+                fields = meta.split()
+                if len(fields) == 3 and fields[1] == b"blob":
+                    blobs[_safe_decode(path)] = fields[2].decode("ascii")
         except (GitCommandError, ValueError, TypeError):
-            return ""
+            return {}
+        self._tree_blobs[rev] = blobs
+        return blobs
+
+    def iter_tree_changes(
+        self, pairs: list[tuple[str, str]]
+    ) -> Iterator[list[tuple[str, str | None]]]:
+        """
+        For each (old_rev, new_rev) pair, in order, the files that differ as (path, new
+        blob SHA, or None if deleted), from one git diff-tree for all pairs. Renames
+        are a delete plus an add; submodules are skipped. Honors the scope.
+        """
+        if not pairs:
+            return
+        args = ["diff-tree", "--stdin", "--always", "-r", "--raw", "-z", "--no-renames"]
+        if self.scope:
+            args += ["--", self.scope]
+        changes: list[tuple[str, str | None]] | None = None
+        tokens = self._stream_git(args, (f"{new} {old}" for old, new in pairs))
+        for token in tokens:
+            if not token.startswith(b":"):
+                if changes is not None:
+                    yield changes
+                changes = []  # header of the next pair
+                continue
+            # ":<old mode> <new mode> <old sha> <new sha> <status>" NUL <path>
+            old_mode, new_mode, _old_sha, new_sha, status = token[1:].split(b" ")
+            path = _safe_decode(next(tokens, b""))
+            old_link, new_link = old_mode == b"160000", new_mode == b"160000"
+            if changes is None:
+                continue
+            if (old_link and (new_link or status == b"D")) or (new_link and status == b"A"):
+                continue  # submodule
+            changes.append((path, None if status == b"D" or new_link else new_sha.decode("ascii")))
+        if changes is not None:
+            yield changes
+
+    def get_blob_sizes(self, blob_shas: Iterable[str], cache=None) -> dict[str, int]:
+        """
+        Sizes in bytes of blobs, from object headers only (one batch to the session's
+        git cat-file --batch-check; contents are never read). Sizes already known
+        to this reader or to cache (a gitscribe.cache.SizeCache) are not looked up
+        again; new ones are added to cache. A metadata-only reader looks nothing up.
+        """
+        known = self._blob_sizes
+        wanted = list(dict.fromkeys(blob_shas))
+        if cache is not None:
+            for sha in wanted:
+                if sha not in known:
+                    size = cache.get(sha)
+                    if size is not None:
+                        known[sha] = size
+        missing = [sha for sha in wanted if sha not in known]
+        if missing and not self.metadata_only:
+            try:
+                found = self._session.object_info(missing)
+            except GitCommandError:
+                found = []
+            for sha, info in zip(missing, found):
+                if info is not None:
+                    known[sha] = info[2]
+                    if cache is not None:
+                        cache.set(sha, info[2])
+        return {sha: known[sha] for sha in wanted if sha in known}
+
+    @property
+    def cache_dir(self) -> Path:
+        """Where gitscribe keeps caches for this repository (inside the Git directory)."""
+        return Path(self.repo.git_dir) / "gitscribe"
+
+    def _diff_trees(self, pairs: list[tuple[str, str]]) -> list[list[DiffStat]]:
+        """Per-file stats for (old tree SHA, new tree SHA) pairs, from the session's diff-tree."""
+        if self.metadata_only:
+            args = ["-r", _EXACT_RENAMES, "--raw", "-z"]
+        else:
+            args = ["-r", "-M", "--numstat", "-z"]
+        if self.pathspecs:
+            args += ["--", *self.pathspecs]
+        diffs: list[list[DiffStat]] = []
+        for answer in self._session.tree_diffs(args, pairs):
+            stats: list[DiffStat] = []
+            tokens = iter(answer)
+            for token in tokens:
+                if self.metadata_only:
+                    stats.append(_raw_stat(token, tokens))
+                elif b"\t" in token:
+                    stats.append(_numstat_entry(token, tokens))
+            diffs.append(stats)
+        return diffs
+
+    def prefetch_tree_diffs(self, pairs: Iterable[tuple[str | None, str]]) -> None:
+        """
+        Load get_tree_diff_stats for all (old_rev, new_rev) pairs at once: the trees
+        are resolved in one batch and all diffs pipelined through the session.
+        """
+        todo = [pair for pair in dict.fromkeys(pairs) if pair not in self._tree_diffs]
+        if not todo:
+            return
+        revs = list(dict.fromkeys(rev for pair in todo for rev in pair if rev))
+        trees = dict(zip(revs, self._resolve(revs, "tree")))
+        todo = [(old, new) for old, new in todo if trees[new] and (old is None or trees[old])]
+        try:
+            diffs = self._diff_trees(
+                [(trees[old] if old else _EMPTY_TREE, trees[new]) for old, new in todo]
+            )
+        except (GitCommandError, ValueError, TypeError):
+            return
+        self._tree_diffs.update(zip(todo, diffs))
+
+    def get_tree_diff_stats(self, old_rev: str | None, new_rev: str) -> list[DiffStat]:
+        """
+        Per-file stats between two trees, like git diff --numstat (cost depends on
+        the trees, not on the commits between). old_rev None compares against the
+        empty tree. Honors include/exclude and the scope. Metadata-only: files only.
+        Raises ValueError if a revision names no tree.
+        """
+        key = (old_rev, new_rev)
+        if key not in self._tree_diffs:
+            self.prefetch_tree_diffs([key])
+        if key not in self._tree_diffs:
+            raise ValueError(f"cannot diff {old_rev or _EMPTY_TREE}..{new_rev}")
+        return self._tree_diffs[key]
+
+    def get_tree_diff_totals(self, old_rev: str | None, new_rev: str) -> DiffSummary:
+        """Files changed and lines added/removed between two trees (see get_tree_diff_stats)."""
+        stats = self.get_tree_diff_stats(old_rev, new_rev)
+        return DiffSummary(
+            files=len(stats),
+            insertions=sum(s.insertions for s in stats),
+            deletions=sum(s.deletions for s in stats),
+        )
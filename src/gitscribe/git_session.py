@@ -0,0 +1,166 @@
+"""
+Long-lived git processes shared by the requests of one GitReader, so lookups
+that used to start a git process per call cost a pipe round trip instead.
+Object lookups go to one git cat-file --batch-check, tree diffs to one
+git diff-tree --stdin per set of diff options. Requests are pipelined: a helper
+thread writes a whole batch while the answers are read back in order.
+"""
+
+from __future__ import annotations
+
+import itertools
+import subprocess
+import threading
+import weakref
+from typing import Callable, TypeVar
+
+from git.exc import GitCommandError
+
+_T = TypeVar("_T")
+
+# diff-tree --stdin copies a line that names no object to its output and flushes:
+# sent after each request, it marks where the answer ends.
+_SYNC = b"gitscribe-sync-"
+
+
+def _shutdown(procs: dict[tuple[str, ...], subprocess.Popen]) -> None:
+    """Close the processes' stdin so they exit; kill any that do not."""
+    for proc in procs.values():
+        try:
+            proc.stdin.close()
+        except OSError:  # BrokenPipeError: git already exited
+            pass
+    for proc in procs.values():
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+    procs.clear()
+
+
+class GitSession:
+    """
+    The persistent git processes of one repository, started on first use.
+    Thread-safe; close() (or garbage collection) ends them.
+    """
+
+    def __init__(self, repo_path: str, git: str = "git") -> None:
+        self._cmd = [git, "-C", repo_path]
+        self._procs: dict[tuple[str, ...], subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._markers = itertools.count(1)
+        self.started = 0  # processes started, restarts included
+        self._finalizer = weakref.finalize(self, _shutdown, self._procs)
+
+    def close(self) -> None:
+        with self._lock:
+            self._finalizer()
+
+    def _process(self, args: tuple[str, ...]) -> subprocess.Popen:
+        proc = self._procs.get(args)
+        if proc is not None and proc.poll() is None:
+            return proc
+        if not self._finalizer.alive:  # used again after close()
+            self._finalizer = weakref.finalize(self, _shutdown, self._procs)
+        cmd = [*self._cmd, *args]
+        try:
+            proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            raise GitCommandError(cmd, 127, str(e)) from e
+        self._procs[args] = proc
+        self.started += 1
+        return proc
+
+    def _exchange(
+        self,
+        args: tuple[str, ...],
+        requests: list[bytes],
+        read_answer: Callable[[subprocess.Popen, int], _T],
+    ) -> list[_T]:
+        """
+        Write the requests (one or more lines each) to the process for args from a
+        helper thread, and call read_answer(process, i) to read the answer to each.
+        A process that fails mid-batch is killed; the next request starts a new one.
+        """
+        if not requests:
+            return []
+        with self._lock:
+            proc = self._process(args)
+
+            def _feed() -> None:
+                try:
+                    proc.stdin.write(b"".join(r + b"\n" for r in requests))
+                    proc.stdin.flush()
+                except (BrokenPipeError, ValueError, OSError):
+                    pass
+
+            feeder = threading.Thread(target=_feed, daemon=True)
+            feeder.start()
+            try:
+                return [read_answer(proc, i) for i in range(len(requests))]
+            except (EOFError, ValueError, OSError) as e:
+                del self._procs[args]
+                proc.kill()
+                proc.wait()
+                feeder.join()
+                _shutdown({args: proc})
+                raise GitCommandError([*self._cmd, *args], proc.returncode, str(e)) from e
+            finally:
+                feeder.join()
+
+    def object_info(self, names: list[str]) -> list[tuple[str, str, int] | None]:
+        """
+        (SHA, type, size) of the object each name (any revision expression, such as
+        "v1.0^{tree}") resolves to, or None if it names no object.
+        """
+        valid = list(dict.fromkeys(n for n in names if n and "\n" not in n))
+
+        def answer(proc: subprocess.Popen, i: int) -> tuple[str, str, int] | None:
+            line = proc.stdout.readline()
+            if not line.endswith(b"\n"):
+                raise EOFError("git cat-file exited")
+            fields = line.split()
+            if len(fields) == 3 and fields[2].isdigit():  # else "<name> missing"
+                return fields[0].decode("ascii"), fields[1].decode("ascii"), int(fields[2])
+            return None
+
+        requests = [name.encode("utf-8") for name in valid]
+        found = dict(zip(valid, self._exchange(("cat-file", "--batch-check"), requests, answer)))
+        return [found.get(name) for name in names]
+
+    def tree_diffs(self, args: list[str], pairs: list[tuple[str, str]]) -> list[list[bytes]]:
+        """
+        For each (old tree SHA, new tree SHA) pair, the -z output tokens of
+        git diff-tree --stdin <args> comparing the two (header line excluded).
+        """
+        markers: list[bytes] = []
+        requests: list[bytes] = []
+        for old, new in pairs:
+            markers.append(_SYNC + str(next(self._markers)).encode("ascii"))
+            requests.append(f"{old} {new}\n".encode("ascii") + markers[-1])
+        buffered = [bytearray()]  # read past the end of the previous answer
+
+        def answer(proc: subprocess.Popen, i: int) -> list[bytes]:
+            data = buffered[0]
+            end = (b"\n" + markers[i] + b"\n", b"\0" + markers[i] + b"\n")
+            searched = 0
+            while True:
+                found = [data.find(e, searched) for e in end]
+                found = [pos for pos in found if pos >= 0]
+                if found:
+                    break
+                searched = max(0, len(data) - len(end[0]))
+                chunk = proc.stdout.read1(1 << 16)
+                if not chunk:
+                    raise EOFError("git diff-tree exited")
+                data += chunk
+            pos = min(found)
+            buffered[0] = data[pos + len(end[0]) :]
+            _header, _, body = bytes(data[: pos + 1]).partition(b"\n")
+            return body.split(b"\0")[:-1]
+
+        return self._exchange(("diff-tree", "--stdin", *args), requests, answer)
@@ -0,0 +1,397 @@
+"""
+Portable history index: parsed commits, per-commit diff stats and file events,
+refs and the path table up to one tip commit, in a single versioned binary file.
+
+Layout: magic, version, a JSON header (tip, build options, refs, column table),
+then fixed-width little-endian columns, each 8-byte aligned, read in place through
+mmap. Variable-length data (parents, strings, stats, events) is a flat column plus
+a start-offset column with one more entry than rows.
+
+Built and extended with `gitscribe index build`; a run with --index only asks Git
+for the commits made after the tip.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from gitscribe.git_reader import CommitInfo, DiffStat, DiffSummary, FileHistoryEntry, GitReader
+
+MAGIC = b"GSINDEX\0"
+INDEX_VERSION = 1
+NO_PATH = 0xFFFFFFFF
+NO_DATE = -(2**63)
+
+# Column name -> array typecode
+_COLUMNS = {
+    "sha": "B",
+    "parent_start": "Q",
+    "parents": "B",
+    "author_date": "q",
+    "author_tz": "i",
+    "commit_date": "q",
+    "commit_tz": "i",
+    "str_start": "Q",  # 4 strings per commit: author, email, committer, message
+    "strings": "B",
+    "stat_start": "Q",
+    "stat_path": "I",
+    "stat_ins": "I",
+    "stat_del": "I",
+    "stat_from": "I",
+    "stat_binary": "B",
+    "overflow": "I",  # files, insertions, deletions per commit (beyond the cap)
+    "event_start": "Q",
+    "event_action": "B",
+    "event_path": "I",
+    "event_prev": "I",
+    "path_start": "Q",
+    "paths": "B",
+}
+_PREFIX = struct.Struct("<8sII")  # magic, version, header length
+
+
+def _encode(s: str) -> bytes:
+    return s.encode("utf-8", errors="surrogatepass")
+
+
+def _date_parts(value: datetime | None) -> tuple[int, int]:
+    if value is None:
+        return NO_DATE, 0
+    offset = value.utcoffset()
+    return int(value.timestamp()), int(offset.total_seconds()) if offset else 0
+
+
+def _date_from_parts(epoch: int, tz: int) -> datetime | None:
+    if epoch == NO_DATE:
+        return None
+    return datetime.fromtimestamp(epoch, timezone(timedelta(seconds=tz)))
+
+
+class IndexWriter:
+    """Accumulates commits (in history order) and writes one index file."""
+
+    def __init__(self, hash_len: int = 20) -> None:
+        self.hash_len = hash_len
+        self.columns: dict[str, array] = {name: array(code) for name, code in _COLUMNS.items()}
+        for name in ("parent_start", "str_start", "stat_start", "event_start", "path_start"):
+            self.columns[name].append(0)
+        self._path_ids: dict[str, int] = {}
+        self.count = 0
+
+    def _path_id(self, path: str | None) -> int:
+        if path is None:
+            return NO_PATH
+        pid = self._path_ids.get(path)
+        if pid is None:
+            pid = self._path_ids[path] = len(self._path_ids)
+            cols = self.columns
+            cols["paths"].frombytes(_encode(path))
+            cols["path_start"].append(len(cols["paths"]))
+        return pid
+
+    def add(
+        self,
+        commit: CommitInfo,
+        stats: list[DiffStat],
+        overflow: DiffSummary | None,
+        events: list[FileHistoryEntry],
+    ) -> None:
+        """Append one commit with its first-parent diff stats and file events."""
+        cols = self.columns
+        cols["sha"].frombytes(bytes.fromhex(commit.sha))
+        for parent in commit.parent_shas:
+            cols["parents"].frombytes(bytes.fromhex(parent))
+        cols["parent_start"].append(len(cols["parents"]) // self.hash_len)
+        for date_col, tz_col, value in (
+            ("author_date", "author_tz", commit.authored_date),
+            ("commit_date", "commit_tz", commit.committed_date),
+        ):
+            epoch, tz = _date_parts(value)
+            cols[date_col].append(epoch)
+            cols[tz_col].append(tz)
+        for text in (commit.author, commit.author_email, commit.committer, commit.message):
+            cols["strings"].frombytes(_encode(text or ""))
+            cols["str_start"].append(len(cols["strings"]))
+        for s in stats:
+            cols["stat_path"].append(self._path_id(s.path))
+            cols["stat_ins"].append(s.insertions)
+            cols["stat_del"].append(s.deletions)
+            cols["stat_from"].append(self._path_id(s.renamed_from))
+            cols["stat_binary"].append(1 if s.is_binary else 0)
+        cols["stat_start"].append(len(cols["stat_path"]))
+        extra = overflow or DiffSummary()
+        cols["overflow"].extend((extra.files, extra.insertions, extra.deletions))
+        for e in events:
+            cols["event_action"].append(ord(e.action[:1] or "M"))
+            cols["event_path"].append(self._path_id(e.path))
+            cols["event_prev"].append(self._path_id(e.previous_path))
+        cols["event_start"].append(len(cols["event_path"]))
+        self.count += 1
+
+    def write(self, path: Path, tip: str, options: dict[str, Any], refs: list[list[str]]) -> None:
+        """Write the index atomically (temporary file, then rename)."""
+        table: dict[str, list[int]] = {}
+        offset = 0
+        for name, col in self.columns.items():
+            size = len(col) * col.itemsize
+            table[name] = [offset, len(col)]
+            offset += (size + 7) & ~7
+        header = json.dumps(
+            {
+                "tip": tip,
+                "commits": self.count,
+                "paths": len(self._path_ids),
+                "hash_len": self.hash_len,
+                "options": options,
+                "refs": refs,
+                "columns": table,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        header += b" " * ((-(_PREFIX.size + len(header))) & 7)
+        tmp = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as fh:
+            fh.write(_PREFIX.pack(MAGIC, INDEX_VERSION, len(header)))
+            fh.write(header)
+            for col in self.columns.values():
+                data = col
+                if sys.byteorder != "little":
+                    data = array(col.typecode, col)
+                    data.byteswap()
+                raw = data.tobytes()
+                fh.write(raw)
+                fh.write(b"\0" * ((-len(raw)) & 7))
+        os.replace(tmp, path)
+
+
+class HistoryIndex:
+    """A memory-mapped index file; rows are commits in stored (git log) order."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_len = _PREFIX.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a gitscribe index")
+            if version != INDEX_VERSION:
+                raise ValueError(f"unsupported index version: {version}")
+            header = json.loads(self._mm[_PREFIX.size : _PREFIX.size + header_len])
+            base = _PREFIX.size + header_len
+            self.tip: str = header["tip"]
+            self.hash_len: int = header["hash_len"]
+            self.options: dict[str, Any] = header["options"]
+            self.refs: list[list[str]] = header["refs"]
+            self._count: int = header["commits"]
+            self._cols: dict[str, Any] = {}
+            view = memoryview(self._mm)
+            for name, code in _COLUMNS.items():
+                offset, length = header["columns"][name]
+                itemsize = array(code).itemsize
+                raw = view[base + offset : base + offset + length * itemsize]
+                if sys.byteorder == "little":
+                    self._cols[name] = raw.cast(code)
+                else:
+                    col = array(code, raw.tobytes())
+                    col.byteswap()
+                    self._cols[name] = col
+        except (KeyError, TypeError, struct.error) as e:
+            self.close()
+            raise ValueError(f"corrupt index {path}: {e}") from e
+        except ValueError:
+            self.close()
+            raise
+        self._positions: dict[str, int] | None = None
+        self._paths: list[str] | None = None
+
+    def close(self) -> None:
+        self._cols = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # a caller still holds a view; the map goes with the last reference
+
+    def __len__(self) -> int:
+        return self._count
+
+    def sha(self, i: int) -> str:
+        h = self.hash_len
+        return bytes(self._cols["sha"][i * h : (i + 1) * h]).hex()
+
+    def position(self, sha: str) -> int | None:
+        """Row of a commit, or None if the index does not contain it."""
+        if self._positions is None:
+            raw = bytes(self._cols["sha"])
+            h = self.hash_len
+            self._positions = {raw[i * h : (i + 1) * h].hex(): i for i in range(self._count)}
+        return self._positions.get(sha)
+
+    def _string(self, k: int) -> str:
+        starts = self._cols["str_start"]
+        return bytes(self._cols["strings"][starts[k] : starts[k + 1]]).decode(
+            "utf-8", errors="surrogatepass"
+        )
+
+    def path_by_id(self, pid: int) -> str:
+        if self._paths is None:
+            starts, heap = self._cols["path_start"], bytes(self._cols["paths"])
+            self._paths = [
+                heap[starts[i] : starts[i + 1]].decode("utf-8", errors="surrogatepass")
+                for i in range(len(starts) - 1)
+            ]
+        return self._paths[pid]
+
+    def _optional_path(self, pid: int) -> str | None:
+        return None if pid == NO_PATH else self.path_by_id(pid)
+
+    def commit(self, i: int) -> CommitInfo:
+        """Decode row i into a new CommitInfo (no tags/branches attached)."""
+        cols, h = self._cols, self.hash_len
+        parents_raw = bytes(
+            cols["parents"][cols["parent_start"][i] * h : cols["parent_start"][i + 1] * h]
+        )
+        sha = self.sha(i)
+        message = self._string(4 * i + 3)
+        subject, _, body = message.partition("\n")
+        return CommitInfo(
+            sha=sha,
+            short_sha=sha[:7],
+            author=self._string(4 * i),
+            author_email=self._string(4 * i + 1),
+            authored_date=_date_from_parts(cols["author_date"][i], cols["author_tz"][i]),
+            committer=self._string(4 * i + 2),
+            committed_date=_date_from_parts(cols["commit_date"][i], cols["commit_tz"][i]),
+            message=message,
+            message_subject=subject.strip(),
+            message_body=body.strip(),
+            parent_shas=[parents_raw[k : k + h].hex() for k in range(0, len(parents_raw), h)],
+            tags=[],
+            branches=[],
+        )
+
+    def commits(self) -> list[CommitInfo]:
+        return [self.commit(i) for i in range(self._count)]
+
+    def diff_stats(self, i: int) -> tuple[list[DiffStat], DiffSummary | None]:
+        """Row i's diff stats against its first parent, and its overflow totals."""
+        cols = self._cols
+        start, end = cols["stat_start"][i], cols["stat_start"][i + 1]
+        stats = [
+            DiffStat(
+                path=self.path_by_id(cols["stat_path"][k]),
+                insertions=cols["stat_ins"][k],
+                deletions=cols["stat_del"][k],
+                is_binary=bool(cols["stat_binary"][k]),
+                renamed_from=self._optional_path(cols["stat_from"][k]),
+            )
+            for k in range(start, end)
+        ]
+        files, ins, dels = cols["overflow"][3 * i : 3 * i + 3]
+        return stats, DiffSummary(files, ins, dels) if files else None
+
+    def file_events(self, i: int) -> list[FileHistoryEntry]:
+        """Row i's file events against its first parent (or the empty tree)."""
+        cols = self._cols
+        sha = self.sha(i)
+        return [
+            FileHistoryEntry(
+                commit_sha=sha,
+                path=self.path_by_id(cols["event_path"][k]),
+                action=chr(cols["event_action"][k]),
+                previous_path=self._optional_path(cols["event_prev"][k]),
+            )
+            for k in range(cols["event_start"][i], cols["event_start"][i + 1])
+        ]
+
+
+def index_options(pathspecs: list[str], max_files_per_commit: int | None) -> dict[str, Any]:
+    """The reader settings the stored diff stats depend on."""
+    return {"pathspecs": list(pathspecs), "max_files_per_commit": max_files_per_commit}
+
+
+def open_index(path: Path) -> HistoryIndex:
+    """Open an index file; raises OSError or ValueError if it is missing or invalid."""
+    return HistoryIndex(path)
+
+
+def verify_index(reader: GitReader, index: HistoryIndex) -> str | None:
+    """Why index cannot be used for reader's repository (None if it can)."""
+    head = reader.rev_parse("HEAD")
+    if head is None:
+        return "the repository has no commits"
+    if len(head) != 2 * index.hash_len:
+        return "the index was built for a different object format"
+    if reader.rev_parse(index.tip) != index.tip:
+        return f"the index tip {index.tip[:12]} is not in this repository"
+    if not reader.is_ancestor(index.tip, head):
+        return f"the index tip {index.tip[:12]} is not an ancestor of HEAD (history rewritten?)"
+    return None
+
+
+def build_index(reader: GitReader, path: Path, *, extend: bool = True) -> tuple[int, int]:
+    """
+    Write an index of every commit reachable from HEAD to path. With extend, an
+    existing index whose tip is an ancestor of HEAD (and that was built with the
+    same pathspecs and cap) is reused and only the newer commits are read from Git.
+    Returns (commits in the index, commits read from Git).
+    """
+    head = reader.rev_parse("HEAD")
+    if head is None:
+        raise ValueError("the repository has no commits")
+    options = index_options(reader.pathspecs, reader.max_files_per_commit)
+    previous: HistoryIndex | None = None
+    if extend and path.exists():
+        try:
+            previous = open_index(path)
+        except (OSError, ValueError):
+            previous = None
+        if previous is not None and (previous.options != options or verify_index(reader, previous)):
+            previous.close()
+            previous = None
+    if previous is not None and previous.tip == head:
+        count = len(previous)
+        previous.close()
+        return count, 0
+
+    rev = f"{previous.tip}..{head}" if previous else head
+    new = list(reader.iter_commits(rev, first_parent=False))
+    reader.prefetch_diff_stats(new, merge_diffs=True)
+    writer = IndexWriter(hash_len=len(head) // 2)
+
+    def add_new(commit: CommitInfo, events: list[FileHistoryEntry]) -> None:
+        writer.add(
+            commit,
+            reader.get_diff_stats(commit.sha),
+            reader.get_diff_overflow(commit.sha),
+            events,
+        )
+
+    if previous is None:
+        for commit, events in reader.iter_first_parent_events(new):
+            add_new(commit, events)
+    else:
+        new_events = dict((c.sha, (c, ev)) for c, ev in reader.iter_first_parent_events(new))
+        # Rows keep git log order, which can interleave new and indexed commits.
+        for sha in reader.run_git("rev-list", head).split():
+            if sha in new_events:
+                add_new(*new_events[sha])
+                continue
+            i = previous.position(sha)
+            if i is None:
+                continue
+            stats, overflow = previous.diff_stats(i)
+            writer.add(previous.commit(i), stats, overflow, previous.file_events(i))
+        previous.close()
+    refs = [[r.name, r.sha or ""] for r in reader.get_refs()]
+    writer.write(path, head, options, refs)
+    return writer.count, len(new)
@@ -0,0 +1,30 @@
+"""
+Lazy re-exports for packages whose submodules are expensive to import.
+"""
+
+from __future__ import annotations
+
+import sys
+from importlib import import_module
+
+
+def lazy_exports(package: str, exports: dict[str, str]):
+    """
+    __getattr__ and __dir__ for a package that re-exports names from its submodules
+    (exports: public name -> defining module) without importing them up front. A
+    submodule is imported when one of its names is first accessed; the value is then
+    stored on the package, so later lookups are plain attribute reads.
+    """
+
+    def __getattr__(name: str):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,196 @@
+"""
+Map-reduce analysis: split the commit list into contiguous shards, analyze each in
+its own process, and merge the partial results in commit order. Every merge is
+associative and order-preserving, so the outputs are identical to a serial run.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TypeVar
+
+from gitscribe.analyzers.architecture import FileEventLog, collect_file_events
+from gitscribe.analyzers.breaking import (
+    BreakingChange,
+    detect_breaking_changes,
+    merge_breaking_changes,
+)
+from gitscribe.analyzers.churn import ChurnCounts, count_churn
+from gitscribe.analyzers.churn_index import ChurnIndex, build_churn_index
+from gitscribe.analyzers.coupling import CoChangeState, count_co_changes
+from gitscribe.analyzers.timeline import TimelineEvent, build_development_timeline, merge_timelines
+from gitscribe.git_reader import CommitInfo, GitReader, PipelineStats
+from gitscribe.plan import AnalysisPlan
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class ShardTask:
+    """One worker's input: a slice of the analyzed commits and of the replayed chain."""
+
+    repo_path: Path
+    include: list[str] | None
+    exclude: list[str] | None
+    max_files_per_commit: int | None
+    plan: AnalysisPlan
+    commits: list[CommitInfo]  # newest first, like the full list
+    chain: list[CommitInfo]  # oldest first, for the architecture file-event log
+    tag_shas: set[str]
+    merge_diffs: bool
+    index_path: Path | None = None  # verified HistoryIndex file, opened by the worker
+    scope: str | None = None  # subproject directory (--path)
+    coupling_method: str = "pairs"
+    metadata_only: bool = False
+
+
+@dataclass
+class ShardResult:
+    """One shard's partial analyzer state (see merge_shard_results)."""
+
+    breaking: list[BreakingChange] = field(default_factory=list)
+    timeline: list[TimelineEvent] = field(default_factory=list)
+    churn: ChurnCounts = field(default_factory=ChurnCounts)
+    churn_index: ChurnIndex | None = None
+    coupling: CoChangeState | None = None
+    file_events: FileEventLog | None = None
+    pipeline_stats: dict[str, PipelineStats] = field(default_factory=dict)
+    git_processes: int = 0
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def split_shards(items: list[_T], shards: int) -> list[list[_T]]:
+    """Split items into at most shards contiguous, nearly equal slices."""
+    shards = max(1, min(shards, len(items)))
+    size, extra = divmod(len(items), shards)
+    out: list[list[_T]] = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        out.append(items[start:end])
+        start = end
+    return out
+
+
+def analyze_shard(task: ShardTask) -> ShardResult:
+    """Run the planned per-commit analyses over one shard (in a worker process)."""
+    reader = GitReader(
+        task.repo_path,
+        include=task.include,
+        exclude=task.exclude,
+        max_files_per_commit=task.max_files_per_commit,
+        scope=task.scope,
+        metadata_only=task.metadata_only,
+    )
+    if task.index_path is not None:
+        from gitscribe.history_index import open_index
+
+        reader.use_index(open_index(task.index_path))
+    plan = task.plan
+    numstat_commits = plan.numstat_commits(task.commits)
+    if numstat_commits:
+        reader.prefetch_diff_stats(numstat_commits, merge_diffs=task.merge_diffs)
+
+    result = ShardResult()
+    if plan.runs("breaking"):
+        result.breaking = detect_breaking_changes(reader, task.commits)
+    if plan.runs("timeline"):
+        result.timeline = build_development_timeline(reader, task.commits, task.tag_shas)
+    if plan.runs("churn"):
+        result.churn = count_churn(reader, task.commits)
+    if plan.runs("release_churn"):
+        result.churn_index = build_churn_index(reader, task.commits)
+    if plan.runs("coupling"):
+        result.coupling = count_co_changes(reader, task.commits, method=task.coupling_method)
+    if plan.runs("architecture") and task.chain:
+        result.file_events = collect_file_events(reader, task.chain)
+    result.pipeline_stats = reader.pipeline_stats
+    reader.close()
+    result.git_processes = reader.git_processes
+    return result
+
+
+def merge_shard_results(parts: list[ShardResult]) -> ShardResult:
+    """Merge shard results given in commit-list order (newest shard first)."""
+    merged = ShardResult(
+        breaking=merge_breaking_changes(p.breaking for p in parts),
+        timeline=merge_timelines(p.timeline for p in parts),
+    )
+    for p in parts:
+        merged.churn.merge(p.churn)
+        if p.coupling is not None:
+            if merged.coupling is None:
+                merged.coupling = p.coupling
+            else:
+                merged.coupling = merged.coupling.merge(p.coupling)
+        for name, stats in p.pipeline_stats.items():
+            merged.pipeline_stats.setdefault(name, PipelineStats(name)).merge(stats)
+        merged.git_processes += p.git_processes
+    # The file-event log and the churn index run oldest first, so their shards
+    # concatenate in reverse.
+    for p in reversed(parts):
+        if p.churn_index is not None:
+            if merged.churn_index is None:
+                merged.churn_index = ChurnIndex()
+            merged.churn_index.extend(p.churn_index)
+        if p.file_events is not None:
+            if merged.file_events is None:
+                merged.file_events = FileEventLog()
+            merged.file_events.extend(p.file_events)
+    return merged
+
+
+def analyze_sharded(
+    reader: GitReader,
+    plan: AnalysisPlan,
+    commits: list[CommitInfo],
+    chain: list[CommitInfo],
+    tag_shas: set[str],
+    *,
+    jobs: int,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    merge_diffs: bool = True,
+    index_path: Path | None = None,
+    coupling_method: str = "pairs",
+) -> ShardResult:
+    """
+    Analyze commits (newest first) and the oldest-first architecture chain in jobs
+    worker processes and merge the results. The newest commit slice is paired with
+    the newest chain slice, so each worker's two shards cover the same period.
+    """
+    commit_shards = split_shards(commits, jobs)
+    chain_shards = split_shards(chain, len(commit_shards)) if chain else []
+    # Newest chain slice first, padded to one slice per task
+    chain_shards.reverse()
+    chain_shards += [[] for _ in range(len(commit_shards) - len(chain_shards))]
+    tasks = [
+        ShardTask(
+            repo_path=reader.repo_path,
+            include=include,
+            exclude=exclude,
+            max_files_per_commit=reader.max_files_per_commit,
+            plan=plan,
+            commits=shard,
+            chain=chain_shards[i],
+            tag_shas=tag_shas,
+            merge_diffs=merge_diffs,
+            index_path=index_path,
+            scope=reader.scope,
+            coupling_method=coupling_method,
+            metadata_only=reader.metadata_only,
+        )
+        for i, shard in enumerate(commit_shards)
+    ]
+    if len(tasks) == 1:
+        parts = [analyze_shard(tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            parts = list(pool.map(analyze_shard, tasks))
+    return merge_shard_results(parts)
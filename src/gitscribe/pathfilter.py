@@ -0,0 +1,297 @@
+"""
+Changed-path Bloom filters: which commits may touch a path, without diffing them.
+
+A commit's filter holds every path its diff against the first parent changes, plus
+all their leading directories, so "may commit C touch sub/dir?" is a few bit
+tests. Filters are read from Git's commit-graph (`git commit-graph write
+--changed-paths`) when present; commits without one get a filter computed once
+(same parameters and hashing as Git) and kept in a cache file next to the other
+gitscribe caches. A Bloom filter has false positives but never false negatives.
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterable
+from pathlib import Path
+
+from gitscribe.git_reader import CommitInfo, GitReader
+
+# Git's defaults (bloom.h)
+NUM_HASHES = 7
+BITS_PER_ENTRY = 10
+MAX_CHANGED_PATHS = 512
+_SEED0 = 0x293AE76F
+_SEED1 = 0x7E646E2C
+_MASK = 0xFFFFFFFF
+
+_CACHE_MAGIC = b"GSBLOOM\0"
+_CACHE_VERSION = 1
+
+
+def _rotl(x: int, r: int) -> int:
+    return ((x << r) | (x >> (32 - r))) & _MASK
+
+
+def murmur3(seed: int, data: bytes) -> int:
+    """32-bit MurmurHash3 as Git computes it for changed-path filters (version 2)."""
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    h = seed
+    n4 = len(data) // 4
+    for (k,) in struct.iter_unpack("<I", data[: n4 * 4]):
+        k = _rotl((k * c1) & _MASK, 15) * c2 & _MASK
+        h = (_rotl(h ^ k, 13) * 5 + 0xE6546B64) & _MASK
+    tail = data[n4 * 4 :]
+    if tail:
+        k = 0
+        for i, b in enumerate(tail):
+            k |= b << (8 * i)
+        k = _rotl((k * c1) & _MASK, 15) * c2 & _MASK
+        h ^= k
+    h ^= len(data)
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & _MASK
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & _MASK
+    h ^= h >> 16
+    return h
+
+
+def key_hashes(key: str, num_hashes: int = NUM_HASHES) -> list[int]:
+    data = key.encode("utf-8", errors="surrogateescape")
+    h0, h1 = murmur3(_SEED0, data), murmur3(_SEED1, data)
+    return [(h0 + i * h1) & _MASK for i in range(num_hashes)]
+
+
+def path_keys(path: str) -> list[str]:
+    """A path and all of its leading directories ("a/b/c" -> a/b/c, a/b, a)."""
+    path = path.strip("/")
+    keys = [path] if path else []
+    while "/" in path:
+        path = path.rsplit("/", 1)[0]
+        keys.append(path)
+    return keys
+
+
+def filter_contains(data: bytes, hashes: list[int]) -> bool | None:
+    """True if the filter may contain the key, False if not, None for no filter."""
+    bits = len(data) * 8
+    if not bits:
+        return None
+    for h in hashes:
+        pos = h % bits
+        if not data[pos >> 3] & (1 << (pos & 7)):
+            return False
+    return True
+
+
+class FilterBuilder:
+    """Computes Git-compatible filters; key hashes are memoized (paths repeat a lot)."""
+
+    def __init__(self) -> None:
+        self._hashes: dict[str, list[int]] = {}
+
+    def build(self, changed_paths: Iterable[str]) -> bytes:
+        files = set(changed_paths)
+        if len(files) > MAX_CHANGED_PATHS:
+            return b"\xff"  # too large: "may contain anything"
+        keys = {k for p in files for k in path_keys(p)}
+        size = max(1, (len(keys) * BITS_PER_ENTRY + 7) // 8)
+        data = bytearray(size)
+        bits = size * 8
+        for key in keys:
+            hashes = self._hashes.get(key)
+            if hashes is None:
+                hashes = self._hashes[key] = key_hashes(key)
+            for h in hashes:
+                pos = h % bits
+                data[pos >> 3] |= 1 << (pos & 7)
+        return bytes(data)
+
+
+class CommitGraphFilters:
+    """
+    The changed-path filters in a repository's commit-graph (a single file or a
+    split chain), looked up by commit SHA through each layer's fanout table.
+    """
+
+    def __init__(
+        self, layers: list[tuple[bytes, int, int, int, int]], num_hashes: int, hash_len: int
+    ):
+        self._layers = layers  # (file bytes, fanout, oid lookup, bloom index, bloom data offsets)
+        self.num_hashes = num_hashes
+        self.hash_len = hash_len
+        self.hash_version = 1
+
+    @classmethod
+    def load(cls, git_dir: Path) -> CommitGraphFilters | None:
+        info = git_dir / "objects" / "info"
+        files = [info / "commit-graph"]
+        chain = info / "commit-graphs" / "commit-graph-chain"
+        try:
+            if chain.exists():
+                names = chain.read_text(encoding="ascii").split()
+                files = [info / "commit-graphs" / f"graph-{h}.graph" for h in names]
+            elif not files[0].exists():
+                return None
+            layers = []
+            num_hashes = NUM_HASHES
+            hash_version = 1
+            hash_len = 20
+            for f in files:
+                data = f.read_bytes()
+                if data[:4] != b"CGPH":
+                    return None
+                hash_len = 32 if data[5] == 2 else 20
+                chunks = {}
+                for i in range(data[6] + 1):
+                    cid, off = struct.unpack_from(">4sQ", data, 8 + 12 * i)
+                    chunks[cid] = off
+                if b"BIDX" not in chunks or b"BDAT" not in chunks:
+                    return None  # written without --changed-paths
+                hash_version, num_hashes, _bits = struct.unpack_from(">III", data, chunks[b"BDAT"])
+                if hash_version not in (1, 2):
+                    return None
+                # BDAT starts with a 12-byte header (version, hash count, bits per entry).
+                bdat = chunks[b"BDAT"] + 12
+                layers.append((data, chunks[b"OIDF"], chunks[b"OIDL"], chunks[b"BIDX"], bdat))
+        except (OSError, ValueError, KeyError, IndexError, struct.error):
+            return None
+        graph = cls(layers, num_hashes, hash_len)
+        graph.hash_version = hash_version
+        return graph
+
+    def get(self, sha: str) -> bytes | None:
+        """The commit's filter, or None if the commit-graph has none for it."""
+        oid = bytes.fromhex(sha)
+        h = self.hash_len
+        for data, fanout, lookup, bidx, bdat in self._layers:
+            lo = struct.unpack_from(">I", data, fanout + 4 * (oid[0] - 1))[0] if oid[0] else 0
+            hi = struct.unpack_from(">I", data, fanout + 4 * oid[0])[0]
+            while lo < hi:
+                mid = (lo + hi) // 2
+                probe = data[lookup + mid * h : lookup + (mid + 1) * h]
+                if probe < oid:
+                    lo = mid + 1
+                elif probe > oid:
+                    hi = mid
+                else:
+                    start = struct.unpack_from(">I", data, bidx + 4 * (mid - 1))[0] if mid else 0
+                    end = struct.unpack_from(">I", data, bidx + 4 * mid)[0]
+                    return data[bdat + start : bdat + end] if end > start else None
+        return None
+
+
+class ChangedPathFilter:
+    """
+    Answers "which of these commits may change path?" from commit-graph filters,
+    then from cached filters, computing (and caching) any that are missing with one
+    bulk diff-tree pass.
+    """
+
+    def __init__(self, reader: GitReader, cache_dir: Path | None) -> None:
+        self.reader = reader
+        self.graph = CommitGraphFilters.load(Path(reader.repo.git_dir))
+        self.cache_path = cache_dir / "changed-paths.bloom" if cache_dir is not None else None
+        self._own: dict[str, bytes] = self._load_cache()
+        self.sources = {"commit-graph": 0, "cache": 0, "computed": 0}
+
+    def _load_cache(self) -> dict[str, bytes]:
+        filters: dict[str, bytes] = {}
+        if self.cache_path is None:
+            return filters
+        try:
+            raw = self.cache_path.read_bytes()
+        except OSError:
+            return filters
+        if raw[:8] != _CACHE_MAGIC or struct.unpack_from("<I", raw, 8)[0] != _CACHE_VERSION:
+            return filters
+        pos = 12
+        try:
+            while pos < len(raw):
+                hash_len, size = struct.unpack_from("<BI", raw, pos)
+                pos += 5
+                sha = raw[pos : pos + hash_len].hex()
+                pos += hash_len
+                filters[sha] = raw[pos : pos + size]
+                pos += size
+        except struct.error:
+            pass  # truncated tail (interrupted write): keep what was complete
+        return filters
+
+    def _save(self, new: dict[str, bytes]) -> None:
+        """Append new filters to the cache file (records never change)."""
+        if self.cache_path is None or not new:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fresh = not self.cache_path.exists()
+            with self.cache_path.open("ab") as fh:
+                if fresh:
+                    fh.write(_CACHE_MAGIC + struct.pack("<I", _CACHE_VERSION))
+                for sha, data in new.items():
+                    oid = bytes.fromhex(sha)
+                    fh.write(struct.pack("<BI", len(oid), len(data)) + oid + data)
+        except OSError:
+            pass
+
+    def _graph_filter(self, sha: str, hashes_v1: list[int] | None) -> tuple[bytes | None, bool]:
+        if self.graph is None:
+            return None, False
+        data = self.graph.get(sha)
+        # Version 1 filters hashed non-ASCII bytes as signed chars; don't trust them then.
+        if data is None or (self.graph.hash_version == 1 and hashes_v1 is None):
+            return None, False
+        return data, True
+
+    def candidates(self, commits: list[CommitInfo], path: str) -> set[str]:
+        """SHAs of the commits whose first-parent diff may change path (a superset)."""
+        keys = path_keys(path)
+        if not keys:
+            return {c.sha for c in commits}
+        graph_safe = all(k.isascii() for k in keys)
+        hashes = [key_hashes(k, self.graph.num_hashes if self.graph else NUM_HASHES) for k in keys]
+        own_hashes = [key_hashes(k) for k in keys]
+        result: set[str] = set()
+        missing: list[CommitInfo] = []
+        for c in commits:
+            data, from_graph = self._graph_filter(c.sha, hashes if graph_safe else None)
+            if from_graph:
+                self.sources["commit-graph"] += 1
+                if _all_contained(data, hashes):
+                    result.add(c.sha)
+                continue
+            data = self._own.get(c.sha)
+            if data is None:
+                missing.append(c)
+                continue
+            self.sources["cache"] += 1
+            if _all_contained(data, own_hashes):
+                result.add(c.sha)
+        if missing:
+            new = self._compute(missing)
+            self.sources["computed"] += len(new)
+            for c in missing:
+                data = new.get(c.sha)
+                if data is None or _all_contained(data, own_hashes):
+                    result.add(c.sha)
+        return result
+
+    def _compute(self, commits: list[CommitInfo]) -> dict[str, bytes]:
+        builder = FilterBuilder()
+        new: dict[str, bytes] = {}
+        for commit, events in self.reader.iter_first_parent_events(commits, scoped=False):
+            paths = [e.path for e in events]
+            paths += [e.previous_path for e in events if e.previous_path]
+            new[commit.sha] = builder.build(paths)
+        self._own.update(new)
+        self._save(new)
+        return new
+
+
+def _all_contained(data: bytes, hashes: list[list[int]]) -> bool:
+    """Every key may be in the filter (no filter at all counts as "may")."""
+    for h in hashes:
+        if filter_contains(data, h) is False:
+            return False
+    return True
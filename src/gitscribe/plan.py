@@ -0,0 +1,82 @@
+"""
+Decide which analyzers and Git data sources a run needs from the requested outputs.
+outputs -> analyzers -> data sources; nothing outside the plan is computed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from gitscribe.git_reader import CommitInfo
+
+OUTPUT_FILES = {
+    "changelog": "CHANGELOG.md",
+    "architecture": "ARCHITECTURE.md",
+    "development": "DEVELOPMENT.md",
+    "summary": "SUMMARY.md",
+}
+DEFAULT_OUTPUTS = ("changelog", "architecture", "development")
+
+# Output document -> analyzers whose results it renders
+OUTPUT_ANALYZERS: dict[str, tuple[str, ...]] = {
+    "changelog": ("breaking", "releases"),
+    "architecture": ("architecture",),
+    "development": ("timeline",),
+    "summary": ("churn", "release_churn", "coupling", "hotspots"),
+}
+
+# Analyzer -> Git data it reads. "numstat:unmatched" means line counts only for
+# commits whose message does not already mark them as breaking; "tree_diff" is one
+# tag-to-tag diff per release; "blob_sizes" is one tree listing plus object-header
+# size lookups.
+ANALYZER_SOURCES: dict[str, tuple[str, ...]] = {
+    "breaking": ("commits", "numstat:unmatched"),
+    "releases": ("commits", "tree_diff"),
+    "architecture": ("commits", "file_events", "blob_sizes"),
+    "timeline": ("commits", "numstat"),
+    "churn": ("commits", "numstat"),
+    "release_churn": ("commits", "numstat"),
+    "coupling": ("commits", "numstat"),
+    "hotspots": ("commits", "numstat", "blob_sizes"),
+}
+
+
+@dataclass(frozen=True)
+class AnalysisPlan:
+    """The outputs to write and everything they transitively depend on."""
+
+    outputs: tuple[str, ...]
+    analyzers: frozenset[str]
+    sources: frozenset[str]
+
+    def runs(self, analyzer: str) -> bool:
+        return analyzer in self.analyzers
+
+    def numstat_commits(self, commits: list[CommitInfo]) -> list[CommitInfo]:
+        """The commits whose line counts some planned analyzer will read."""
+        if "numstat" in self.sources:
+            return commits
+        if "numstat:unmatched" in self.sources:
+            from gitscribe.analyzers.breaking import breaking_message_evidence
+
+            return [c for c in commits if not breaking_message_evidence(c)]
+        return []
+
+
+def parse_outputs(spec: str) -> tuple[str, ...]:
+    """Parse a comma-separated --only value; raises ValueError on unknown names."""
+    names = tuple(dict.fromkeys(n.strip().lower() for n in spec.split(",") if n.strip()))
+    unknown = [n for n in names if n not in OUTPUT_FILES]
+    if unknown or not names:
+        raise ValueError(
+            f"unknown output(s): {', '.join(unknown) or '(none)'}; "
+            f"choose from {', '.join(OUTPUT_FILES)}"
+        )
+    return names
+
+
+def plan_for_outputs(outputs: tuple[str, ...]) -> AnalysisPlan:
+    """Resolve outputs to the analyzers and data sources they need."""
+    analyzers = frozenset(a for o in outputs for a in OUTPUT_ANALYZERS[o])
+    sources = frozenset(s for a in analyzers for s in ANALYZER_SOURCES[a])
+    return AnalysisPlan(outputs=outputs, analyzers=analyzers, sources=sources)
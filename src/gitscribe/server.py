@@ -0,0 +1,378 @@
+"""
+Local query server (gitscribe serve): keeps each repository's commits, diff stats
+and analyzer results in memory and answers queries over HTTP, on a TCP port or a
+Unix socket. Before answering, a repository whose refs moved is refreshed; when
+HEAD only moved forward, just the new commits are read and analyzed.
+
+    GET /                                       the repositories being served
+    GET /<repo>/changelog?from=REV&to=REV       changelog Markdown for a commit range
+    GET /<repo>/churn?path=P&since=WHEN&top=N   most changed files (or between=OLD..NEW)
+    GET /<repo>/breaking?since=REV              breaking changes after a revision
+    GET /<repo>/architecture?rev=REV            module structure at a revision
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from gitscribe import __version__
+from gitscribe.analyzers.architecture import (
+    ArchitectureEvolution,
+    ArchitectureSnapshot,
+    DirectoryReplay,
+    FileEventLog,
+    measure_snapshot_sizes,
+)
+from gitscribe.analyzers.breaking import BreakingChange, detect_breaking_changes
+from gitscribe.analyzers.churn_index import (
+    ChurnIndex,
+    ChurnWindow,
+    build_churn_index,
+    parse_since,
+)
+from gitscribe.git_reader import CommitInfo, GitReader
+
+REFRESH_INTERVAL = 2.0  # seconds between ref checks of one repository
+
+
+class QueryError(Exception):
+    """A query that cannot be answered; status is the HTTP status to reply with."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class RepoState:
+    """
+    One served repository: its commits (newest first), tags, breaking changes and
+    churn index, kept current by refresh(). Queries and refreshes hold the lock.
+    """
+
+    def __init__(
+        self,
+        reader: GitReader,
+        *,
+        name: str,
+        full_history: bool = False,
+        max_commits: int | None = None,
+        refresh_interval: float = REFRESH_INTERVAL,
+        size_cache=None,
+    ) -> None:
+        self.reader = reader
+        self.name = name
+        self.full_history = full_history
+        self.max_commits = max_commits
+        self.refresh_interval = refresh_interval
+        self.size_cache = size_cache
+        self.lock = threading.Lock()
+        self.commits: list[CommitInfo] = []
+        self.tags_by_sha: dict[str, list[str]] = {}
+        self.breaking: list[BreakingChange] = []
+        self.churn = ChurnIndex()
+        self.loads = {"full": 0, "incremental": 0}
+        self._positions: dict[str, int] = {}  # sha -> index in commits
+        self._snapshots: dict[str, ArchitectureSnapshot] = {}  # by commit SHA (immutable)
+        self._fingerprint: str | None = None
+        self._checked = 0.0
+
+    def refresh(self, *, force: bool = False) -> str | None:
+        """
+        Reload if HEAD or any ref moved (checked at most every refresh_interval
+        seconds unless force). Returns "full", "incremental", "refs" or None.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.refresh_interval:
+            return None
+        self._checked = now
+        fingerprint = self.reader.refs_fingerprint()
+        if fingerprint == self._fingerprint:
+            return None
+        self._fingerprint = fingerprint
+
+        merge_diffs = not self.full_history
+        new = self._new_commits()
+        if new is None:
+            kind = "full"
+            commits = self.reader.get_all_commits(first_parent=not self.full_history)
+            if self.max_commits:
+                commits = commits[: self.max_commits]
+            self.reader.prefetch_diff_stats(commits, merge_diffs=merge_diffs)
+            self.churn = build_churn_index(self.reader, commits)
+            self.breaking = detect_breaking_changes(self.reader, commits)
+            self.commits = commits
+        elif new:
+            kind = "incremental"
+            self.reader.prefetch_diff_stats(new, merge_diffs=merge_diffs)
+            self.churn.extend(build_churn_index(self.reader, new))
+            self.breaking = detect_breaking_changes(self.reader, new) + self.breaking
+            self.commits = new + self.commits
+        else:
+            kind = "refs"  # only tags or other branches moved
+        self.reader.reload_refs(self.commits)
+        self.loads[kind] = self.loads.get(kind, 0) + 1
+        self.tags_by_sha = {}
+        for t in self.reader.get_tags():
+            if t.sha:
+                self.tags_by_sha.setdefault(t.sha, []).append(t.name)
+        self._positions = {c.sha: i for i, c in enumerate(self.commits)}
+        return kind
+
+    def _new_commits(self) -> list[CommitInfo] | None:
+        """Commits added on top of the loaded history, or None if it must be reloaded."""
+        if not self.commits:
+            return None
+        head = self.reader.rev_parse("HEAD")
+        old = self.commits[0].sha
+        if head is None or not self.reader.is_ancestor(old, head):
+            return None
+        if head == old:
+            return []
+        new = list(self.reader.iter_commits(f"{old}..{head}", first_parent=not self.full_history))
+        if not new or (not self.full_history and new[-1].parent_shas[:1] != [old]):
+            return None  # the old HEAD is not on the new first-parent chain
+        if self.max_commits and len(new) + len(self.commits) > self.max_commits:
+            return None
+        return new
+
+    # --- queries (call with the lock held, after refresh) ---------------------------
+
+    def resolve(self, rev: str) -> str:
+        sha = self.reader.rev_parse(rev)
+        if sha is None:
+            raise QueryError(f"unknown revision: {rev}", 404)
+        return sha
+
+    def position(self, rev: str) -> int:
+        """Index of rev in the loaded commits (newest first)."""
+        i = self._positions.get(self.resolve(rev))
+        if i is None:
+            raise QueryError(f"{rev} is not on the analyzed history")
+        return i
+
+    def commit_range(self, old: str | None, new: str = "HEAD") -> list[CommitInfo]:
+        """The loaded commits after old up to and including new (newest first)."""
+        end = self.position(old) if old else len(self.commits)
+        return self.commits[self.position(new) : end]
+
+    def changelog(self, old: str | None, new: str = "HEAD") -> str:
+        from gitscribe.generators.changelog import generate_changelog_md
+
+        commits = self.commit_range(old, new)
+        shas = {c.sha for c in commits}
+        return generate_changelog_md(
+            commits,
+            {sha: names for sha, names in self.tags_by_sha.items() if sha in shas},
+            [b for b in self.breaking if b.commit_sha in shas],
+            self.name,
+            full_history=self.full_history,
+        )
+
+    def churn_window(
+        self, *, path: str = "", since: str | None = None, between: str | None = None, top: int = 20
+    ) -> ChurnWindow:
+        if since and between:
+            raise QueryError("give since or between, not both")
+        if between:
+            old, sep, new = between.partition("..")
+            if not sep or not new:
+                raise QueryError("between must look like OLD..NEW")
+            start = self.churn.position(self.resolve(old)) if old else None
+            end = self.churn.position(self.resolve(new))
+            if end is None:
+                raise QueryError(f"{new} is not on the analyzed history")
+            return self.churn.window(
+                0 if start is None else start + 1, end + 1, label=between, top_n=top, scope=path
+            )
+        if since:
+            try:
+                when = parse_since(since)
+            except ValueError as e:
+                raise QueryError(str(e)) from None
+            return self.churn.since(when, label=f"since {since}", top_n=top, scope=path)
+        return self.churn.window(0, len(self.churn), label="all", top_n=top, scope=path)
+
+    def breaking_since(self, old: str | None) -> list[BreakingChange]:
+        shas = {c.sha for c in self.commit_range(old)}
+        return [b for b in self.breaking if b.commit_sha in shas]
+
+    def architecture(self, rev: str = "HEAD") -> ArchitectureSnapshot:
+        """Top-level modules at rev (any commit, not only analyzed ones), memoized by SHA."""
+        sha = self.resolve(rev)
+        snap = self._snapshots.get(sha)
+        if snap is None:
+            commit = next(self.reader.iter_commits(sha, max_count=1), None)
+            display = self.tags_by_sha.get(sha, [commit.short_sha if commit else sha[:7]])[0]
+            date = ""
+            if commit is not None and commit.authored_date:
+                date = commit.authored_date.strftime("%Y-%m-%d")
+            replay = DirectoryReplay(self.reader.get_file_paths_at_rev(sha))
+            snap = replay.snapshot(sha, display, date)
+            evolution = ArchitectureEvolution([snap], FileEventLog(), [])
+            measure_snapshot_sizes(self.reader, evolution, size_cache=self.size_cache)
+            self._snapshots[sha] = snap
+        return snap
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "path": str(self.reader.repo_path),
+            "head": self.commits[0].sha if self.commits else None,
+            "commits": len(self.commits),
+            "tags": sum(len(names) for names in self.tags_by_sha.values()),
+            "loads": dict(self.loads),
+        }
+
+
+def handle_query(
+    repos: dict[str, RepoState], parts: list[str], params: dict[str, str]
+) -> tuple[str, str]:
+    """Answer GET /<parts>?<params>; returns (content type, body). Raises QueryError."""
+    if not parts:
+        states = []
+        for state in repos.values():
+            with state.lock:
+                state.refresh()
+                states.append(state.describe())
+        return "application/json", json.dumps({"repositories": states})
+    state = repos.get(parts[0])
+    if state is None:
+        raise QueryError(f"no repository named {parts[0]!r}", 404)
+    query = parts[1] if len(parts) == 2 else None
+    try:
+        top = int(params.get("top", "20"))
+    except ValueError:
+        raise QueryError("top must be a number") from None
+
+    with state.lock:
+        state.refresh()
+        if query == "changelog":
+            text = state.changelog(params.get("from"), params.get("to", "HEAD"))
+            return "text/markdown; charset=utf-8", text
+        if query == "churn":
+            window = state.churn_window(
+                path=params.get("path", "").strip("/"),
+                since=params.get("since"),
+                between=params.get("between"),
+                top=top,
+            )
+            return "application/json", json.dumps(asdict(window))
+        if query == "breaking":
+            found = state.breaking_since(params.get("since"))
+            return "application/json", json.dumps([asdict(b) for b in found])
+        if query == "architecture":
+            snap = state.architecture(params.get("rev", "HEAD"))
+            return "application/json", json.dumps(asdict(snap))
+    raise QueryError(f"unknown query: /{'/'.join(parts)}", 404)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = f"gitscribe/{__version__}"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            status, (content_type, body) = 200, handle_query(self.server.repos, parts, params)
+        except QueryError as e:
+            status, content_type, body = e.status, "application/json", json.dumps({"error": str(e)})
+        except Exception as e:  # keep serving; report the failure to the client
+            status, content_type, body = 500, "application/json", json.dumps({"error": repr(e)})
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """Remove a socket left at path by an earlier server; refuse to remove anything else."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    path.unlink()
+
+
+def create_server(
+    repos: dict[str, RepoState],
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Path | None = None,
+    quiet: bool = False,
+) -> socketserver.BaseServer:
+    """
+    Load every repository and bind the server (call serve_forever() to answer).
+    A socket left at socket_path is replaced; any other file there raises
+    FileExistsError before anything is loaded.
+    """
+    if socket_path is not None:
+        _remove_stale_socket(socket_path)
+    for state in repos.values():
+        with state.lock:
+            state.refresh(force=True)
+    if socket_path is not None:
+        server = _UnixServer(str(socket_path), _Handler)
+    else:
+        server = _TCPServer((host, port), _Handler)
+    server.repos = repos
+    server.quiet = quiet
+    return server
+
+
+def serve(
+    repos: dict[str, RepoState],
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Path | None = None,
+    quiet: bool = False,
+) -> None:
+    """Load every repository, then answer queries until interrupted."""
+    server = create_server(repos, host=host, port=port, socket_path=socket_path, quiet=quiet)
+    if socket_path is not None:
+        where = f"unix:{socket_path}"
+    else:
+        where = f"http://{host}:{server.server_address[1]}/"
+    if not quiet:
+        names = ", ".join(f"{s.name} ({len(s.commits)} commits)" for s in repos.values())
+        print(f"GitScribe: serving {names} on {where}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for state in repos.values():
+            state.reader.close()
+        if socket_path is not None and socket_path.exists():
+            os.unlink(socket_path)
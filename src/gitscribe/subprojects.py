@@ -0,0 +1,137 @@
+"""
+Path-scoped (subproject) analysis. A scoped GitReader restricts Git itself to one
+directory; a ScopedReader instead filters the results a whole-repository reader
+already holds, so batch mode analyzes many subprojects from one history pass.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from gitscribe.git_reader import (
+    CommitInfo,
+    DiffStat,
+    DiffSummary,
+    FileHistoryEntry,
+    GitReader,
+    in_scope,
+    normalize_scope,
+)
+
+
+def commits_in_scope(
+    reader: GitReader | ScopedReader, commits: list[CommitInfo]
+) -> list[CommitInfo]:
+    """
+    The commits that change something in the reader's scope, plus tagged commits
+    (they mark the releases). Diff stats must already be cached for every commit.
+    """
+    return [c for c in commits if c.tags or reader.get_diff_stats(c.sha)]
+
+
+class ScopedReader:
+    """
+    A read-only view of a whole-repository GitReader, restricted to one directory.
+    Provides what the analyzers use; paths stay relative to the repository root.
+    Files a commit has beyond max_files_per_commit are only known as totals, so
+    they are not attributed to any scope.
+    """
+
+    def __init__(self, base: GitReader, scope: str) -> None:
+        self.base = base
+        self.scope = normalize_scope(scope)
+        self.pathspecs = base.pathspecs + [self.scope]
+        self.max_files_per_commit = base.max_files_per_commit
+        self.metadata_only = base.metadata_only
+        self.repo = base.repo
+        self.repo_path = base.repo_path
+        self.pipeline_stats = base.pipeline_stats
+        self._diff_stats: dict[str, list[DiffStat]] = {}
+
+    @property
+    def cache_dir(self) -> Path:
+        return self.base.cache_dir
+
+    @property
+    def git_processes(self) -> int:
+        return self.base.git_processes
+
+    def close(self) -> None:
+        self.base.close()
+
+    def _filter(self, stats: list[DiffStat]) -> list[DiffStat]:
+        scope = self.scope
+        return [s for s in stats if in_scope(s.path, scope)]
+
+    def prefetch_diff_stats(self, commits: list[CommitInfo], *, merge_diffs: bool = True) -> None:
+        self.base.prefetch_diff_stats(commits, merge_diffs=merge_diffs)
+
+    def get_diff_stats(self, commit_sha: str, parent_sha: str | None = None) -> list[DiffStat]:
+        if parent_sha is not None:
+            return self._filter(self.base.get_diff_stats(commit_sha, parent_sha))
+        stats = self._diff_stats.get(commit_sha)
+        if stats is None:
+            stats = self._filter(self.base.get_diff_stats(commit_sha))
+            self._diff_stats[commit_sha] = stats
+        return stats
+
+    def get_diff_overflow(self, commit_sha: str) -> DiffSummary | None:
+        return None
+
+    def get_diff_totals(self, commit_sha: str) -> DiffSummary:
+        stats = self.get_diff_stats(commit_sha)
+        return DiffSummary(
+            files=len(stats),
+            insertions=sum(s.insertions for s in stats),
+            deletions=sum(s.deletions for s in stats),
+        )
+
+    def prefetch_tree_diffs(self, pairs: Iterable[tuple[str | None, str]]) -> None:
+        self.base.prefetch_tree_diffs(pairs)
+
+    def get_tree_diff_stats(self, old_rev: str | None, new_rev: str) -> list[DiffStat]:
+        return self._filter(self.base.get_tree_diff_stats(old_rev, new_rev))
+
+    def get_tree_diff_totals(self, old_rev: str | None, new_rev: str) -> DiffSummary:
+        stats = self.get_tree_diff_stats(old_rev, new_rev)
+        return DiffSummary(
+            files=len(stats),
+            insertions=sum(s.insertions for s in stats),
+            deletions=sum(s.deletions for s in stats),
+        )
+
+    def get_file_paths_at_rev(self, rev: str = "HEAD") -> list[str]:
+        return [p for p in self.base.get_file_paths_at_rev(rev) if in_scope(p, self.scope)]
+
+    def get_tree_blobs(self, rev: str = "HEAD") -> dict[str, str]:
+        blobs = self.base.get_tree_blobs(rev)
+        return {p: sha for p, sha in blobs.items() if in_scope(p, self.scope)}
+
+    def iter_tree_changes(
+        self, pairs: list[tuple[str, str]]
+    ) -> Iterator[list[tuple[str, str | None]]]:
+        for changes in self.base.iter_tree_changes(pairs):
+            yield [(p, sha) for p, sha in changes if in_scope(p, self.scope)]
+
+    def get_blob_sizes(self, blob_shas: Iterable[str], cache=None) -> dict[str, int]:
+        return self.base.get_blob_sizes(blob_shas, cache)
+
+    def iter_file_events(
+        self, commits: list[CommitInfo]
+    ) -> Iterator[tuple[CommitInfo, list[FileHistoryEntry]]]:
+        for c, events in self.base.iter_file_events(commits):
+            yield c, [
+                e for e in events
+                if in_scope(e.path, self.scope) or in_scope(e.previous_path, self.scope)
+            ]
+
+
+def read_scope_list(path: Path) -> list[str]:
+    """Subproject directories from a file: one per line, '#' starts a comment."""
+    scopes: list[str] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        scope = normalize_scope(line.split("#", 1)[0])
+        if scope and scope not in scopes:
+            scopes.append(scope)
+    return scopes
@@ -0,0 +1,106 @@
+"""
+Shared fixtures: small Git repositories built commit by commit with fixed dates.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from gitscribe.git_reader import CommitInfo
+
+_ENV = {
+    "GIT_AUTHOR_NAME": "Test Author",
+    "GIT_AUTHOR_EMAIL": "author@example.com",
+    "GIT_COMMITTER_NAME": "Test Author",
+    "GIT_COMMITTER_EMAIL": "author@example.com",
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+
+def git(path: Path, *args: str, env: dict[str, str] | None = None) -> str:
+    """Run git in path and return its stdout (without the trailing newline)."""
+    result = subprocess.run(
+        ["git", "-C", str(path), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, **_ENV, **(env or {})},
+    )
+    return result.stdout.rstrip("\n")
+
+
+def make_commit(
+    sha: str, message: str = "change", parents: list[str] | None = None, day: int = 0
+) -> CommitInfo:
+    """A CommitInfo without a repository, for analyzers that only read metadata."""
+    date = datetime(2024, 1, 1, 12, tzinfo=timezone.utc) + timedelta(days=day)
+    subject, _, body = message.partition("\n\n")
+    return CommitInfo(
+        sha=sha,
+        short_sha=sha[:7],
+        author="Test Author",
+        author_email="author@example.com",
+        authored_date=date,
+        committer="Test Author",
+        committed_date=date,
+        message=message,
+        message_subject=subject,
+        message_body=body,
+        parent_shas=parents or [],
+    )
+
+
+class RepoBuilder:
+    """A Git repository on branch main; every commit is one day after the previous one."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        git(path, "init", "-q", "-b", "main")
+        self._day = 0
+
+    def git(self, *args: str) -> str:
+        return git(self.path, *args)
+
+    def commit(self, message: str, files: dict[str, str | None]) -> str:
+        """Write files (None deletes one), commit them, and return the new commit SHA."""
+        for name, content in files.items():
+            target = self.path / name
+            if content is None:
+                target.unlink()
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(content, encoding="utf-8")
+        self.git("add", "-A")
+        return self._commit("commit", "-q", "--allow-empty", "-m", message)
+
+    def merge(self, branch: str, message: str) -> str:
+        """Merge branch into the checked-out branch with a merge commit."""
+        return self._commit("merge", "-q", "--no-ff", "-m", message, branch)
+
+    def _commit(self, *args: str) -> str:
+        self._day += 1
+        git(self.path, *args, env=self._dates())
+        return self.git("rev-parse", "HEAD")
+
+    def _dates(self) -> dict[str, str]:
+        stamp = f"{1704110400 + self._day * 86400} +0000"  # 2024-01-01 12:00 UTC + days
+        return {"GIT_AUTHOR_DATE": stamp, "GIT_COMMITTER_DATE": stamp}
+
+    def tag(self, name: str, rev: str = "HEAD", message: str | None = None) -> None:
+        """A lightweight tag, or an annotated one (dated like the last commit) with message."""
+        if message is None:
+            self.git("tag", name, rev)
+        else:
+            git(self.path, "tag", "-a", name, "-m", message, rev, env=self._dates())
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> RepoBuilder:
+    return RepoBuilder(tmp_path / "repo")
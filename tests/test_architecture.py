@@ -0,0 +1,46 @@
+"""ARCHITECTURE.md: the module table of the current structure."""
+
+from __future__ import annotations
+
+from gitscribe.analyzers.architecture import (
+    ArchitectureEvolution,
+    ArchitectureSnapshot,
+    FileEventLog,
+    ModuleNode,
+)
+from gitscribe.generators.architecture import generate_architecture_md
+
+
+def _module_table(sizes: dict[str, int | None]) -> list[str]:
+    modules = {name: ModuleNode(name, 3, None, None, size=size) for name, size in sizes.items()}
+    modules["src/inner"] = ModuleNode("src/inner", 1, None, None, size=10)
+    snap = ArchitectureSnapshot(
+        rev="HEAD",
+        rev_display="HEAD",
+        date="2024-01-01",
+        top_level_dirs=sorted(sizes),
+        modules=modules,
+        total_files=6,
+    )
+    doc = generate_architecture_md(ArchitectureEvolution([snap], FileEventLog(), []))
+    lines = doc.splitlines()
+    start = lines.index("### Top-level modules") + 2
+    return lines[start : lines.index("", start)]
+
+
+def test_module_table_has_a_header_with_sizes():
+    assert _module_table({"src": 2048, "docs": 0}) == [
+        "| Module | Files | Size |",
+        "|--------|-------|------|",
+        "| `docs/` | 3 | 0 B |",
+        "| `src/` | 3 | 2.0 KiB |",
+    ]
+
+
+def test_module_table_drops_the_size_column_when_sizes_are_missing():
+    assert _module_table({"src": None, "docs": None}) == [
+        "| Module | Files |",
+        "|--------|-------|",
+        "| `docs/` | 3 |",
+        "| `src/` | 3 |",
+    ]
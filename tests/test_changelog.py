@@ -0,0 +1,91 @@
+"""CHANGELOG.md sections: which commits each release lists, and cached sections."""
+
+from __future__ import annotations
+
+import json
+import re
+
+import pytest
+
+from gitscribe.cache import JsonCache
+from gitscribe.generators import changelog
+from gitscribe.generators.changelog import generate_changelog_md
+from gitscribe.git_reader import GitReader
+
+
+def _sections(md: str) -> dict[str, list[str]]:
+    """Section title ("Unreleased", "v1.0") -> commit subjects listed in it."""
+    sections: dict[str, list[str]] = {}
+    current = None
+    for line in md.splitlines():
+        title = re.match(r"## \[([^\]]+)\]", line)
+        if title:
+            current = sections.setdefault(title.group(1), [])
+        elif current is not None and line.startswith("- "):
+            current.append(re.sub(r" \(`[0-9a-f]+`\)$", "", line[2:]).strip("*"))
+    return sections
+
+
+def _load(path, *, first_parent=True):
+    with GitReader(path) as reader:
+        commits = reader.get_all_commits(first_parent=first_parent)
+        tags: dict[str, list[str]] = {}
+        for t in reader.get_tags():
+            tags.setdefault(t.sha, []).append(t.name)
+    return commits, tags
+
+
+@pytest.fixture
+def linear_repo(repo):
+    repo.commit("one", {"a.txt": "1\n"})
+    repo.tag("v1.0")
+    repo.commit("two", {"a.txt": "2\n"})
+    repo.commit("three", {"a.txt": "3\n"})
+    repo.tag("v2.0", message="Release 2.0")
+    repo.commit("four", {"a.txt": "4\n"})
+    return repo
+
+
+def test_each_release_lists_its_tag_commit(linear_repo):
+    commits, tags = _load(linear_repo.path)
+    sections = _sections(generate_changelog_md(commits, tags, []))
+    assert sections == {
+        "Unreleased": ["four"],
+        "v2.0": ["three", "two"],
+        "v1.0": ["one"],
+    }
+
+
+def test_full_history_lists_every_commit_once(repo):
+    repo.commit("base", {"a.txt": "1\n"})
+    repo.tag("v1.0")
+    repo.git("checkout", "-q", "-b", "feature")
+    repo.commit("feature work", {"b.txt": "1\n"})
+    repo.tag("feature-tag")
+    repo.git("checkout", "-q", "main")
+    repo.commit("main work", {"a.txt": "2\n"})
+    repo.merge("feature", "Merge feature")
+    repo.tag("v2.0")
+    commits, tags = _load(repo.path, first_parent=False)
+    sections = _sections(generate_changelog_md(commits, tags, [], full_history=True))
+    assert sections == {
+        "Unreleased": [],
+        "v2.0": ["Merge feature", "main work"],
+        "feature-tag": ["feature work"],
+        "v1.0": ["base"],
+    }
+
+
+def test_template_version_invalidates_cached_sections(linear_repo, tmp_path, monkeypatch):
+    commits, tags = _load(linear_repo.path)
+    path = tmp_path / "sections.json"
+    fresh = generate_changelog_md(commits, tags, [], section_cache=JsonCache(path))
+
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    assert doc["entries"]  # the finished release v1.0..v2.0 was cached
+    doc["entries"] = {key: ["CACHED\n"] for key in doc["entries"]}
+    path.write_text(json.dumps(doc), encoding="utf-8")
+    assert "CACHED" in generate_changelog_md(commits, tags, [], section_cache=JsonCache(path))
+
+    monkeypatch.setattr(changelog, "TEMPLATE_VERSION", changelog.TEMPLATE_VERSION + 1)
+    assert generate_changelog_md(commits, tags, [], section_cache=JsonCache(path)) == fresh
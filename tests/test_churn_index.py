@@ -0,0 +1,127 @@
+"""Windowed churn: prefix-sum windows against a direct count."""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+
+import pytest
+from conftest import make_commit
+
+from gitscribe.analyzers.churn_index import ChurnIndex, parse_since, release_churn
+from gitscribe.git_reader import DiffStat
+
+_PATHS = ["src/a.py", "src/b.py", "src/sub/c.py", "docs/d.md", "e.txt"]
+
+
+def _history(n: int = 120, seed: int = 3):
+    """(commit, stats) oldest first; commit dates go backwards now and then (rebases)."""
+    rng = random.Random(seed)
+    history = []
+    for i in range(n):
+        day = i - 5 if i % 17 == 0 else i
+        commit = make_commit(f"{i:040x}", parents=[f"{i - 1:040x}"] if i else [], day=day)
+        stats = [
+            DiffStat(p, rng.randint(0, 50), rng.randint(0, 50), False)
+            for p in rng.sample(_PATHS, rng.randint(0, 3))
+        ]
+        history.append((commit, stats))
+    return history
+
+
+def _direct(history, start, end, scope=""):
+    totals: dict[str, list[int]] = {}
+    for _, stats in history[start:end]:
+        for s in stats:
+            if scope and not (s.path == scope or s.path.startswith(scope + "/")):
+                continue
+            t = totals.setdefault(s.path, [0, 0, 0])
+            t[0] += 1
+            t[1] += s.insertions
+            t[2] += s.deletions
+    return {p: tuple(t) for p, t in totals.items()}
+
+
+def _window_totals(window):
+    return {
+        fc.path: (fc.commit_count, fc.total_insertions, fc.total_deletions)
+        for fc in window.file_churns
+    }
+
+
+def _index(history) -> ChurnIndex:
+    index = ChurnIndex()
+    for commit, stats in history:
+        index.add(commit, stats)
+    return index
+
+
+def test_every_window_matches_a_direct_count():
+    history = _history()
+    index = _index(history)
+    rng = random.Random(11)
+    bounds = [(0, len(history)), (0, 0), (40, 41)] + [
+        tuple(sorted(rng.sample(range(len(history) + 1), 2))) for _ in range(50)
+    ]
+    for start, end in bounds:
+        window = index.window(start, end, top_n=100)
+        assert _window_totals(window) == _direct(history, start, end), (start, end)
+        assert window.commits == end - start
+    scoped = index.window(10, 90, top_n=100, scope="src")
+    assert _window_totals(scoped) == _direct(history, 10, 90, scope="src")
+
+
+def test_between_is_exclusive_of_old_and_inclusive_of_new():
+    history = _history()
+    index = _index(history)
+    shas = [c.sha for c, _ in history]
+    window = index.between(shas[19], shas[59], top_n=100)
+    assert _window_totals(window) == _direct(history, 20, 60)
+    assert (window.start, window.end) == (shas[19], shas[59])
+    assert _window_totals(index.between(None, shas[9], top_n=100)) == _direct(history, 0, 10)
+    with pytest.raises(KeyError):
+        index.between("f" * 40, shas[9])
+
+
+def test_extended_index_equals_one_built_in_one_pass():
+    history = _history()
+    whole = _index(history)
+    joined = _index(history[:50]).extend(_index(history[50:]))
+    assert joined.shas == whole.shas
+    assert list(joined.dates) == list(whole.dates)
+    for start, end in [(0, 120), (30, 70), (50, 51), (49, 50)]:
+        expected = _window_totals(whole.window(start, end, top_n=100))
+        assert _window_totals(joined.window(start, end, top_n=100)) == expected
+
+
+def test_since_uses_the_running_maximum_of_commit_dates():
+    history = _history()
+    index = _index(history)
+    when = datetime(2024, 3, 1, tzinfo=timezone.utc)  # day 60 after 2024-01-01
+    start = index.position_at(when)
+    assert start == 60
+    window = index.since(when, top_n=100)
+    assert _window_totals(window) == _direct(history, 60, len(history))
+    assert _window_totals(index.since(datetime(2030, 1, 1, tzinfo=timezone.utc))) == {}
+
+
+def test_parse_since():
+    now = datetime(2024, 6, 30, tzinfo=timezone.utc)
+    assert parse_since("30d", now) == datetime(2024, 5, 31, tzinfo=timezone.utc)
+    assert parse_since("2w", now) == datetime(2024, 6, 16, tzinfo=timezone.utc)
+    assert parse_since("2024-01-31") == datetime(2024, 1, 31, tzinfo=timezone.utc)
+    with pytest.raises(ValueError, match="not a date or span"):
+        parse_since("yesterday")
+
+
+def test_release_churn_windows_span_consecutive_tags():
+    history = _history(30)
+    index = _index(history)
+    commits = [c for c, _ in reversed(history)]  # newest first, like the commit list
+    tags = {history[9][0].sha: ["v1.0"], history[24][0].sha: ["v2.0"]}
+    windows = release_churn(index, commits, tags, top_n=100)
+    assert [(w.label, w.start, w.end, w.commits) for w in windows] == [
+        ("v2.0", "v1.0", "v2.0", 15),
+        ("v1.0", "", "v1.0", 10),
+    ]
+    assert _window_totals(windows[0]) == _direct(history, 10, 25)
@@ -0,0 +1,81 @@
+"""The documentation run: files written to the output directory."""
+
+from __future__ import annotations
+
+import pytest
+from conftest import git
+
+from gitscribe.cli import main
+
+
+@pytest.fixture
+def tagged_repo(repo):
+    repo.commit("feat: one", {"a.txt": "1\n"})
+    repo.tag("v1.0")
+    repo.commit("feat: two", {"a.txt": "2\n"})
+    repo.tag("v2.0")
+    return repo
+
+
+def _pages(directory) -> set[str]:
+    return {p.name for p in directory.glob("*.md")}
+
+
+def test_resplit_removes_generated_pages_and_keeps_user_files(tagged_repo, tmp_path):
+    out = tmp_path / "docs"
+    assert main([str(tagged_repo.path), "-o", str(out), "--split-by", "release", "-q"]) == 0
+    assert _pages(out / "changelog") == {"v1.0.md", "v2.0.md"}
+    (out / "changelog" / "NOTES.md").write_text("# Hand-written notes\n", encoding="utf-8")
+
+    assert main([str(tagged_repo.path), "-o", str(out), "--split-by", "year", "-q"]) == 0
+    assert _pages(out / "changelog") == {"2024.md", "NOTES.md"}
+    notes = (out / "changelog" / "NOTES.md").read_text(encoding="utf-8")
+    assert notes == "# Hand-written notes\n"
+
+
+def test_pages_of_deleted_tags_are_removed(tagged_repo, tmp_path):
+    out = tmp_path / "docs"
+    main([str(tagged_repo.path), "-o", str(out), "--split-by", "release", "-q"])
+    tagged_repo.git("tag", "-d", "v1.0")
+    main([str(tagged_repo.path), "-o", str(out), "--split-by", "release", "-q"])
+    assert _pages(out / "changelog") == {"v2.0.md"}
+
+
+def test_single_branch_run_matches_a_plain_run(repo, tmp_path):
+    repo.commit("feat: a", {"a.txt": "a\n"})
+    repo.tag("v0.3")
+    repo.git("checkout", "-q", "-b", "side")
+    repo.commit("feat: side work", {"s.txt": "s\n"})
+    repo.tag("side-tag")  # off the first-parent chain of main once merged
+    repo.git("checkout", "-q", "main")
+    repo.commit("fix: b", {"a.txt": "a\nb\n"})
+    repo.tag("v0.4")
+    repo.merge("side", "Merge side")
+
+    plain, branch = tmp_path / "plain", tmp_path / "branch"
+    assert main([str(repo.path), "-o", str(plain), "-q"]) == 0
+    assert main([str(repo.path), "-o", str(branch), "--branch", "main", "-q"]) == 0
+    for name in ("CHANGELOG.md", "DEVELOPMENT.md", "ARCHITECTURE.md"):
+        assert (branch / name).read_text(encoding="utf-8") == (plain / name).read_text(
+            encoding="utf-8"
+        )
+
+
+def _missing_objects(path) -> list[str]:
+    out = git(path, "rev-list", "--objects", "--all", "--missing=print")
+    return sorted(line for line in out.splitlines() if line.startswith("?"))
+
+
+def test_metadata_only_run_fetches_nothing_into_a_partial_clone(tagged_repo, tmp_path):
+    tagged_repo.commit("refactor: move", {"a.txt": None, "src/a.txt": "2\n", "b.txt": "b\n"})
+    tagged_repo.git("config", "uploadpack.allowFilter", "true")
+    clone = tmp_path / "clone"
+    origin = tagged_repo.path.as_uri()
+    git(tmp_path, "clone", "-q", "--filter=blob:none", "--no-checkout", origin, str(clone))
+    before = _missing_objects(clone)
+    assert before  # the clone really lacks blobs, and the origin could still serve them
+
+    out = tmp_path / "docs"
+    assert main([str(clone), "-o", str(out), "--metadata-only", "--with-summary", "-q"]) == 0
+    assert (out / "SUMMARY.md").exists()
+    assert _missing_objects(clone) == before
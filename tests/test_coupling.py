@@ -0,0 +1,108 @@
+"""Co-change counting: exact pair counts, merging, eviction and the MinHash estimate."""
+
+from __future__ import annotations
+
+import random
+from collections import Counter
+from itertools import combinations
+
+from gitscribe.analyzers.coupling import (
+    CoChangeCounts,
+    MinHashCoChange,
+    compute_coupling_report,
+)
+from gitscribe.git_reader import GitReader
+
+
+def _history(n: int = 400, seed: int = 7) -> list[tuple[str, list[str]]]:
+    """Commits over 40 files; a.py and b.py always change together, c.py often with them."""
+    rng = random.Random(seed)
+    files = [f"src/f{i}.py" for i in range(40)]
+    commits = []
+    for i in range(n):
+        paths = rng.sample(files, rng.randint(1, 4))
+        if i % 5 == 0:
+            paths += ["a.py", "b.py"] + (["c.py"] if i % 10 == 0 else [])
+        if i % 100 == 3:
+            paths += files  # a mass change, over the per-commit limit
+        commits.append((f"{i:040x}", paths))
+    return commits
+
+
+def _brute_force(commits, max_files):
+    pairs, singles = Counter(), Counter()
+    for _, paths in commits:
+        files = sorted(set(paths))
+        if len(files) > max_files:
+            continue
+        singles.update(files)
+        pairs.update(combinations(files, 2))
+    return pairs, singles
+
+
+def test_exact_counts_and_degrees():
+    commits = _history()
+    counts = CoChangeCounts()
+    for sha, paths in commits:
+        counts.add(sha, paths)
+    report = counts.report(top_n=10_000, min_shared=1)
+    pairs, singles = _brute_force(commits, counts.max_files)
+
+    assert {(p.path, p.other): p.shared for p in report.pairs} == dict(pairs)
+    top = report.pairs[0]
+    assert (top.path, top.other, top.shared, top.degree) == ("a.py", "b.py", 80, 1.0)
+    ac = next(p for p in report.pairs if (p.path, p.other) == ("a.py", "c.py"))
+    assert ac.degree == round(2 * 40 / (singles["a.py"] + singles["c.py"]), 4)
+    assert report.commits_skipped == 4  # commits 3, 103, 203, 303
+    assert report.commits_counted == len(commits) - 4
+
+
+def test_merged_ranges_equal_one_pass():
+    commits = _history()
+    whole, first, second = CoChangeCounts(), CoChangeCounts(), CoChangeCounts()
+    for sha, paths in commits:
+        whole.add(sha, paths)
+    for sha, paths in commits[:150]:
+        first.add(sha, paths)
+    for sha, paths in commits[150:]:
+        second.add(sha, paths)
+    assert first.merge(second).report(min_shared=1) == whole.report(min_shared=1)
+
+
+def test_eviction_keeps_frequent_pairs_exact():
+    commits = _history()
+    counts = CoChangeCounts(max_pairs=200)
+    for sha, paths in commits:
+        counts.add(sha, paths)
+    assert counts.evicted_below > 0
+    assert len(counts.pairs) <= 200
+    exact, _ = _brute_force(commits, counts.max_files)
+    report = counts.report(top_n=10_000, min_shared=1)
+    for p in report.pairs:
+        if p.shared > counts.evicted_below:
+            assert p.shared <= exact[(p.path, p.other)]
+    top = report.pairs[0]
+    assert (top.path, top.other, top.shared) == ("a.py", "b.py", 80)  # never evicted
+
+
+def test_minhash_finds_the_strongly_coupled_pairs():
+    commits = _history()
+    estimate = MinHashCoChange()
+    for sha, paths in commits:
+        estimate.add(sha, paths)
+    report = estimate.report(top_n=5)
+    assert report.method == "minhash"
+    top = report.pairs[0]
+    assert (top.path, top.other, top.shared, top.degree) == ("a.py", "b.py", 80, 1.0)
+    ac = next(p for p in report.pairs if {p.path, p.other} == {"a.py", "c.py"})
+    assert abs(ac.shared - 40) <= 8
+
+
+def test_report_from_a_repository(repo):
+    for i in range(3):
+        repo.commit(f"feat: step {i}", {"api.py": f"{i}\n", "client.py": f"{i}\n"})
+    repo.commit("docs", {"README.md": "x\n"})
+    with GitReader(repo.path) as reader:
+        report = compute_coupling_report(reader, reader.get_all_commits())
+    assert [(p.path, p.other, p.shared) for p in report.pairs] == [("api.py", "client.py", 3)]
+    assert report.commits_counted == 4
@@ -0,0 +1,44 @@
+"""Saved analysis results: each format renders the same documents as the live run."""
+
+from __future__ import annotations
+
+import pytest
+
+from gitscribe.cli import main
+from gitscribe.export import read_results, write_results
+
+
+@pytest.fixture
+def history(repo):
+    repo.commit("feat: core", {"src/core.py": "a = 1\n", "README.md": "# x\n"})
+    repo.tag("v1.0", message="First release")
+    repo.git("checkout", "-q", "-b", "topic")
+    repo.commit("feat: api module", {"src/api/__init__.py": "", "src/api/v1.py": "x = 1\n"})
+    repo.git("checkout", "-q", "main")
+    repo.commit("refactor: rename core", {"src/core.py": None, "src/engine.py": "a = 1\n"})
+    repo.merge("topic", "Merge topic")
+    repo.commit("feat!: drop v1 api\n\nBREAKING CHANGE: v1 is gone.", {"src/api/v1.py": None})
+    repo.tag("v2.0")
+    repo.commit("fix: engine ünïcode", {"src/engine.py": "a = 2  # ü\n"})
+    return repo
+
+
+@pytest.mark.parametrize("suffix", [".ndjson", ".json", ".msgpack"])
+def test_rendering_from_an_export_matches_the_live_run(history, tmp_path, suffix):
+    if suffix == ".msgpack":
+        pytest.importorskip("msgpack")
+    saved = tmp_path / f"results{suffix}"
+    live, replay = tmp_path / "live", tmp_path / "replay"
+    options = ["--with-summary", "--no-cache", "-q"]
+    assert main([str(history.path), "-o", str(live), "--export", str(saved), *options]) == 0
+    assert main(["--from-export", str(saved), "-o", str(replay), *options]) == 0
+
+    names = sorted(p.name for p in live.iterdir())
+    assert names == ["ARCHITECTURE.md", "CHANGELOG.md", "DEVELOPMENT.md", "SUMMARY.md"]
+    for name in names:
+        text = (live / name).read_text(encoding="utf-8")
+        assert (replay / name).read_text(encoding="utf-8") == text, name
+
+    again = tmp_path / f"again{suffix}"
+    write_results(read_results(saved), again)
+    assert again.read_bytes() == saved.read_bytes()
@@ -0,0 +1,39 @@
+"""GitReader: refs and tags from one for-each-ref call."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from gitscribe.git_reader import GitReader
+
+
+def test_refs_are_peeled_to_commits(repo):
+    first = repo.commit("one", {"a.txt": "1\n"})
+    repo.tag("v1.0")
+    repo.tag("v1.1", message="Release 1.1\n\nWith notes.")
+    repo.git("tag", "-a", "v1.1-retag", "-m", "Tag of a tag", "v1.1")
+    repo.git("tag", "-a", "tree-tag", "-m", "Not a commit", "HEAD^{tree}")
+    repo.git("branch", "stable")
+    second = repo.commit("two", {"a.txt": "2\n"})
+
+    with GitReader(repo.path) as reader:
+        tags = {t.name: t for t in reader.get_tags()}
+        branches = dict(reader.get_branches())
+        assert reader.get_refs() is reader.get_refs()  # read once per reader
+
+    assert {name: t.sha for name, t in tags.items()} == {
+        "v1.0": first,
+        "v1.1": first,
+        "v1.1-retag": first,
+        "tree-tag": None,
+    }
+    assert not tags["v1.0"].is_annotated and tags["v1.0"].tag_message is None
+    annotated = tags["v1.1"]
+    assert annotated.is_annotated
+    assert annotated.tag_message == "Release 1.1\n\nWith notes."
+    assert annotated.tagger == "Test Author"
+    assert annotated.tag_date is not None
+    assert annotated.tag_date.astimezone(timezone.utc) == datetime(
+        2024, 1, 2, 12, tzinfo=timezone.utc
+    )
+    assert branches == {"main": second, "stable": first}
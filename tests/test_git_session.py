@@ -0,0 +1,71 @@
+"""The long-lived cat-file / diff-tree processes: answer framing and restarts."""
+
+from __future__ import annotations
+
+import shutil
+import stat
+
+import pytest
+from git.exc import GitCommandError
+
+from gitscribe.git_session import GitSession
+
+_ARGS = ["-r", "-M", "--numstat", "-z"]
+
+
+@pytest.fixture
+def trees(repo):
+    """Tree SHAs of three commits: an edit, then a rename plus a path with a newline."""
+    repo.commit("one", {"a.txt": "1\n", "keep.txt": "k\n" * 20})
+    repo.commit("two", {"a.txt": "1\n2\n"})
+    repo.commit("three", {"keep.txt": None, "moved.txt": "k\n" * 20, "odd\nname.txt": "x\n"})
+    return repo, [repo.git("rev-parse", f"HEAD~{n}^{{tree}}") for n in (2, 1, 0)]
+
+
+def _flaky_git(tmp_path) -> str:
+    """A git whose first process stops reading its input after two lines."""
+    script = tmp_path / "flaky-git"
+    started = tmp_path / "flaky-started"
+    script.write_text(
+        "#!/bin/sh\n"
+        f'if [ -e "{started}" ]; then exec "{shutil.which("git")}" "$@"; fi\n'
+        f'touch "{started}"\n'
+        f'head -n 2 | "{shutil.which("git")}" "$@"\n',
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    return str(script)
+
+
+def test_batched_answers_match_one_shot_diff_tree(trees):
+    repo, (t1, t2, t3) = trees
+    pairs = [(t1, t2), (t2, t2), (t2, t3), (t1, t3)]
+    session = GitSession(str(repo.path))
+    try:
+        answers = session.tree_diffs(_ARGS, pairs)
+        assert session.tree_diffs(_ARGS, pairs[1:2]) == [[]]  # the same process, in step
+        assert session.started == 1
+    finally:
+        session.close()
+    expected = [repo.git("diff-tree", *_ARGS, old, new).encode() for old, new in pairs]
+    assert answers[1] == []
+    assert [b"\0".join(a) + b"\0" if a else b"" for a in answers] == expected
+    assert any(b"odd\nname.txt" in token for token in answers[2])
+
+
+def test_process_dying_mid_batch_fails_the_batch_and_is_restarted(trees, tmp_path):
+    repo, (t1, t2, t3) = trees
+    session = GitSession(str(repo.path), git=_flaky_git(tmp_path))
+    try:
+        with pytest.raises(GitCommandError):
+            session.tree_diffs(_ARGS, [(t1, t2), (t2, t3)])  # dies after the first answer
+        assert session.tree_diffs(_ARGS, [(t1, t2), (t2, t3)]) == [
+            session.tree_diffs(_ARGS, [(t1, t2)])[0],
+            session.tree_diffs(_ARGS, [(t2, t3)])[0],
+        ]
+        assert session.started == 2
+
+        info = session.object_info([t1, "no-such-rev", t3])  # a fresh cat-file
+        assert [i and i[:2] for i in info] == [(t1, "tree"), None, (t3, "tree")]
+    finally:
+        session.close()
@@ -0,0 +1,89 @@
+"""The portable history index: build, extend, verify, and documents rendered from it."""
+
+from __future__ import annotations
+
+import pytest
+
+from gitscribe.cli import main
+from gitscribe.git_reader import GitReader
+from gitscribe.history_index import build_index, open_index, verify_index
+
+
+@pytest.fixture
+def history(repo):
+    repo.commit("feat: core", {"src/core.py": "a = 1\n", "bin.dat": "\0\1\2"})
+    repo.tag("v1.0")
+    repo.git("checkout", "-q", "-b", "topic")
+    repo.commit("feat: api", {"src/api.py": "x = 1\ny = 2\n"})
+    repo.git("checkout", "-q", "main")
+    repo.commit("refactor: rename", {"src/core.py": None, "src/engine.py": "a = 1\n"})
+    repo.merge("topic", "Merge topic")
+    return repo
+
+
+def _grow(repo):
+    repo.commit("fix: engine", {"src/engine.py": "a = 2\n"})
+    repo.tag("v1.1")
+    repo.commit("docs: readme", {"README.md": "# x\n"})
+
+
+def test_index_holds_what_the_reader_reads(history, tmp_path):
+    path = tmp_path / "history.idx"
+    with GitReader(history.path) as reader:
+        assert build_index(reader, path) == (4, 4)
+        commits = reader.get_all_commits(first_parent=False)
+        index = open_index(path)
+        try:
+            assert verify_index(reader, index) is None
+            assert [c.sha for c in index.commits()] == [c.sha for c in commits]
+            for i, c in enumerate(commits):
+                stored = index.commit(i)
+                assert (stored.message, stored.parent_shas) == (c.message, c.parent_shas)
+                assert stored.authored_date == c.authored_date
+                stats, _ = index.diff_stats(i)
+                assert stats == reader.get_diff_stats(c.sha)
+        finally:
+            index.close()
+
+
+def test_extending_reads_only_new_commits_and_matches_a_rebuild(history, tmp_path):
+    extended, rebuilt = tmp_path / "extended.idx", tmp_path / "rebuilt.idx"
+    with GitReader(history.path) as reader:
+        build_index(reader, extended)
+    _grow(history)
+    with GitReader(history.path) as reader:
+        assert build_index(reader, extended) == (6, 2)
+        assert build_index(reader, extended) == (6, 0)  # already up to date
+        assert build_index(reader, rebuilt, extend=False) == (6, 6)
+    assert extended.read_bytes() == rebuilt.read_bytes()
+
+
+def test_verify_rejects_rewritten_history(history, tmp_path):
+    path = tmp_path / "history.idx"
+    with GitReader(history.path) as reader:
+        build_index(reader, path)
+    history.git("commit", "-q", "--amend", "-m", "Merge topic (reworded)")
+    with GitReader(history.path) as reader:
+        index = open_index(path)
+        try:
+            assert "not an ancestor of HEAD" in verify_index(reader, index)
+        finally:
+            index.close()
+        assert build_index(reader, path) == (4, 4)  # rebuilt from scratch
+
+
+def test_documents_from_an_extended_index_match_a_plain_run(history, tmp_path):
+    path = tmp_path / "history.idx"
+    assert main(["index", "build", str(history.path), "-f", str(path), "-q"]) == 0
+    _grow(history)
+    assert main(["index", "build", str(history.path), "-f", str(path), "-q"]) == 0
+    assert main(["index", "verify", str(history.path), "-f", str(path), "-q"]) == 0
+
+    plain, indexed = tmp_path / "plain", tmp_path / "indexed"
+    options = ["--with-summary", "--no-cache", "-q"]
+    assert main([str(history.path), "-o", str(plain), *options]) == 0
+    assert main([str(history.path), "-o", str(indexed), "--index", str(path), *options]) == 0
+    for page in plain.iterdir():
+        assert (indexed / page.name).read_text(encoding="utf-8") == page.read_text(
+            encoding="utf-8"
+        ), page.name
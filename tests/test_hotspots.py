@@ -0,0 +1,77 @@
+"""Hotspot ranking and the append-only blob size cache behind it."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from gitscribe.analyzers.churn import ChurnCounts
+from gitscribe.analyzers.hotspots import rank_hotspots
+from gitscribe.cache import SizeCache
+from gitscribe.git_reader import DiffStat, GitReader
+
+_A, _B, _C = "a" * 40, "b" * 40, "c" * 40
+
+
+def _stat(path: str, ins: int = 1, dels: int = 0) -> DiffStat:
+    return DiffStat(path, ins, dels, False)
+
+
+def test_size_cache_appends_after_a_truncated_tail(tmp_path):
+    path = tmp_path / "sizes.bin"
+    cache = SizeCache(path)
+    cache.set(_A, 10)
+    cache.set(_B, 20)
+    cache.save()
+    raw = path.read_bytes()
+    path.write_bytes(raw[:-3])  # the second record was cut short
+
+    cache = SizeCache(path)
+    assert (cache.get(_A), cache.get(_B)) == (10, None)
+    cache.set(_C, 30)
+    cache.save()
+    cache.set(_B, 20)
+    cache.save()
+    reloaded = SizeCache(path)
+    assert {sha: reloaded.get(sha) for sha in (_A, _B, _C)} == {_A: 10, _B: 20, _C: 30}
+    assert path.stat().st_size == len(raw) + 29  # nothing left of the partial record
+
+
+def test_size_cache_rewrites_a_file_with_a_foreign_header(tmp_path):
+    path = tmp_path / "sizes.bin"
+    for stale in (b"not a size cache", b"GSSIZES\0\x63\0\0\0", b"GSS"):
+        path.write_bytes(stale)
+        cache = SizeCache(path)
+        assert len(cache) == 0
+        cache.set(_A, 10)
+        cache.save()
+        assert SizeCache(path).get(_A) == 10
+        assert path.stat().st_size == 12 + 29
+
+
+def test_rank_hotspots_scores_existing_files_by_churn_size_and_recency(repo, tmp_path):
+    repo.commit("add", {"big.txt": "x" * 4096, "small.txt": "s\n", "gone.txt": "g\n"})
+    repo.commit("drop", {"gone.txt": None})
+    day = 86400.0
+    counts = ChurnCounts()
+    counts.add([_stat("big.txt"), _stat("small.txt"), _stat("gone.txt")], when=0.0)
+    counts.add([_stat("small.txt", 2, 1)], when=365 * day)
+    counts.add([_stat("small.txt"), _stat("gone.txt")], when=730 * day)
+
+    cache = SizeCache(tmp_path / "sizes.bin")
+    with GitReader(repo.path) as reader:
+        now = datetime.fromtimestamp(730 * day, timezone.utc)
+        hotspots = rank_hotspots(reader, counts, now=now, size_cache=cache)
+        assert [h.path for h in rank_hotspots(reader, counts, top_n=1)] == ["big.txt"]
+
+    assert [h.path for h in hotspots] == ["big.txt", "small.txt"]  # gone.txt is not at HEAD
+    big, small = hotspots
+    assert (big.size, big.commits, big.age_days, big.score) == (4096, 1, 730, 1.0)
+    assert (small.size, small.commits, small.lines_changed) == (2, 3, 5)
+    assert (small.first_changed, small.last_changed) == ("1970-01-01", "1972-01-01")
+    assert small.score == round(3 * 2 / 1024, 2)
+    cached = SizeCache(tmp_path / "sizes.bin")
+    assert sorted(cached.get(sha) for sha in _blob_shas(repo)) == [2, 4096]
+
+
+def _blob_shas(repo) -> list[str]:
+    return [line.split()[2] for line in repo.git("ls-tree", "HEAD").splitlines()]
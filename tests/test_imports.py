@@ -0,0 +1,63 @@
+"""Startup cost: the CLI module and the package facades import nothing heavy up front."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+_SRC = Path(__file__).resolve().parents[1] / "src"
+
+_HEAVY = ("git.", "gitscribe.analyzers.", "gitscribe.generators.")  # GitPython is "git"
+
+
+def _loaded_after(code: str) -> list[str]:
+    """Heavy modules in sys.modules after running code in a fresh interpreter."""
+    probe = f"heavy = [m for m in sys.modules if m == 'git' or m.startswith({_HEAVY!r})]"
+    script = "\n".join([code, "import sys", probe, "print(' '.join(heavy), file=sys.stderr)"])
+    path = os.pathsep.join(filter(None, [str(_SRC), os.environ.get("PYTHONPATH")]))
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": path},
+    ).stderr
+    return out.split()
+
+
+def test_importing_cli_loads_no_git_analyzers_or_generators():
+    assert _loaded_after("import gitscribe.cli") == []
+
+
+def test_version_loads_no_git_analyzers_or_generators():
+    code = (
+        "from gitscribe.cli import main\n"
+        "try:\n"
+        "    main(['--version'])\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    assert _loaded_after(code) == []
+
+
+def test_package_facades_import_submodules_on_first_use():
+    loaded = _loaded_after("import gitscribe.analyzers, gitscribe.generators")
+    assert loaded == []
+    loaded = _loaded_after("from gitscribe.generators import generate_summary_md")
+    assert "gitscribe.generators.summary" in loaded
+    assert "gitscribe.generators.changelog" not in loaded
+
+
+def test_lazy_exports_resolve_cache_and_list_names():
+    import gitscribe.analyzers as analyzers
+    from gitscribe.analyzers.hotspots import rank_hotspots
+
+    assert analyzers.rank_hotspots is rank_hotspots
+    assert "rank_hotspots" in vars(analyzers)  # stored after the first lookup
+    assert set(analyzers.__all__) <= set(dir(analyzers))
+    with pytest.raises(AttributeError, match="no_such_name"):
+        _ = analyzers.no_such_name
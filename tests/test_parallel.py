@@ -0,0 +1,82 @@
+"""Sharded analysis: merged shard results against one pass over the whole history."""
+
+from __future__ import annotations
+
+import pytest
+
+from gitscribe.analyzers.breaking import detect_breaking_changes, merge_breaking_changes
+from gitscribe.analyzers.churn import count_churn
+from gitscribe.analyzers.timeline import build_development_timeline, merge_timelines
+from gitscribe.cli import main
+from gitscribe.git_reader import GitReader
+from gitscribe.parallel import split_shards
+
+
+@pytest.fixture
+def history(repo):
+    """Twelve commits over two directories: features, fixes, tags and breaking changes."""
+    repo.commit("feat: core", {"src/core.py": "x\n" * 40, "docs/a.md": "a\n"})
+    repo.commit("chore: tidy", {"docs/a.md": "a\nb\n"})
+    repo.commit("fix: core edge case", {"src/core.py": "x\n" * 39 + "y\n"})
+    repo.tag("v0.1")
+    repo.commit("feat: api", {"src/api.py": "def f():\n    pass\n" * 300})
+    repo.commit("refactor: split core", {"src/core.py": "x\n" * 20, "src/util.py": "x\n" * 20})
+    repo.commit("feat!: drop the old api", {"src/api.py": None})
+    repo.tag("v1.0")
+    repo.commit("docs: guide", {"docs/guide.md": "g\n" * 600})
+    repo.commit("Remove the generated docs", {"docs/guide.md": None, "src/gen.py": "x\n"})
+    repo.commit("fix: util", {"src/util.py": "x\n" * 21})
+    repo.commit("perf: faster core\n\nBREAKING CHANGE: new config keys", {"src/core.py": "z\n"})
+    repo.tag("v2.0")
+    repo.commit("test: core", {"tests/test_core.py": "t\n" * 35})
+    repo.commit("feat: cli", {"src/cli.py": "c\n" * 31})
+    return repo
+
+
+def test_three_jobs_write_the_same_docs_as_one(history, tmp_path):
+    one, three = tmp_path / "one", tmp_path / "three"
+    for out, jobs in ((one, "1"), (three, "3")):
+        assert main([str(history.path), "-o", str(out), "--with-summary", "-j", jobs, "-q"]) == 0
+    pages = sorted(p.relative_to(one) for p in one.rglob("*.md"))
+    assert [p.name for p in pages] == [
+        "ARCHITECTURE.md",
+        "CHANGELOG.md",
+        "DEVELOPMENT.md",
+        "SUMMARY.md",
+    ]
+    assert sorted(p.relative_to(three) for p in three.rglob("*.md")) == pages
+    for page in pages:
+        assert (three / page).read_text(encoding="utf-8") == (one / page).read_text(
+            encoding="utf-8"
+        )
+
+
+@pytest.mark.parametrize("shards", [2, 3, 5, 12])
+def test_split_ranges_merge_to_one_pass(history, shards):
+    with GitReader(history.path) as reader:
+        commits = reader.get_all_commits()
+        tag_shas = {t.sha for t in reader.get_tags() if t.sha}
+        parts = split_shards(commits, shards)
+        assert [c for part in parts for c in part] == commits
+
+        whole = count_churn(reader, commits)
+        merged = count_churn(reader, parts[0])
+        for part in parts[1:]:
+            merged.merge(count_churn(reader, part))
+        for attr in ("path_commits", "path_ins", "path_del", "dir_commits", "dir_lines"):
+            assert list(getattr(merged, attr).items()) == list(getattr(whole, attr).items())
+        assert (merged.path_first, merged.path_last) == (whole.path_first, whole.path_last)
+        assert merged.report() == whole.report()
+
+        for max_events in (150, 4):
+            timelines = [
+                build_development_timeline(reader, p, tag_shas, max_events=max_events)
+                for p in parts
+            ]
+            assert merge_timelines(timelines, max_events=max_events) == (
+                build_development_timeline(reader, commits, tag_shas, max_events=max_events)
+            )
+
+        breaking = merge_breaking_changes(detect_breaking_changes(reader, p) for p in parts)
+        assert breaking == detect_breaking_changes(reader, commits)
+        assert len(breaking) == 3  # two marked in the message, one large deletion
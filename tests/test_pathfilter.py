@@ -0,0 +1,80 @@
+"""Changed-path Bloom filters: Git's hashing and filters, and the commits they select."""
+
+from __future__ import annotations
+
+import pytest
+
+from gitscribe.git_reader import GitReader
+from gitscribe.pathfilter import ChangedPathFilter, CommitGraphFilters, FilterBuilder, murmur3
+
+
+@pytest.mark.parametrize(
+    "seed, data, expected",
+    [  # git's t/t0095-bloom.sh
+        (0, b"", 0x00000000),
+        (1, b"", 0x514E28B7),
+        (0, b"Hello world!", 0x627B0C2C),
+        (0, b"The quick brown fox jumps over the lazy dog", 0x2E4FF723),
+        (0, bytes([0x99, 0xAA, 0xBB, 0xCC, 0xDD, 0xEE, 0xFF]), 0xA183CCFD),  # version 2
+    ],
+)
+def test_murmur3_matches_git(seed, data, expected):
+    assert murmur3(seed, data) == expected
+
+
+@pytest.fixture
+def monorepo(repo):
+    repo.commit("init", {"README.md": "x\n", "services/api/app.py": "1\n"})
+    repo.commit("web", {"services/web/deep/nested/index.js": "1\n", "lib/util.py": "1\n"})
+    repo.git("checkout", "-q", "-b", "topic")
+    repo.commit("api work", {"services/api/app.py": "2\n", "services/api/new.py": "1\n"})
+    repo.git("checkout", "-q", "main")
+    repo.commit("move util", {"lib/util.py": None, "lib/helpers/util.py": "1\n"})
+    repo.merge("topic", "Merge topic")
+    repo.commit("empty", {})
+    repo.git("commit-graph", "write", "--reachable", "--changed-paths")
+    return repo
+
+
+def _first_parent_paths(repo, sha: str) -> list[str]:
+    parents = repo.git("rev-list", "--parents", "-n1", sha).split()[1:]
+    base = parents[:1] or ["--root"]
+    out = repo.git("diff-tree", "-r", "--no-commit-id", "--name-only", "--no-renames", *base, sha)
+    return out.splitlines()
+
+
+def test_computed_filters_equal_the_commit_graph(monorepo):
+    graph = CommitGraphFilters.load(monorepo.path / ".git")
+    assert graph is not None
+    builder = FilterBuilder()
+    shas = monorepo.git("rev-list", "--all").split()
+    assert len(shas) == 6
+    for sha in shas:
+        assert builder.build(_first_parent_paths(monorepo, sha)) == graph.get(sha), sha
+
+
+@pytest.mark.parametrize("path", ["services/api", "services/web/deep", "lib", "lib/util.py"])
+def test_candidates_contain_every_commit_that_changes_the_path(monorepo, tmp_path, path):
+    with GitReader(monorepo.path) as reader:
+        commits = reader.get_all_commits(first_parent=True)
+        touching = {
+            c.sha
+            for c in commits
+            if any(
+                p == path or p.startswith(path + "/")
+                for p in _first_parent_paths(monorepo, c.sha)
+            )
+        }
+        from_graph = ChangedPathFilter(reader, None)
+        assert touching <= from_graph.candidates(commits, path)
+        assert from_graph.sources["commit-graph"] == len(commits)
+
+        monorepo.git("commit-graph", "write", "--reachable", "--no-changed-paths")
+        computed = ChangedPathFilter(reader, tmp_path)
+        assert computed.graph is None
+        assert computed.candidates(commits, path) == from_graph.candidates(commits, path)
+        assert computed.sources["computed"] == len(commits)
+
+        cached = ChangedPathFilter(reader, tmp_path)
+        assert cached.candidates(commits, path) == from_graph.candidates(commits, path)
+        assert cached.sources == {"commit-graph": 0, "cache": len(commits), "computed": 0}
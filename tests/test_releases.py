@@ -0,0 +1,72 @@
+"""Release ranges and per-release diff stats."""
+
+from __future__ import annotations
+
+import pytest
+
+from gitscribe.analyzers.releases import compute_release_stats, release_ranges
+from gitscribe.generators.changelog import generate_changelog_md
+from gitscribe.git_reader import DiffSummary, GitReader
+
+
+@pytest.fixture
+def side_tag_repo(repo):
+    """
+    v0.3 on main, side-tag on a branch cut from it, v0.4 on main, then the branch is
+    merged. In date order the side tag sits between v0.4 and v0.3 without being an
+    ancestor of v0.4.
+    """
+    shas = {"v0.3": repo.commit("feat: a", {"a.txt": "a\n"})}
+    repo.tag("v0.3")
+    repo.git("checkout", "-q", "-b", "side")
+    shas["side-tag"] = repo.commit("feat: side work", {"s.txt": "s\n"})
+    repo.tag("side-tag")
+    repo.git("checkout", "-q", "main")
+    shas["v0.4"] = repo.commit("fix: b", {"a.txt": "a\nb\n", "gone.txt": "x\n"})
+    repo.tag("v0.4")
+    repo.merge("side", "Merge side")
+    return repo, shas
+
+
+def _tags(reader: GitReader) -> dict[str, list[str]]:
+    tags: dict[str, list[str]] = {}
+    for t in reader.get_tags():
+        tags.setdefault(t.sha, []).append(t.name)
+    return tags
+
+
+def test_previous_release_is_the_nearest_tagged_ancestor(side_tag_repo):
+    repo, shas = side_tag_repo
+    with GitReader(repo.path) as reader:
+        commits = reader.get_all_commits(first_parent=False)
+        ranges = dict(release_ranges(commits, _tags(reader)))
+    assert [c.sha for c in commits].index(shas["side-tag"]) == 2  # listed before v0.3
+    assert ranges == {
+        shas["v0.4"]: shas["v0.3"],
+        shas["side-tag"]: shas["v0.3"],
+        shas["v0.3"]: None,
+    }
+
+
+def test_first_parent_ranges_follow_the_chain(side_tag_repo):
+    repo, shas = side_tag_repo
+    with GitReader(repo.path) as reader:
+        commits = reader.get_all_commits(first_parent=True)
+        ranges = release_ranges(commits, _tags(reader))
+    assert ranges == [(shas["v0.4"], shas["v0.3"]), (shas["v0.3"], None)]
+
+
+def test_full_history_stats_and_changelog_diff_against_an_ancestor(side_tag_repo):
+    repo, shas = side_tag_repo
+    with GitReader(repo.path) as reader:
+        commits = reader.get_all_commits(first_parent=False)
+        tags = _tags(reader)
+        stats = compute_release_stats(reader, commits, tags)
+    assert stats[shas["v0.4"]] == DiffSummary(files=2, insertions=2, deletions=0)
+    assert stats[shas["side-tag"]] == DiffSummary(files=1, insertions=1, deletions=0)
+    assert stats[shas["v0.3"]] == DiffSummary(files=1, insertions=1, deletions=0)
+
+    md = generate_changelog_md(commits, tags, [], full_history=True, release_stats=stats)
+    assert "*2 files changed, +2 -0 (since v0.3)*" in md
+    assert "*1 files changed, +1 -0 (since v0.3)*" in md
+    assert "since side-tag" not in md
@@ -0,0 +1,50 @@
+"""Sampled analysis: which commits are kept and the reported margin of error."""
+
+from __future__ import annotations
+
+import math
+
+import pytest
+from conftest import make_commit
+
+from gitscribe.analyzers.sampling import sample_commits
+
+
+def _history(n: int):
+    return [make_commit(f"{i:040x}") for i in range(n)]
+
+
+def test_one_commit_per_stratum_plus_forced_commits():
+    commits = _history(1000)
+    forced = {commits[5].sha, commits[995].sha}
+    sampled, info = sample_commits(commits, 0.1, always_include=forced)
+
+    positions = [commits.index(c) for c in sampled]
+    assert positions == sorted(positions)
+    assert {5, 995} <= set(positions)
+    strata = [p // 10 for p in positions if p not in (5, 995)]
+    assert strata == list(range(100))  # evenly spread: one per 10 commits
+    assert (info.total_commits, info.sampled_commits, info.forced_commits) == (1000, 102, 2)
+
+
+def test_margin_uses_the_finite_population_correction():
+    _, info = sample_commits(_history(1000), 0.1)
+    assert info.sampled_commits == 100
+    assert info.margin_of_error == pytest.approx(1.96 * math.sqrt(0.25 / 100 * 900 / 999))
+    assert info.margin_of_error < 1.96 * math.sqrt(0.25 / 100)  # tighter than infinite N
+    assert "±9.3% at 95% confidence." in info.describe()
+
+    commits = _history(1000)
+    forced = {c.sha for c in commits[:50]}
+    _, info = sample_commits(commits, 0.1, always_include=forced)
+    drawn = info.sampled_commits - info.forced_commits
+    assert (info.forced_commits, drawn) == (50, 95)  # strata 0-4 hold only forced commits
+    assert info.margin_of_error == pytest.approx(1.96 * math.sqrt(0.25 / 95 * 855 / 949))
+    assert "forced commits are outside the estimate" in info.describe()
+
+
+def test_full_sample_has_no_margin():
+    sampled, info = sample_commits(_history(50), 1.0)
+    assert len(sampled) == 50
+    assert info.margin_of_error == 0.0
+    assert info.ratio == 1.0
@@ -0,0 +1,66 @@
+"""The query server: changelog ranges over HTTP and the --socket path."""
+
+from __future__ import annotations
+
+import socket
+import threading
+import urllib.request
+
+import pytest
+from test_changelog import _sections
+
+from gitscribe.git_reader import GitReader
+from gitscribe.server import RepoState, create_server
+
+
+@pytest.fixture
+def served(repo):
+    repo.commit("first", {"a.txt": "1\n"})
+    repo.tag("v0.4")
+    repo.commit("second", {"a.txt": "2\n"})
+    repo.commit("third", {"a.txt": "3\n"})
+    repo.tag("v1.0")
+    repo.commit("after", {"a.txt": "4\n"})
+    repos = {"repo": RepoState(GitReader(repo.path), name="repo")}
+    server = create_server(repos, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/repo"
+    server.shutdown()
+    server.server_close()
+    repos["repo"].reader.close()
+
+
+def _get(url: str) -> str:
+    with urllib.request.urlopen(url) as response:
+        return response.read().decode("utf-8")
+
+
+def test_changelog_range_ending_at_a_tag_has_nothing_unreleased(served):
+    sections = _sections(_get(f"{served}/changelog?from=v0.4&to=v1.0"))
+    assert sections == {"Unreleased": [], "v1.0": ["third", "second"]}
+
+
+def test_changelog_to_head_lists_commits_after_the_tag_as_unreleased(served):
+    sections = _sections(_get(f"{served}/changelog?from=v0.4"))
+    assert sections == {"Unreleased": ["after"], "v1.0": ["third", "second"]}
+
+
+def test_socket_path_holding_a_regular_file_is_left_alone(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me\n", encoding="utf-8")
+    with pytest.raises(FileExistsError, match="not a socket"):
+        create_server({}, socket_path=path, quiet=True)
+    assert path.read_text(encoding="utf-8") == "keep me\n"
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = tmp_path / "s.sock"
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(path))
+    stale.close()  # the socket file outlives its server
+    server = create_server({}, socket_path=path, quiet=True)
+    try:
+        assert path.is_socket()
+    finally:
+        server.server_close()